@@ -1,45 +1,87 @@
 # backend/app/controllers/contributors.py
+import asyncio
 import logging
 from typing import Dict, List, Optional, Any
 
+from app.db.store import RepositoryStore, get_store
+from app.jobs.manager import RepositoryNotSyncedError, RepositorySyncFailedError, SyncJobManager, get_job_manager
 from app.services.github.contributors import GitHubContributorsService
+from app.utils.singleflight import get_single_flight
 
 logger = logging.getLogger(__name__)
 
+contributors_flight = get_single_flight("repository_contributors")
+
 
 class ContributorsController:
     """Controller for contributor-related operations."""
 
-    def __init__(self):
-        self.github_service = GitHubContributorsService()
+    def __init__(self, github_service: Optional[GitHubContributorsService] = None,
+                 store: Optional[RepositoryStore] = None, jobs: Optional[SyncJobManager] = None):
+        self.github_service = github_service or GitHubContributorsService()
+        self.store = store or get_store()
+        self.jobs = jobs or get_job_manager()
 
     async def get_repository_contributors(self, owner: str, repo: str, start_date: Optional[str] = None,
-                                          end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+                                          end_date: Optional[str] = None,
+                                          mode: str = "aggregate") -> List[Dict[str, Any]]:
         """Get repository contributors with their statistics."""
 
         logger.info(f"Fetching contributors for {owner}/{repo} from {start_date} to {end_date}")
 
         try:
-            contributors = self.github_service.get_repository_contributors(
-                owner=owner,
-                repo=repo,
-                start_date=start_date,
-                end_date=end_date
+            # Identical requests arriving together share a single computation
+            key = (owner.lower(), repo.lower(), start_date, end_date, mode)
+            contributors = await contributors_flight.do(
+                key, lambda: self._fetch_repository_contributors(owner, repo, start_date, end_date, mode)
             )
 
             logger.info(f"Successfully fetched {len(contributors)} contributors for {owner}/{repo}")
             return contributors
+        except (RepositoryNotSyncedError, RepositorySyncFailedError) as e:
+            logger.info(str(e))
+            raise e
         except Exception as e:
             logger.error(f"Error fetching repository contributors: {str(e)}")
             raise e
 
+    async def _fetch_repository_contributors(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                             end_date: Optional[str] = None,
+                                             mode: str = "aggregate") -> List[Dict[str, Any]]:
+        """Get repository contributors from the local store if the repository was synced.
+
+        Otherwise a sync job is queued when background jobs are enabled, or the contributors are crawled from GitHub.
+        """
+
+        if await asyncio.to_thread(self.store.is_synced, owner, repo):
+            logger.info(f"Reading contributors for {owner}/{repo} from the local store")
+            return await asyncio.to_thread(self.store.get_repository_contributors, owner, repo, start_date, end_date)
+
+        if self.jobs.enabled:
+            raise RepositoryNotSyncedError(await self.jobs.enqueue(owner, repo))
+
+        return await self.github_service.get_repository_contributors(
+            owner=owner,
+            repo=repo,
+            start_date=start_date,
+            end_date=end_date,
+            mode=mode
+        )
+
     async def get_contributor_weekly_stats(self, owner: str, repo: str, weeks: int = 4) -> Dict[str, Any]:
         """Get weekly statistics for each contributor."""
 
         logger.info(f"Fetching weekly stats for contributors of {owner}/{repo} for {weeks} weeks")
 
         try:
-            weekly_stats = self.github_service.get_contributor_weekly_stats(
+            if await asyncio.to_thread(self.store.is_synced, owner, repo):
+                logger.info(f"Reading weekly stats for {owner}/{repo} from the local store")
+                return await asyncio.to_thread(self.store.get_contributor_weekly_stats, owner, repo, weeks)
+
+            if self.jobs.enabled:
+                raise RepositoryNotSyncedError(await self.jobs.enqueue(owner, repo))
+
+            weekly_stats = await self.github_service.get_contributor_weekly_stats(
                 owner=owner,
                 repo=repo,
                 weeks=weeks
@@ -47,6 +89,9 @@ class ContributorsController:
 
             logger.info(f"Successfully fetched weekly stats for contributors of {owner}/{repo}")
             return weekly_stats
+        except (RepositoryNotSyncedError, RepositorySyncFailedError) as e:
+            logger.info(str(e))
+            raise e
         except Exception as e:
             logger.error(f"Error fetching weekly contributor stats: {str(e)}")
             raise e
\ No newline at end of file
@@ -0,0 +1,31 @@
+# backend/app/controllers/jobs.py
+import asyncio
+import logging
+from typing import Dict, List, Optional, Any
+
+from app.jobs.manager import SyncJobManager, get_job_manager
+
+logger = logging.getLogger(__name__)
+
+
+class JobsController:
+    """Controller for background sync job operations."""
+
+    def __init__(self, jobs: Optional[SyncJobManager] = None):
+        self.jobs = jobs or get_job_manager()
+
+    async def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recent sync jobs."""
+
+        return await asyncio.to_thread(self.jobs.store.list_jobs, status, limit)
+
+    async def get_job(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a sync job, or None if it doesn't exist."""
+
+        return await asyncio.to_thread(self.jobs.store.get, job_id)
+
+    async def create_job(self, owner: str, repo: str) -> Dict[str, Any]:
+        """Queue a user-triggered sync of a repository."""
+
+        logger.info(f"Queueing a sync of {owner}/{repo}")
+        return await self.jobs.enqueue(owner, repo)
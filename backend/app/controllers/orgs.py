@@ -0,0 +1,164 @@
+# backend/app/controllers/orgs.py
+import os
+import asyncio
+import logging
+from typing import Dict, List, Optional, Any, Set, Tuple
+
+from app.controllers.contributors import ContributorsController
+from app.controllers.repos import RepositoryController
+from app.jobs.manager import RepositoryNotSyncedError
+from app.services.github.orgs import GitHubOrganizationService
+from app.utils.response_cache import ResponseCache, get_response_cache
+
+logger = logging.getLogger(__name__)
+
+STATS_FIELDS = ("total_commits", "open_pull_requests", "code_reviews", "active_issues")
+CONTRIBUTION_FIELDS = ("commits", "pull_requests", "reviews", "total_contributions")
+
+# Crawls of repositories that weren't done in time, left running to fill the caches
+_background_crawls: Set[asyncio.Task] = set()
+
+
+def _finish_in_background(task: asyncio.Task):
+    def done(task: asyncio.Task):
+        _background_crawls.discard(task)
+        if not task.cancelled() and task.exception() is not None:
+            logger.debug(f"Background repository crawl failed: {str(task.exception())}")
+
+    _background_crawls.add(task)
+    task.add_done_callback(done)
+
+
+def interleave_by_size(repositories: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Order repositories alternating between the largest and the smallest remaining ones.
+
+    Large repositories start early enough to finish, while small ones keep completing in between.
+    """
+
+    by_size = sorted(repositories, key=lambda repository: repository.get("size", 0))
+    interleaved = []
+    while by_size:
+        interleaved.append(by_size.pop())
+        if by_size:
+            interleaved.append(by_size.pop(0))
+    return interleaved
+
+
+class OrganizationController:
+    """Controller for organization-wide operations."""
+
+    def __init__(self, github_service: Optional[GitHubOrganizationService] = None,
+                 repository_controller: Optional[RepositoryController] = None,
+                 contributors_controller: Optional[ContributorsController] = None,
+                 stats_cache: Optional[ResponseCache] = None, contributors_cache: Optional[ResponseCache] = None):
+        self.github_service = github_service or GitHubOrganizationService()
+        self.repository_controller = repository_controller or RepositoryController()
+        self.contributors_controller = contributors_controller or ContributorsController()
+        # Shared with the single-repository endpoints, so either one warms the other
+        self.stats_cache = stats_cache or get_response_cache("repository_stats")
+        self.contributors_cache = contributors_cache or get_response_cache("repository_contributors")
+        self.repo_concurrency = int(os.getenv("ORG_REPO_CONCURRENCY", "8"))
+        self.timeout = float(os.getenv("ORG_STATS_TIMEOUT", "30"))
+
+    async def get_organization_stats(self, org: str, repos: Optional[List[str]] = None,
+                                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                     timeout: Optional[float] = None, top: int = 50) -> Dict[str, Any]:
+        """Get statistics and a merged contributor leaderboard across an organization's repositories.
+
+        Repositories are crawled a few at a time, sharing the GitHub connection pool and rate limit
+        budgets. Those not done within the timeout are reported as pending, and keep being computed
+        in the background so that a later call finds them ready.
+        """
+
+        logger.info(f"Fetching stats for organization {org} from {start_date} to {end_date}")
+
+        if repos:
+            repositories = [
+                {"owner": name.split("/")[0], "repo": name.split("/")[1]} if "/" in name else {"owner": org, "repo": name}
+                for name in repos
+            ]
+        else:
+            repositories = interleave_by_size(await self.github_service.get_organization_repositories(org))
+
+        semaphore = asyncio.Semaphore(self.repo_concurrency)
+
+        async def crawl(owner: str, repo: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+            async with semaphore:
+                stats, contributors = await asyncio.gather(
+                    self.stats_cache.get_or_compute(
+                        (owner.lower(), repo.lower(), start_date, end_date),
+                        lambda: self.repository_controller.get_repository_stats(owner, repo, start_date, end_date)
+                    ),
+                    self.contributors_cache.get_or_compute(
+                        (owner.lower(), repo.lower(), start_date, end_date, "aggregate"),
+                        lambda: self.contributors_controller.get_repository_contributors(
+                            owner, repo, start_date, end_date
+                        )
+                    )
+                )
+                return stats.value, contributors.value
+
+        tasks = [
+            (repository, asyncio.create_task(crawl(repository["owner"], repository["repo"])))
+            for repository in repositories
+        ]
+        if tasks:
+            await asyncio.wait([task for _, task in tasks], timeout=timeout or self.timeout)
+
+        totals = {field: 0 for field in STATS_FIELDS}
+        leaderboard: Dict[str, Dict[str, Any]] = {}
+        repository_stats = []
+        statuses = {"complete": 0, "syncing": 0, "pending": 0, "failed": 0}
+
+        for repository, task in tasks:
+            entry = {"owner": repository["owner"], "repo": repository["repo"]}
+
+            if not task.done():
+                # Finishing it puts its results in the caches for the next call
+                _finish_in_background(task)
+                entry["status"] = "pending"
+            elif isinstance(task.exception(), RepositoryNotSyncedError):
+                entry["status"] = "syncing"
+                entry["job_id"] = task.exception().job["id"]
+            elif task.exception() is not None:
+                entry["status"] = "failed"
+                entry["error"] = str(task.exception())
+            else:
+                stats, contributors = task.result()
+                entry["status"] = "complete"
+                entry["stats"] = {field: stats[field] for field in STATS_FIELDS}
+
+                for field in STATS_FIELDS:
+                    totals[field] += stats[field]
+
+                for contributor in contributors:
+                    merged = leaderboard.setdefault(contributor["username"], {
+                        "username": contributor["username"],
+                        "avatar_url": contributor.get("avatar_url"),
+                        **{field: 0 for field in CONTRIBUTION_FIELDS},
+                        "repositories": 0
+                    })
+                    for field in CONTRIBUTION_FIELDS:
+                        merged[field] += contributor.get(field, 0)
+                    merged["avatar_url"] = merged["avatar_url"] or contributor.get("avatar_url")
+                    merged["repositories"] += 1
+
+            statuses[entry["status"]] += 1
+            repository_stats.append(entry)
+
+        contributors = sorted(leaderboard.values(), key=lambda x: x["total_contributions"], reverse=True)
+
+        logger.info(f"Fetched stats for {statuses['complete']} of {len(tasks)} repositories of {org}")
+
+        return {
+            "organization": org,
+            "partial": statuses["complete"] < len(tasks),
+            "repositories": {"total": len(tasks), **statuses},
+            **totals,
+            "contributors": contributors[:top],
+            "repository_stats": sorted(repository_stats, key=lambda entry: (entry["owner"], entry["repo"])),
+            "period": {
+                "start_date": start_date,
+                "end_date": end_date
+            }
+        }
@@ -1,17 +1,31 @@
 # backend/app/controllers/repositories.py
+import asyncio
 import logging
-from typing import Dict, Optional, Any
+from typing import AsyncIterator, Dict, Optional, Any
 
+from app.db.store import RepositoryStore, get_store
+from app.jobs.manager import RepositoryNotSyncedError, RepositorySyncFailedError, SyncJobManager, get_job_manager
 from app.services.github.repos import GitHubRepositoryService
+from app.services.github.sync import GitHubSyncService
+from app.utils.response_cache import invalidate_repository
+from app.utils.singleflight import get_single_flight
+from app.websocket.hub import publish_repository_event
 
 logger = logging.getLogger(__name__)
 
+stats_flight = get_single_flight("repository_stats")
+
 
 class RepositoryController:
     """Controller for repository-related operations."""
 
-    def __init__(self):
-        self.github_service = GitHubRepositoryService()
+    def __init__(self, github_service: Optional[GitHubRepositoryService] = None,
+                 sync_service: Optional[GitHubSyncService] = None, store: Optional[RepositoryStore] = None,
+                 jobs: Optional[SyncJobManager] = None):
+        self.github_service = github_service or GitHubRepositoryService()
+        self.sync_service = sync_service or GitHubSyncService()
+        self.store = store or get_store()
+        self.jobs = jobs or get_job_manager()
 
     async def get_repository_stats(self, owner: str, repo: str, start_date: Optional[str] = None,
                                    end_date: Optional[str] = None) -> Dict[str, Any]:
@@ -20,15 +34,92 @@ class RepositoryController:
         logger.info(f"Fetching stats for {owner}/{repo} from {start_date} to {end_date}")
 
         try:
-            stats = self.github_service.get_repository_stats(
+            # Identical requests arriving together share a single computation
+            key = (owner.lower(), repo.lower(), start_date, end_date)
+            stats = await stats_flight.do(key, lambda: self._fetch_repository_stats(owner, repo, start_date, end_date))
+
+            logger.info(f"Successfully fetched stats for {owner}/{repo}")
+            return stats
+        except (RepositoryNotSyncedError, RepositorySyncFailedError) as e:
+            logger.info(str(e))
+            raise e
+        except Exception as e:
+            logger.error(f"Error fetching repository stats: {str(e)}")
+            raise e
+
+    async def _fetch_repository_stats(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                      end_date: Optional[str] = None) -> Dict[str, Any]:
+        """Get repository statistics from the local store if the repository was synced.
+
+        Otherwise a sync job is queued when background jobs are enabled, or the stats are crawled from GitHub.
+        """
+
+        if await asyncio.to_thread(self.store.is_synced, owner, repo):
+            logger.info(f"Reading stats for {owner}/{repo} from the local store")
+            return await asyncio.to_thread(self.store.get_repository_stats, owner, repo, start_date, end_date)
+
+        if self.jobs.enabled:
+            raise RepositoryNotSyncedError(await self.jobs.enqueue(owner, repo))
+
+        return await self.github_service.get_repository_stats(
+            owner=owner,
+            repo=repo,
+            start_date=start_date,
+            end_date=end_date
+        )
+
+    async def stream_repository_stats(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                      end_date: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Get repository statistics as progress events followed by the final result.
+
+        Synced repositories are answered from the local store with the result alone; others are crawled
+        from GitHub, reporting partial counts as pages arrive.
+        """
+
+        logger.info(f"Streaming stats for {owner}/{repo} from {start_date} to {end_date}")
+
+        if await asyncio.to_thread(self.store.is_synced, owner, repo):
+            stats = await asyncio.to_thread(self.store.get_repository_stats, owner, repo, start_date, end_date)
+            yield {"type": "result", "stats": stats}
+            return
+
+        async for event in self.github_service.stream_repository_stats(
                 owner=owner,
                 repo=repo,
                 start_date=start_date,
                 end_date=end_date
-            )
+        ):
+            yield event
 
-            logger.info(f"Successfully fetched stats for {owner}/{repo}")
-            return stats
+        logger.info(f"Successfully streamed stats for {owner}/{repo}")
+
+    async def sync_repository(self, owner: str, repo: str) -> Dict[str, Any]:
+        """Sync a repository's activity into the local store, in the background when jobs are enabled."""
+
+        logger.info(f"Syncing {owner}/{repo}")
+
+        try:
+            if self.jobs.enabled:
+                raise RepositoryNotSyncedError(await self.jobs.enqueue(owner, repo))
+
+            result = await self.sync_service.sync_repository(owner=owner, repo=repo)
+
+            # Cached results were computed from GitHub or an older copy of the store
+            invalidate_repository(owner, repo)
+            await publish_repository_event(owner, repo, {"type": "repository_synced", **result})
+
+            logger.info(f"Successfully synced {owner}/{repo} ({result['mode']})")
+            return result
+        except (RepositoryNotSyncedError, RepositorySyncFailedError) as e:
+            logger.info(str(e))
+            raise e
         except Exception as e:
-            logger.error(f"Error fetching repository stats: {str(e)}")
-            raise e
\ No newline at end of file
+            logger.error(f"Error syncing repository: {str(e)}")
+            raise e
+
+    def invalidate_cache(self, owner: str, repo: str) -> Dict[str, Any]:
+        """Drop the cached stats and contributors of a repository."""
+
+        invalidated = invalidate_repository(owner, repo)
+        logger.info(f"Invalidated {invalidated} cached results for {owner}/{repo}")
+        return {"invalidated": invalidated}
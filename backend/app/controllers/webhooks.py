@@ -0,0 +1,59 @@
+# backend/app/controllers/webhooks.py
+import asyncio
+import logging
+from typing import Dict, Optional, Any
+
+from app.db.store import RepositoryStore, get_store
+from app.services.github.webhooks import parse_delivery
+from app.utils.response_cache import invalidate_repository
+from app.websocket.hub import publish_repository_event
+
+logger = logging.getLogger(__name__)
+
+
+class WebhooksController:
+    """Controller for GitHub webhook deliveries."""
+
+    def __init__(self, store: Optional[RepositoryStore] = None):
+        self.store = store or get_store()
+
+    async def handle_delivery(self, event: str, delivery_id: str, payload: Dict[str, Any]) -> Dict[str, Any]:
+        """Apply the activity carried by a webhook delivery to the local store."""
+
+        if event == "ping":
+            return {"status": "pong"}
+
+        repository = payload.get("repository") or {}
+        owner, repo = (repository.get("owner") or {}).get("login"), repository.get("name")
+
+        rows = parse_delivery(event, payload) if owner and repo else None
+        if rows is None:
+            logger.info(f"Ignoring {event} delivery {delivery_id}")
+            return {"status": "ignored"}
+
+        # Upserts make redelivered events harmless
+        applied = await asyncio.to_thread(
+            self.store.save_activity,
+            owner,
+            repo,
+            list(rows.users.values()),
+            rows.commits,
+            rows.pull_requests,
+            rows.reviews,
+            rows.issues
+        )
+        if not applied:
+            logger.info(f"Ignoring {event} delivery {delivery_id} for {owner}/{repo}, which was never synced")
+            return {"status": "ignored"}
+
+        invalidate_repository(owner, repo)
+        await publish_repository_event(owner, repo, {
+            "type": "repository_updated",
+            "owner": owner,
+            "repository_name": repo,
+            "event": event,
+            **rows.counts()
+        })
+
+        logger.info(f"Applied {event} delivery {delivery_id} to {owner}/{repo}")
+        return {"status": "applied", **rows.counts()}
@@ -0,0 +1,27 @@
+import os
+import logging
+from typing import Optional
+
+from sqlalchemy import create_engine
+from sqlalchemy.engine import Engine
+
+from app.db.models import metadata
+
+logger = logging.getLogger(__name__)
+
+_engine: Optional[Engine] = None
+
+
+def get_engine() -> Engine:
+    """Get the process-wide database engine, creating the tables on first use."""
+    global _engine
+
+    if _engine is None:
+        url = os.getenv("DATABASE_URL", "sqlite:///gitboss.db")
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+
+        _engine = create_engine(url, connect_args=connect_args, pool_pre_ping=True)
+        metadata.create_all(_engine)
+        logger.info(f"Connected to {_engine.dialect.name} database")
+
+    return _engine
@@ -0,0 +1,140 @@
+from sqlalchemy import (
+    BigInteger, Column, Date, DateTime, ForeignKey, Index, Integer, JSON, MetaData, String, Table, Text, UniqueConstraint
+)
+
+metadata = MetaData()
+
+repositories = Table(
+    "repositories",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("owner", String(255), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("last_synced_at", DateTime),
+    UniqueConstraint("owner", "name")
+)
+
+users = Table(
+    "users",
+    metadata,
+    Column("login", String(255), primary_key=True),
+    Column("avatar_url", String(512))
+)
+
+commits = Table(
+    "commits",
+    metadata,
+    Column("repo_id", Integer, ForeignKey("repositories.id"), primary_key=True),
+    Column("sha", String(40), primary_key=True),
+    Column("author", String(255)),
+    Column("committed_at", DateTime, nullable=False),
+    Column("message", Text),
+    Index("ix_commits_repo_date", "repo_id", "committed_at"),
+    Index("ix_commits_repo_author_date", "repo_id", "author", "committed_at")
+)
+
+pull_requests = Table(
+    "pull_requests",
+    metadata,
+    Column("repo_id", Integer, ForeignKey("repositories.id"), primary_key=True),
+    Column("number", Integer, primary_key=True),
+    Column("author", String(255)),
+    Column("title", Text),
+    Column("state", String(16), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime),
+    Column("closed_at", DateTime),
+    Column("merged_at", DateTime),
+    Index("ix_pull_requests_repo_date", "repo_id", "created_at"),
+    Index("ix_pull_requests_repo_author_date", "repo_id", "author", "created_at")
+)
+
+reviews = Table(
+    "reviews",
+    metadata,
+    Column("id", BigInteger, primary_key=True, autoincrement=False),
+    Column("repo_id", Integer, ForeignKey("repositories.id"), nullable=False),
+    Column("pr_number", Integer, nullable=False),
+    Column("author", String(255)),
+    Column("state", String(32)),
+    Column("submitted_at", DateTime),
+    Index("ix_reviews_repo_pr", "repo_id", "pr_number"),
+    Index("ix_reviews_repo_date", "repo_id", "submitted_at"),
+    Index("ix_reviews_repo_author_date", "repo_id", "author", "submitted_at")
+)
+
+issues = Table(
+    "issues",
+    metadata,
+    Column("repo_id", Integer, ForeignKey("repositories.id"), primary_key=True),
+    Column("number", Integer, primary_key=True),
+    Column("author", String(255)),
+    Column("title", Text),
+    Column("state", String(16), nullable=False),
+    Column("created_at", DateTime, nullable=False),
+    Column("updated_at", DateTime),
+    Column("closed_at", DateTime),
+    Index("ix_issues_repo_date", "repo_id", "created_at")
+)
+
+# Activity counts per repository, kind and author over a day or a month, so date ranges are
+# answered by summing the months they cover and the days at their edges
+activity_rollups = Table(
+    "activity_rollups",
+    metadata,
+    Column("repo_id", Integer, ForeignKey("repositories.id"), primary_key=True),
+    Column("period", String(8), primary_key=True),
+    Column("start", Date, primary_key=True),
+    Column("kind", String(32), primary_key=True),
+    # Empty for activity without a GitHub author
+    Column("author", String(255), primary_key=True),
+    Column("count", Integer, nullable=False)
+)
+
+# Review counts per day the PR was created and day the review was submitted
+review_rollups = Table(
+    "review_rollups",
+    metadata,
+    Column("repo_id", Integer, ForeignKey("repositories.id"), primary_key=True),
+    Column("pr_day", Date, primary_key=True),
+    Column("review_day", Date, primary_key=True),
+    Column("count", Integer, nullable=False)
+)
+
+# Repositories whose rollups are up to date
+rollup_state = Table(
+    "rollup_state",
+    metadata,
+    Column("repo_id", Integer, ForeignKey("repositories.id"), primary_key=True),
+    Column("built_at", DateTime, nullable=False)
+)
+
+tracked_repositories = Table(
+    "tracked_repositories",
+    metadata,
+    Column("owner", String(255), primary_key=True),
+    Column("name", String(255), primary_key=True),
+    Column("created_at", DateTime, nullable=False)
+)
+
+sync_jobs = Table(
+    "sync_jobs",
+    metadata,
+    Column("id", Integer, primary_key=True, autoincrement=True),
+    Column("owner", String(255), nullable=False),
+    Column("name", String(255), nullable=False),
+    Column("priority", Integer, nullable=False),
+    Column("status", String(16), nullable=False),
+    Column("attempts", Integer, nullable=False, default=0),
+    Column("created_at", DateTime, nullable=False),
+    Column("started_at", DateTime),
+    Column("finished_at", DateTime),
+    Column("retry_at", DateTime),
+    Column("worker_id", String(64)),
+    Column("heartbeat_at", DateTime),
+    Column("error", Text),
+    Column("error_status", Integer),
+    Column("result", JSON),
+    Index("ix_sync_jobs_status_priority", "status", "priority", "created_at"),
+    Index("ix_sync_jobs_repo_status", "owner", "name", "status")
+)
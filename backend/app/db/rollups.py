@@ -0,0 +1,259 @@
+import logging
+from collections import defaultdict
+from datetime import date, datetime, timedelta
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from sqlalchemy import DateTime, and_, delete, func, literal, or_, select, true, union_all
+from sqlalchemy.engine import Connection
+
+from app.db.models import activity_rollups, commits, issues, pull_requests, review_rollups, reviews, rollup_state
+
+logger = logging.getLogger(__name__)
+
+DAY = "day"
+MONTH = "month"
+
+# Maximum number of runs of changed days recomputed by a single statement
+RUNS_PER_STATEMENT = 100
+
+# Kinds of rolled-up activity: source table, date column and the condition on counted rows
+ROLLUP_SOURCES = {
+    "commits": (commits, commits.c.committed_at, None),
+    "pull_requests": (pull_requests, pull_requests.c.created_at, None),
+    "open_pull_requests": (pull_requests, pull_requests.c.created_at, pull_requests.c.state == "open"),
+    "reviews": (reviews, reviews.c.submitted_at, None),
+    "issues": (issues, issues.c.created_at, None),
+    "open_issues": (issues, issues.c.created_at, issues.c.state == "open")
+}
+
+
+def next_month(day: date) -> date:
+    """Get the first day of the month after the day's."""
+
+    return (day.replace(day=1) + timedelta(days=32)).replace(day=1)
+
+
+def day_runs(days: Iterable[date]) -> List[Tuple[date, date]]:
+    """Group days into runs of consecutive days, as (first day, day after the last) pairs."""
+
+    runs: List[Tuple[date, date]] = []
+    for day in sorted(set(days)):
+        if runs and runs[-1][1] == day:
+            runs[-1] = (runs[-1][0], day + timedelta(days=1))
+        else:
+            runs.append((day, day + timedelta(days=1)))
+    return runs
+
+
+def within(column, start: Optional[date], end: Optional[date]) -> List:
+    """Build the conditions selecting rows whose column falls within [start, end), either bound being optional."""
+
+    if isinstance(column.type, DateTime):
+        start = datetime.combine(start, datetime.min.time()) if start else None
+        end = datetime.combine(end, datetime.min.time()) if end else None
+
+    conditions = []
+    if start:
+        conditions.append(column >= start)
+    if end:
+        conditions.append(column < end)
+    return conditions
+
+
+def in_runs(column, runs: Optional[List[Tuple[date, date]]]):
+    """Build the condition selecting rows whose column falls on one of the runs of days, or all rows if None."""
+
+    if runs is None:
+        return true()
+    return or_(*(and_(*within(column, start, end)) for start, end in runs))
+
+
+def rollup_segments(start_date: Optional[str] = None, end_date: Optional[str] = None) -> List:
+    """Build the conditions selecting the rollups that exactly cover the (inclusive) date range.
+
+    Whole months within the range are read from the month rollups and only the days at its edges
+    from the day rollups, so a range of any length sums at most about 60 days per author and kind.
+    Each condition is a single range of the rollups' primary key, so query them separately rather
+    than combined with OR, which keeps the database from using the index.
+    """
+
+    start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+    end = datetime.strptime(end_date, "%Y-%m-%d").date() + timedelta(days=1) if end_date else None
+
+    period, day = activity_rollups.c.period, activity_rollups.c.start
+
+    # Bounds of the whole months within the range
+    first_month = start if start is None or start.day == 1 else next_month(start)
+    last_month = end.replace(day=1) if end else None
+
+    if first_month and last_month and first_month >= last_month:
+        return [and_(period == DAY, *within(day, start, end))]
+
+    segments = [and_(period == MONTH, *within(day, first_month, last_month))]
+    if start and start < first_month:
+        segments.append(and_(period == DAY, *within(day, start, first_month)))
+    if end and last_month < end:
+        segments.append(and_(period == DAY, *within(day, last_month, end)))
+    return segments
+
+
+def sum_rollups(connection: Connection, repo_id: int, kinds: List[str], start_date: Optional[str] = None,
+                end_date: Optional[str] = None, by_author: bool = False) -> List[Tuple]:
+    """Sum the rollups of the kinds over the date range, per kind or per author and kind.
+
+    Returns (kind, count) rows, or (author, kind, count) rows by author, leaving out activity without an author.
+    """
+
+    columns = [activity_rollups.c.author, activity_rollups.c.kind] if by_author else [activity_rollups.c.kind]
+    conditions = [activity_rollups.c.repo_id == repo_id, activity_rollups.c.kind.in_(kinds)]
+    if by_author:
+        conditions.append(activity_rollups.c.author != "")
+
+    segments = union_all(*(
+        select(*columns, activity_rollups.c.count).where(*conditions, segment)
+        for segment in rollup_segments(start_date, end_date)
+    )).subquery()
+
+    grouping = [segments.c[column.name] for column in columns]
+    return connection.execute(
+        select(*grouping, func.sum(segments.c.count)).group_by(*grouping)
+    ).all()
+
+
+def review_range(start_date: Optional[str] = None, end_date: Optional[str] = None) -> List:
+    """Build the conditions selecting the review rollups of PRs created and reviews submitted within the date range."""
+
+    start = datetime.strptime(start_date, "%Y-%m-%d").date() if start_date else None
+    end = datetime.strptime(end_date, "%Y-%m-%d").date() + timedelta(days=1) if end_date else None
+
+    return within(review_rollups.c.pr_day, start, end) + within(review_rollups.c.review_day, start, end)
+
+
+def update_rollups(connection: Connection, repo_id: int, days: Iterable[date]):
+    """Recompute the rollups of the days whose activity changed, or all of them if they were never built."""
+
+    built = connection.execute(
+        select(rollup_state.c.repo_id).where(rollup_state.c.repo_id == repo_id)
+    ).first() is not None
+
+    if built:
+        refresh_rollups(connection, repo_id, days)
+        connection.execute(
+            rollup_state.update().where(rollup_state.c.repo_id == repo_id).values(built_at=datetime.utcnow())
+        )
+    else:
+        refresh_rollups(connection, repo_id)
+        connection.execute(rollup_state.insert().values(repo_id=repo_id, built_at=datetime.utcnow()))
+
+
+def refresh_rollups(connection: Connection, repo_id: int, days: Optional[Iterable[date]] = None):
+    """Recompute the day and month rollups of the given days from the stored activity, or of all days if None."""
+
+    if days is None:
+        _refresh_runs(connection, repo_id, None)
+        return
+
+    # Keep the conditions of each statement short
+    runs = day_runs(days)
+    for i in range(0, len(runs), RUNS_PER_STATEMENT):
+        _refresh_runs(connection, repo_id, runs[i:i + RUNS_PER_STATEMENT])
+
+
+def _refresh_runs(connection: Connection, repo_id: int, runs: Optional[List[Tuple[date, date]]]):
+    _refresh_day_rollups(connection, repo_id, runs)
+    _refresh_review_rollups(connection, repo_id, runs)
+
+    # Months are summed from their days, so recompute every month containing a changed day
+    month_runs = None
+    if runs is not None:
+        month_runs = []
+        for start, end in runs:
+            month = start.replace(day=1)
+            while month < end:
+                month_runs.append((month, next_month(month)))
+                month = next_month(month)
+    _refresh_month_rollups(connection, repo_id, month_runs)
+
+
+def _refresh_day_rollups(connection: Connection, repo_id: int, runs: Optional[List[Tuple[date, date]]]):
+    connection.execute(
+        delete(activity_rollups).where(
+            activity_rollups.c.repo_id == repo_id,
+            activity_rollups.c.period == DAY,
+            in_runs(activity_rollups.c.start, runs)
+        )
+    )
+
+    columns = ["repo_id", "period", "start", "kind", "author", "count"]
+    for kind, (table, date_column, condition) in ROLLUP_SOURCES.items():
+        day = func.date(date_column)
+        author = func.coalesce(table.c.author, "")
+
+        query = select(
+            literal(repo_id), literal(DAY), day, literal(kind), author, func.count()
+        ).where(
+            table.c.repo_id == repo_id,
+            date_column.is_not(None),
+            in_runs(date_column, runs),
+            *([condition] if condition is not None else [])
+        ).group_by(day, author)
+
+        connection.execute(activity_rollups.insert().from_select(columns, query))
+
+
+def _refresh_review_rollups(connection: Connection, repo_id: int, runs: Optional[List[Tuple[date, date]]]):
+    # A review's row depends on both its PR's creation day and its own submission day
+    connection.execute(
+        delete(review_rollups).where(
+            review_rollups.c.repo_id == repo_id,
+            or_(in_runs(review_rollups.c.pr_day, runs), in_runs(review_rollups.c.review_day, runs))
+        )
+    )
+
+    pr_day = func.date(pull_requests.c.created_at)
+    review_day = func.date(reviews.c.submitted_at)
+
+    query = select(
+        literal(repo_id), pr_day, review_day, func.count()
+    ).select_from(
+        reviews.join(pull_requests, and_(
+            reviews.c.repo_id == pull_requests.c.repo_id,
+            reviews.c.pr_number == pull_requests.c.number
+        ))
+    ).where(
+        reviews.c.repo_id == repo_id,
+        reviews.c.submitted_at.is_not(None),
+        or_(in_runs(pull_requests.c.created_at, runs), in_runs(reviews.c.submitted_at, runs))
+    ).group_by(pr_day, review_day)
+
+    connection.execute(review_rollups.insert().from_select(["repo_id", "pr_day", "review_day", "count"], query))
+
+
+def _refresh_month_rollups(connection: Connection, repo_id: int, month_runs: Optional[List[Tuple[date, date]]]):
+    connection.execute(
+        delete(activity_rollups).where(
+            activity_rollups.c.repo_id == repo_id,
+            activity_rollups.c.period == MONTH,
+            in_runs(activity_rollups.c.start, month_runs)
+        )
+    )
+
+    day_rows = connection.execute(
+        select(
+            activity_rollups.c.start, activity_rollups.c.kind, activity_rollups.c.author, activity_rollups.c.count
+        ).where(
+            activity_rollups.c.repo_id == repo_id,
+            activity_rollups.c.period == DAY,
+            in_runs(activity_rollups.c.start, month_runs)
+        )
+    )
+
+    counts: Dict[Tuple[date, str, str], int] = defaultdict(int)
+    for day, kind, author, count in day_rows:
+        counts[(day.replace(day=1), kind, author)] += count
+
+    if counts:
+        connection.execute(activity_rollups.insert(), [
+            {"repo_id": repo_id, "period": MONTH, "start": month, "kind": kind, "author": author, "count": count}
+            for (month, kind, author), count in counts.items()
+        ])
@@ -0,0 +1,457 @@
+import logging
+from collections import defaultdict
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+from sqlalchemy import Table, and_, func, select
+from sqlalchemy.dialects import postgresql, sqlite
+from sqlalchemy.engine import Connection, Engine, Row
+
+from app.db.engine import get_engine
+from app.db.models import (
+    activity_rollups, commits, issues, pull_requests, repositories, review_rollups, reviews, rollup_state, users
+)
+from app.db.rollups import DAY, review_range, sum_rollups, update_rollups
+from app.utils.timebuckets import EVENT_KINDS, EventTable, build_weekly_stats, to_epoch_seconds, week_starts
+
+logger = logging.getLogger(__name__)
+
+# Number of rows sent to the database per insert statement
+UPSERT_CHUNK_SIZE = 500
+
+# Number of events returned in each contributor's recent activity
+RECENT_ACTIVITY_LIMIT = 5
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[datetime]:
+    """Parse a GitHub ISO 8601 timestamp into a naive UTC datetime."""
+
+    if not value:
+        return None
+
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    # Webhook payloads carry the committer's local offset
+    if parsed.tzinfo is not None:
+        parsed = parsed.astimezone(timezone.utc).replace(tzinfo=None)
+    return parsed
+
+
+def format_timestamp(value: Optional[datetime]) -> Optional[str]:
+    """Format a naive UTC datetime the way GitHub does."""
+
+    if value is None:
+        return None
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def date_range(column, start_date: Optional[str] = None, end_date: Optional[str] = None) -> List:
+    """Build the conditions selecting rows whose column falls within the (inclusive) date range."""
+
+    conditions = []
+    if start_date:
+        conditions.append(column >= datetime.strptime(start_date, "%Y-%m-%d"))
+    if end_date:
+        conditions.append(column < datetime.strptime(end_date, "%Y-%m-%d") + timedelta(days=1))
+    return conditions
+
+
+class RepositoryStore:
+    """Local store of synced repository activity that answers date-range queries with indexed SQL."""
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self.engine = engine or get_engine()
+        # Repositories whose rollups are known to exist
+        self._rollups_built: Set[int] = set()
+
+    def get_repository(self, owner: str, repo: str) -> Optional[Row]:
+        """Get the stored repository, or None if it was never synced."""
+
+        with self.engine.connect() as connection:
+            return self._get_repository(connection, owner, repo)
+
+    def is_synced(self, owner: str, repo: str) -> bool:
+        """Check whether the repository has been synced at least once."""
+
+        repository = self.get_repository(owner, repo)
+        return repository is not None and repository.last_synced_at is not None
+
+    def save_sync(self, owner: str, repo: str, synced_at: datetime, user_rows: Iterable[Dict[str, Any]],
+                  commit_rows: Iterable[Dict[str, Any]], pull_request_rows: Iterable[Dict[str, Any]],
+                  review_rows: Iterable[Dict[str, Any]], issue_rows: Iterable[Dict[str, Any]]) -> int:
+        """Store the result of a sync in a single transaction and return the repository id."""
+
+        with self.engine.begin() as connection:
+            repository = self._get_repository(connection, owner, repo)
+            if repository is None:
+                repo_id = connection.execute(
+                    repositories.insert().values(owner=owner, name=repo)
+                ).inserted_primary_key[0]
+            else:
+                repo_id = repository.id
+                # Keep the canonical casing reported by GitHub
+                connection.execute(
+                    repositories.update().where(repositories.c.id == repo_id).values(owner=owner, name=repo)
+                )
+
+            self._save_activity(connection, repo_id, user_rows, commit_rows, pull_request_rows, review_rows,
+                                issue_rows)
+
+            connection.execute(
+                repositories.update().where(repositories.c.id == repo_id).values(last_synced_at=synced_at)
+            )
+
+        return repo_id
+
+    def save_activity(self, owner: str, repo: str, user_rows: Iterable[Dict[str, Any]],
+                      commit_rows: Iterable[Dict[str, Any]], pull_request_rows: Iterable[Dict[str, Any]],
+                      review_rows: Iterable[Dict[str, Any]], issue_rows: Iterable[Dict[str, Any]]) -> bool:
+        """Add activity to a synced repository without changing its sync state.
+
+        Returns False, storing nothing, if the repository was never synced: its backfill will pick the activity up.
+        """
+
+        with self.engine.begin() as connection:
+            repository = self._get_repository(connection, owner, repo)
+            if repository is None or repository.last_synced_at is None:
+                return False
+
+            self._save_activity(connection, repository.id, user_rows, commit_rows, pull_request_rows, review_rows,
+                                issue_rows)
+
+        return True
+
+    def get_repository_stats(self, owner: str, repo: str, start_date: Optional[str] = None,
+                             end_date: Optional[str] = None, use_rollups: bool = True) -> Dict[str, Any]:
+        """Get repository statistics for a specific time period from the stored activity.
+
+        The counts are summed from the daily and monthly rollups, or counted from the raw activity
+        if use_rollups is False.
+        """
+
+        if use_rollups:
+            self._ensure_rollups(owner, repo)
+
+        with self.engine.connect() as connection:
+            repository = self._get_repository(connection, owner, repo)
+            repo_id = repository.id
+
+            if use_rollups:
+                counts = dict(sum_rollups(
+                    connection, repo_id, ["commits", "open_pull_requests", "open_issues"], start_date, end_date
+                ))
+
+                # Reviews on the PRs created during the period, themselves submitted during the period
+                total_reviews = connection.execute(
+                    select(func.coalesce(func.sum(review_rollups.c.count), 0)).where(
+                        review_rollups.c.repo_id == repo_id,
+                        *review_range(start_date, end_date)
+                    )
+                ).scalar_one()
+
+                total_commits = counts.get("commits", 0)
+                open_prs_count = counts.get("open_pull_requests", 0)
+                active_issues_count = counts.get("open_issues", 0)
+            else:
+                total_commits, open_prs_count, total_reviews, active_issues_count = self._scan_repository_stats(
+                    connection, repo_id, start_date, end_date
+                )
+
+        return {
+            "repository_name": repository.name,
+            "owner": repository.owner,
+            "total_commits": total_commits,
+            "open_pull_requests": open_prs_count,
+            "code_reviews": total_reviews,
+            "active_issues": active_issues_count,
+            "period": {
+                "start_date": start_date,
+                "end_date": end_date
+            }
+        }
+
+    @staticmethod
+    def _scan_repository_stats(connection: Connection, repo_id: int, start_date: Optional[str] = None,
+                               end_date: Optional[str] = None) -> Tuple[int, int, int, int]:
+        """Count the commits, open PRs, reviews and open issues of the period from the raw activity."""
+
+        total_commits = connection.execute(
+            select(func.count()).select_from(commits).where(
+                commits.c.repo_id == repo_id,
+                *date_range(commits.c.committed_at, start_date, end_date)
+            )
+        ).scalar_one()
+
+        prs_in_period = and_(
+            pull_requests.c.repo_id == repo_id,
+            *date_range(pull_requests.c.created_at, start_date, end_date)
+        )
+        open_prs_count = connection.execute(
+            select(func.count()).select_from(pull_requests).where(prs_in_period, pull_requests.c.state == "open")
+        ).scalar_one()
+
+        # Reviews on the PRs created during the period, themselves submitted during the period
+        total_reviews = connection.execute(
+            select(func.count()).select_from(
+                reviews.join(pull_requests, and_(
+                    reviews.c.repo_id == pull_requests.c.repo_id,
+                    reviews.c.pr_number == pull_requests.c.number
+                ))
+            ).where(
+                prs_in_period,
+                reviews.c.submitted_at.is_not(None),
+                *date_range(reviews.c.submitted_at, start_date, end_date)
+            )
+        ).scalar_one()
+
+        active_issues_count = connection.execute(
+            select(func.count()).select_from(issues).where(
+                issues.c.repo_id == repo_id,
+                issues.c.state == "open",
+                *date_range(issues.c.created_at, start_date, end_date)
+            )
+        ).scalar_one()
+
+        return total_commits, open_prs_count, total_reviews, active_issues_count
+
+    def get_repository_contributors(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                    end_date: Optional[str] = None, use_rollups: bool = True) -> List[Dict[str, Any]]:
+        """Get repository contributors with statistics from the stored activity.
+
+        The counts are summed from the daily and monthly rollups, or counted from the raw activity
+        if use_rollups is False.
+        """
+
+        if use_rollups:
+            self._ensure_rollups(owner, repo)
+
+        with self.engine.connect() as connection:
+            repo_id = self._get_repository(connection, owner, repo).id
+
+            counts: Dict[str, Dict[str, int]] = defaultdict(lambda: {"commits": 0, "pull_requests": 0, "reviews": 0})
+            if use_rollups:
+                rows = sum_rollups(
+                    connection, repo_id, ["commits", "pull_requests", "reviews"], start_date, end_date, by_author=True
+                )
+                for author, field, count in rows:
+                    counts[author][field] = count
+            else:
+                for field, table, date_column in (
+                        ("commits", commits, commits.c.committed_at),
+                        ("pull_requests", pull_requests, pull_requests.c.created_at),
+                        ("reviews", reviews, reviews.c.submitted_at)
+                ):
+                    rows = connection.execute(
+                        select(table.c.author, func.count()).where(
+                            table.c.repo_id == repo_id,
+                            table.c.author.is_not(None),
+                            date_column.is_not(None),
+                            *date_range(date_column, start_date, end_date)
+                        ).group_by(table.c.author)
+                    )
+                    for author, count in rows:
+                        counts[author][field] = count
+
+            avatars = dict(connection.execute(
+                select(users.c.login, users.c.avatar_url).where(users.c.login.in_(list(counts)))
+            ).all())
+
+            recent_activity = self._get_recent_activity(connection, repo_id, repo, start_date, end_date)
+
+        contributor_stats = [
+            {
+                "username": username,
+                "avatar_url": avatars.get(username),
+                **author_counts,
+                "total_contributions": sum(author_counts.values()),
+                "recent_activity": recent_activity.get(username, [])
+            }
+            for username, author_counts in counts.items()
+        ]
+
+        # Sort by total contributions
+        contributor_stats.sort(key=lambda x: x["total_contributions"], reverse=True)
+
+        return contributor_stats
+
+    def get_contributor_weekly_stats(self, owner: str, repo: str, weeks: int = 4) -> Dict[str, Any]:
+        """Get weekly statistics for each contributor from the stored daily rollups."""
+
+        self._ensure_rollups(owner, repo)
+
+        starts = week_starts(weeks)
+        since = datetime.utcfromtimestamp(int(starts[0])).date()
+        events = EventTable()
+
+        with self.engine.connect() as connection:
+            repo_id = self._get_repository(connection, owner, repo).id
+
+            for kind in EVENT_KINDS:
+                rows = connection.execute(
+                    select(activity_rollups.c.author, activity_rollups.c.start, activity_rollups.c.count).where(
+                        activity_rollups.c.repo_id == repo_id,
+                        activity_rollups.c.period == DAY,
+                        activity_rollups.c.kind == kind,
+                        activity_rollups.c.author != "",
+                        activity_rollups.c.start >= since
+                    )
+                ).all()
+                if rows:
+                    # Every day counts as many events as it rolled up, at its start
+                    authors, days, day_counts = zip(*rows)
+                    events.add(kind, authors, to_epoch_seconds(days), day_counts)
+
+            avatars = dict(connection.execute(select(users.c.login, users.c.avatar_url)).all())
+
+        return build_weekly_stats(events, starts, avatars)
+
+    def _get_recent_activity(self, connection: Connection, repo_id: int, repo: str, start_date: Optional[str] = None,
+                             end_date: Optional[str] = None) -> Dict[str, List[Dict[str, Any]]]:
+        """Get each author's most recent commits and PRs within the period."""
+
+        activity: Dict[str, List[Dict[str, Any]]] = defaultdict(list)
+
+        recent_commits = self._latest_per_author(
+            connection, commits, commits.c.committed_at, repo_id, start_date, end_date
+        )
+        for row in recent_commits:
+            activity[row.author].append({
+                "type": "commit",
+                "repo": repo,
+                "details": {
+                    "sha": row.sha[:7],
+                    "message": (row.message or "").split("\n")[0]
+                },
+                "timestamp": format_timestamp(row.committed_at)
+            })
+
+        recent_prs = self._latest_per_author(
+            connection, pull_requests, pull_requests.c.created_at, repo_id, start_date, end_date
+        )
+        for row in recent_prs:
+            activity[row.author].append({
+                "type": "pull_request",
+                "repo": repo,
+                "details": {
+                    "number": row.number,
+                    "title": row.title
+                },
+                "timestamp": format_timestamp(row.created_at)
+            })
+
+        for events in activity.values():
+            events.sort(key=lambda event: event["timestamp"] or "", reverse=True)
+            del events[RECENT_ACTIVITY_LIMIT:]
+
+        return activity
+
+    @staticmethod
+    def _latest_per_author(connection: Connection, table: Table, date_column, repo_id: int,
+                           start_date: Optional[str] = None, end_date: Optional[str] = None) -> List[Row]:
+        """Get the latest rows of each author in a single windowed query."""
+
+        ranked = select(
+            table,
+            func.row_number().over(partition_by=table.c.author, order_by=date_column.desc()).label("position")
+        ).where(
+            table.c.repo_id == repo_id,
+            table.c.author.is_not(None),
+            *date_range(date_column, start_date, end_date)
+        ).subquery()
+
+        return connection.execute(
+            select(ranked).where(ranked.c.position <= RECENT_ACTIVITY_LIMIT)
+        ).all()
+
+    def _ensure_rollups(self, owner: str, repo: str):
+        """Build the rollups of a repository synced before they existed."""
+
+        with self.engine.connect() as connection:
+            repo_id = self._get_repository(connection, owner, repo).id
+            if repo_id in self._rollups_built:
+                return
+
+            built = connection.execute(
+                select(rollup_state.c.repo_id).where(rollup_state.c.repo_id == repo_id)
+            ).first() is not None
+
+        if not built:
+            logger.info(f"Building rollups of {owner}/{repo}")
+            with self.engine.begin() as connection:
+                update_rollups(connection, repo_id, [])
+
+        self._rollups_built.add(repo_id)
+
+    @staticmethod
+    def _get_repository(connection: Connection, owner: str, repo: str) -> Optional[Row]:
+        # GitHub owner and repository names are case-insensitive
+        return connection.execute(
+            select(repositories).where(
+                func.lower(repositories.c.owner) == owner.lower(),
+                func.lower(repositories.c.name) == repo.lower()
+            )
+        ).first()
+
+    def _save_activity(self, connection: Connection, repo_id: int, user_rows: Iterable[Dict[str, Any]],
+                       commit_rows: Iterable[Dict[str, Any]], pull_request_rows: Iterable[Dict[str, Any]],
+                       review_rows: Iterable[Dict[str, Any]], issue_rows: Iterable[Dict[str, Any]]):
+        commit_rows, pull_request_rows = list(commit_rows), list(pull_request_rows)
+        review_rows, issue_rows = list(review_rows), list(issue_rows)
+
+        self._upsert(connection, users, user_rows, ["login"])
+        self._upsert(connection, commits, self._with_repo(repo_id, commit_rows), ["repo_id", "sha"])
+        self._upsert(connection, pull_requests, self._with_repo(repo_id, pull_request_rows), ["repo_id", "number"])
+        self._upsert(connection, reviews, self._with_repo(repo_id, review_rows), ["id"])
+        self._upsert(connection, issues, self._with_repo(repo_id, issue_rows), ["repo_id", "number"])
+
+        # Only the days of the saved activity have different counts now
+        days = {
+            timestamp.date()
+            for rows, column in (
+                (commit_rows, "committed_at"),
+                (pull_request_rows, "created_at"),
+                (review_rows, "submitted_at"),
+                (issue_rows, "created_at")
+            )
+            for timestamp in (row[column] for row in rows)
+            if timestamp is not None
+        }
+        update_rollups(connection, repo_id, days)
+
+    @staticmethod
+    def _with_repo(repo_id: int, rows: Iterable[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        return [{**row, "repo_id": repo_id} for row in rows]
+
+    def _upsert(self, connection: Connection, table: Table, rows: Iterable[Dict[str, Any]],
+                index_elements: List[str]):
+        """Insert rows, updating the ones that already exist."""
+
+        # The same row can show up twice when pages shift during a crawl
+        unique_rows = list({tuple(row[key] for key in index_elements): row for row in rows}.values())
+        if not unique_rows:
+            return
+
+        insert = postgresql.insert if self.engine.dialect.name == "postgresql" else sqlite.insert
+        statement = insert(table)
+        statement = statement.on_conflict_do_update(
+            index_elements=index_elements,
+            set_={
+                column.name: statement.excluded[column.name]
+                for column in table.columns
+                if column.name not in index_elements
+            }
+        )
+
+        for i in range(0, len(unique_rows), UPSERT_CHUNK_SIZE):
+            connection.execute(statement, unique_rows[i:i + UPSERT_CHUNK_SIZE])
+
+
+_default_store: Optional[RepositoryStore] = None
+
+
+def get_store() -> RepositoryStore:
+    """Get the process-wide repository store."""
+    global _default_store
+
+    if _default_store is None:
+        _default_store = RepositoryStore()
+    return _default_store
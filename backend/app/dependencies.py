@@ -0,0 +1,129 @@
+import os
+import logging
+from typing import Optional
+
+from app.controllers.contributors import ContributorsController
+from app.controllers.jobs import JobsController
+from app.controllers.orgs import OrganizationController
+from app.controllers.repos import RepositoryController
+from app.controllers.webhooks import WebhooksController
+from app.db.store import get_store
+from app.jobs.manager import get_job_manager
+from app.services.github.cache import get_http_cache
+from app.services.github.client import get_github_client
+from app.services.github.contributors import GitHubContributorsService
+from app.services.github.orgs import GitHubOrganizationService
+from app.services.github.ratelimit import get_rate_limiter
+from app.services.github.repos import GitHubRepositoryService
+from app.services.github.sync import GitHubSyncService
+from app.services.github.tokens import get_token_pool
+from app.utils.response_cache import ResponseCache, get_response_cache
+from app.websocket.chat import ChatWebSocketHandler
+from app.websocket.hub import get_connection_hub
+
+logger = logging.getLogger(__name__)
+
+
+class AppServices:
+    """The services and controllers shared by every request, wired together once per process.
+
+    The GitHub services share the connection pool, HTTP cache, rate limiter and token pool, and the
+    controllers are built on top of them, so that serving a request constructs nothing.
+    """
+
+    def __init__(self):
+        self.client = get_github_client()
+        self.http_cache = get_http_cache()
+        self.rate_limiter = get_rate_limiter()
+        self.token_pool = get_token_pool()
+        self.store = get_store()
+        self.jobs = get_job_manager()
+        self.hub = get_connection_hub()
+        self.stats_cache = get_response_cache("repository_stats")
+        self.contributors_cache = get_response_cache("repository_contributors")
+
+        github = {
+            "client": self.client,
+            "cache": self.http_cache,
+            "rate_limiter": self.rate_limiter,
+            "token_pool": self.token_pool
+        }
+        self.repository_service = GitHubRepositoryService(**github)
+        self.contributors_service = GitHubContributorsService(**github)
+        self.organization_service = GitHubOrganizationService(**github)
+        self.sync_service = GitHubSyncService(store=self.store, **github)
+
+        self.repository_controller = RepositoryController(
+            self.repository_service, self.sync_service, self.store, self.jobs
+        )
+        self.contributors_controller = ContributorsController(self.contributors_service, self.store, self.jobs)
+        self.organization_controller = OrganizationController(
+            self.organization_service, self.repository_controller, self.contributors_controller,
+            self.stats_cache, self.contributors_cache
+        )
+        self.jobs_controller = JobsController(self.jobs)
+        self.webhooks_controller = WebhooksController(self.store)
+        self.chat_handler = ChatWebSocketHandler(self.hub)
+
+        self.warm_connections = int(os.getenv("GITHUB_WARM_CONNECTIONS", "5"))
+
+    async def start(self):
+        """Open GitHub connections ahead of the first requests and start the background sync workers."""
+
+        if self.warm_connections > 0:
+            # Requests for the rate limits don't count against them
+            opened = await self.client.warm(f"{self.repository_service.base_url}/rate_limit", self.warm_connections)
+            logger.info(f"Opened {opened} GitHub connection(s)")
+
+        await self.jobs.start()
+
+    async def close(self):
+        """Stop the sync workers and WebSocket broadcasts, then close the pooled GitHub connections."""
+
+        await self.jobs.stop()
+        await self.hub.close()
+        await self.client.aclose()
+
+
+_default_services: Optional[AppServices] = None
+
+
+def get_services() -> AppServices:
+    """Get the process-wide services, created by the application's lifespan."""
+    global _default_services
+
+    if _default_services is None:
+        _default_services = AppServices()
+    return _default_services
+
+
+def get_repository_controller() -> RepositoryController:
+    return get_services().repository_controller
+
+
+def get_contributors_controller() -> ContributorsController:
+    return get_services().contributors_controller
+
+
+def get_organization_controller() -> OrganizationController:
+    return get_services().organization_controller
+
+
+def get_jobs_controller() -> JobsController:
+    return get_services().jobs_controller
+
+
+def get_webhooks_controller() -> WebhooksController:
+    return get_services().webhooks_controller
+
+
+def get_chat_handler() -> ChatWebSocketHandler:
+    return get_services().chat_handler
+
+
+def get_stats_cache() -> ResponseCache:
+    return get_services().stats_cache
+
+
+def get_contributors_cache() -> ResponseCache:
+    return get_services().contributors_cache
@@ -0,0 +1,196 @@
+import os
+import math
+import uuid
+import socket
+import asyncio
+import logging
+import httpx
+from typing import Any, Dict, List, Optional
+
+from app.jobs.store import JobPriority, JobStore
+from app.services.github.ratelimit import Priority, max_rate_limit_wait, request_priority
+from app.services.github.sync import GitHubSyncService
+from app.utils.response_cache import invalidate_repository
+from app.websocket.hub import publish_repository_event
+
+logger = logging.getLogger(__name__)
+
+
+class RepositoryNotSyncedError(Exception):
+    """Raised when a repository's data isn't available yet because it's still being synced."""
+
+    def __init__(self, job: Dict[str, Any]):
+        super().__init__(f"{job['owner']}/{job['repo']} is being synced (job {job['id']})")
+        self.job = job
+
+
+class RepositorySyncFailedError(Exception):
+    """Raised when a repository's data isn't available because its sync recently failed for good."""
+
+    def __init__(self, job: Dict[str, Any]):
+        super().__init__(f"{job['owner']}/{job['repo']} couldn't be synced (job {job['id']}): {job['error']}")
+        self.job = job
+
+
+class SyncJobManager:
+    """Runs repository sync jobs on a bounded pool of async workers.
+
+    Jobs are taken from the persistent queue by priority, so user-triggered refreshes run before
+    the periodic resyncs of tracked repositories. A running job is leased to the process running it,
+    which refreshes a heartbeat while the sync runs; jobs whose heartbeat is older than the lease,
+    because their process died, are put back in the queue.
+    """
+
+    def __init__(self, store: Optional[JobStore] = None, workers: Optional[int] = None,
+                 interval: Optional[float] = None, sync_service: Optional[GitHubSyncService] = None):
+        self.store = store or JobStore()
+        self.sync_service = sync_service or GitHubSyncService()
+        self.workers = workers if workers is not None else int(os.getenv("SYNC_WORKERS", "2"))
+        self.interval = interval if interval is not None else float(os.getenv("SYNC_INTERVAL", "900"))
+        self.poll_interval = float(os.getenv("SYNC_POLL_INTERVAL", "5"))
+        self.lease = float(os.getenv("SYNC_JOB_LEASE", "60"))
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._wakeup = asyncio.Event()
+        self._tasks: List[asyncio.Task] = []
+
+    @property
+    def enabled(self) -> bool:
+        return self.workers > 0
+
+    async def start(self):
+        """Start the workers and the periodic resync scheduler."""
+
+        if not self.enabled or self._tasks:
+            return
+
+        await self._requeue_expired()
+
+        self._tasks = [asyncio.create_task(self._work(n)) for n in range(self.workers)]
+        self._tasks.append(asyncio.create_task(self._schedule()))
+        logger.info(f"Started {self.workers} sync workers")
+
+    async def stop(self):
+        """Stop the workers and put back the jobs they were running."""
+
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        try:
+            released = await asyncio.to_thread(self.store.release, self.worker_id)
+            if released:
+                logger.info(f"Requeued {released} interrupted sync jobs")
+        except Exception as e:
+            # Their leases expire instead
+            logger.error(f"Couldn't requeue interrupted sync jobs: {str(e)}")
+
+    async def enqueue(self, owner: str, repo: str, priority: JobPriority = JobPriority.USER) -> Dict[str, Any]:
+        """Queue a sync of the repository, which is kept in sync from then on once the sync succeeds.
+
+        Raises RepositorySyncFailedError instead if its last sync failed for good within the sync interval,
+        so that clients polling a misspelled or inaccessible repository get the error rather than new jobs.
+        """
+
+        failed = await asyncio.to_thread(self.store.get_recent_failure, owner, repo, self.interval)
+        if failed is not None:
+            raise RepositorySyncFailedError(failed)
+
+        job = await asyncio.to_thread(self.store.enqueue, owner, repo, priority)
+        self._wakeup.set()
+        return job
+
+    async def _work(self, worker: int):
+        while True:
+            try:
+                job = await asyncio.to_thread(self.store.claim_next, self.worker_id)
+            except Exception as e:
+                logger.error(f"Sync worker {worker} couldn't claim a job: {str(e)}")
+                job = None
+
+            if job is None:
+                # Other processes may queue jobs too, so don't rely on the wakeup alone
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self._wakeup.clear()
+                continue
+
+            await self._run(worker, job)
+
+    async def _run(self, worker: int, job: Dict[str, Any]):
+        logger.info(f"Sync worker {worker} running job {job['id']} for {job['owner']}/{job['repo']}")
+
+        # User-triggered refreshes compete for rate limit budgets like interactive requests, but nobody
+        # is waiting on the job itself, so it waits for exhausted budgets to reset like background work
+        priority = Priority.INTERACTIVE if job["priority"] == JobPriority.USER.name.lower() else Priority.BACKGROUND
+
+        heartbeat = asyncio.create_task(self._heartbeat(job))
+        try:
+            with request_priority(priority), max_rate_limit_wait(math.inf):
+                result = await self.sync_service.sync_repository(owner=job["owner"], repo=job["repo"])
+        except Exception as e:
+            logger.error(f"Sync job {job['id']} for {job['owner']}/{job['repo']} failed: {str(e)}")
+            error_status = e.response.status_code if isinstance(e, httpx.HTTPStatusError) else None
+            try:
+                await asyncio.to_thread(self.store.fail, job["id"], self.worker_id, str(e), error_status)
+            except Exception as e:
+                # The job is requeued once its lease expires
+                logger.error(f"Couldn't record the failure of sync job {job['id']}: {str(e)}")
+            return
+        finally:
+            heartbeat.cancel()
+
+        try:
+            invalidate_repository(job["owner"], job["repo"])
+            if not await asyncio.to_thread(self.store.complete, job["id"], self.worker_id, result):
+                logger.warning(f"Sync job {job['id']} succeeded after being requeued by another process")
+            await publish_repository_event(job["owner"], job["repo"], {"type": "repository_synced", **result})
+            logger.info(f"Sync job {job['id']} for {job['owner']}/{job['repo']} succeeded")
+        except Exception as e:
+            logger.error(f"Couldn't record the success of sync job {job['id']}: {str(e)}")
+
+    async def _heartbeat(self, job: Dict[str, Any]):
+        while True:
+            await asyncio.sleep(self.lease / 3)
+            try:
+                if not await asyncio.to_thread(self.store.heartbeat, job["id"], self.worker_id):
+                    logger.warning(f"Sync job {job['id']} was requeued by another process while running here")
+                    return
+            except Exception as e:
+                logger.error(f"Couldn't refresh the lease of sync job {job['id']}: {str(e)}")
+
+    async def _requeue_expired(self):
+        requeued = await asyncio.to_thread(self.store.requeue_expired, self.lease)
+        if requeued:
+            logger.info(f"Requeued {requeued} sync jobs whose worker stopped")
+            self._wakeup.set()
+
+    async def _schedule(self):
+        while True:
+            try:
+                await self._requeue_expired()
+                due = await asyncio.to_thread(self.store.get_due_repositories, self.interval)
+                for owner, repo in due:
+                    await asyncio.to_thread(self.store.enqueue, owner, repo, JobPriority.SCHEDULED)
+                if due:
+                    logger.info(f"Scheduled resyncs of {len(due)} tracked repositories")
+                    self._wakeup.set()
+            except Exception as e:
+                logger.error(f"Error scheduling resyncs: {str(e)}")
+
+            await asyncio.sleep(min(self.interval, 60))
+
+
+_default_manager: Optional[SyncJobManager] = None
+
+
+def get_job_manager() -> SyncJobManager:
+    """Get the process-wide sync job manager."""
+    global _default_manager
+
+    if _default_manager is None:
+        _default_manager = SyncJobManager()
+    return _default_manager
@@ -0,0 +1,298 @@
+import logging
+from datetime import datetime, timedelta
+from enum import IntEnum
+from typing import Any, Dict, List, Optional, Tuple
+
+from sqlalchemy import func, or_, select
+from sqlalchemy.engine import Engine, Row
+
+from app.db.engine import get_engine
+from app.db.models import repositories, sync_jobs, tracked_repositories
+from app.db.store import format_timestamp
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+SUCCEEDED = "succeeded"
+FAILED = "failed"
+
+# Failed jobs are retried until they've been attempted this many times
+MAX_ATTEMPTS = 3
+
+# Seconds before the first retry of a failed job, doubled for every later attempt
+RETRY_DELAY = 30
+
+# GitHub statuses of failures that retrying won't fix, like a misspelled or private repository
+PERMANENT_ERROR_STATUSES = (404, 410, 451)
+
+
+class JobPriority(IntEnum):
+    """Priority of a sync job; lower values run first."""
+
+    USER = 0
+    SCHEDULED = 1
+
+
+def serialize_job(row: Row) -> Dict[str, Any]:
+    """Convert a job row to its API representation."""
+
+    return {
+        "id": row.id,
+        "owner": row.owner,
+        "repo": row.name,
+        "priority": JobPriority(row.priority).name.lower(),
+        "status": row.status,
+        "attempts": row.attempts,
+        "created_at": format_timestamp(row.created_at),
+        "started_at": format_timestamp(row.started_at),
+        "finished_at": format_timestamp(row.finished_at),
+        "retry_at": format_timestamp(row.retry_at),
+        "error": row.error,
+        "error_status": row.error_status,
+        "result": row.result
+    }
+
+
+class JobStore:
+    """Persistent, deduplicated queue of repository sync jobs."""
+
+    def __init__(self, engine: Optional[Engine] = None):
+        self.engine = engine or get_engine()
+
+    def enqueue(self, owner: str, repo: str, priority: JobPriority) -> Dict[str, Any]:
+        """Queue a sync of the repository, reusing the job already queued or running for it."""
+
+        owner, repo = owner.lower(), repo.lower()
+
+        with self.engine.begin() as connection:
+            existing = connection.execute(
+                select(sync_jobs).where(
+                    sync_jobs.c.owner == owner,
+                    sync_jobs.c.name == repo,
+                    sync_jobs.c.status.in_([QUEUED, RUNNING])
+                ).order_by(sync_jobs.c.id)
+            ).first()
+
+            if existing is not None:
+                if existing.status == QUEUED and priority < existing.priority:
+                    connection.execute(
+                        sync_jobs.update().where(sync_jobs.c.id == existing.id).values(priority=int(priority))
+                    )
+                return self._get(connection, existing.id)
+
+            job_id = connection.execute(sync_jobs.insert().values(
+                owner=owner,
+                name=repo,
+                priority=int(priority),
+                status=QUEUED,
+                attempts=0,
+                created_at=datetime.utcnow()
+            )).inserted_primary_key[0]
+            return self._get(connection, job_id)
+
+    def claim_next(self, worker_id: str) -> Optional[Dict[str, Any]]:
+        """Mark the most urgent queued job as running on the worker and return it, or None if no job is ready to run.
+
+        Failed jobs waiting for their retry delay to pass are skipped. The worker holds the job as long
+        as it keeps its heartbeat fresh.
+        """
+
+        with self.engine.begin() as connection:
+            while True:
+                now = datetime.utcnow()
+                job = connection.execute(
+                    select(sync_jobs).where(
+                        sync_jobs.c.status == QUEUED,
+                        or_(sync_jobs.c.retry_at.is_(None), sync_jobs.c.retry_at <= now)
+                    )
+                    .order_by(sync_jobs.c.priority, sync_jobs.c.created_at)
+                    .limit(1)
+                ).first()
+                if job is None:
+                    return None
+
+                # Another worker process may have claimed it in the meantime
+                claimed = connection.execute(
+                    sync_jobs.update()
+                    .where(sync_jobs.c.id == job.id, sync_jobs.c.status == QUEUED)
+                    .values(
+                        status=RUNNING, started_at=now, attempts=job.attempts + 1, worker_id=worker_id,
+                        heartbeat_at=now
+                    )
+                ).rowcount
+                if claimed:
+                    return self._get(connection, job.id)
+
+    def heartbeat(self, job_id: int, worker_id: str) -> bool:
+        """Extend the worker's hold on a running job, and return whether it still holds it."""
+
+        with self.engine.begin() as connection:
+            return bool(connection.execute(
+                sync_jobs.update()
+                .where(sync_jobs.c.id == job_id, sync_jobs.c.status == RUNNING, sync_jobs.c.worker_id == worker_id)
+                .values(heartbeat_at=datetime.utcnow())
+            ).rowcount)
+
+    def complete(self, job_id: int, worker_id: str, result: Dict[str, Any]) -> bool:
+        """Mark a job the worker holds as succeeded, and keep its repository in sync from then on.
+
+        Returns False if the job was taken over by another worker in the meantime.
+        """
+
+        with self.engine.begin() as connection:
+            completed = connection.execute(
+                sync_jobs.update()
+                .where(sync_jobs.c.id == job_id, sync_jobs.c.status == RUNNING, sync_jobs.c.worker_id == worker_id)
+                .values(
+                    status=SUCCEEDED, finished_at=datetime.utcnow(), retry_at=None, result=result, error=None,
+                    error_status=None
+                )
+            ).rowcount
+
+            job = self._get_row(connection, job_id)
+            self._track(connection, job.owner, job.name)
+            return bool(completed)
+
+    def fail(self, job_id: int, worker_id: str, error: str, error_status: Optional[int] = None) -> bool:
+        """Requeue a failed job the worker holds after a delay, or mark it as failed once it ran out of attempts.
+
+        Jobs failing with the GitHub status of an error retrying won't fix are marked as failed right away.
+        Returns False if the job was taken over by another worker in the meantime.
+        """
+
+        with self.engine.begin() as connection:
+            job = self._get_row(connection, job_id)
+            retry = job.attempts < MAX_ATTEMPTS and error_status not in PERMANENT_ERROR_STATUSES
+            now = datetime.utcnow()
+            return bool(connection.execute(
+                sync_jobs.update()
+                .where(sync_jobs.c.id == job_id, sync_jobs.c.status == RUNNING, sync_jobs.c.worker_id == worker_id)
+                .values(
+                    status=QUEUED if retry else FAILED,
+                    finished_at=None if retry else now,
+                    retry_at=now + timedelta(seconds=RETRY_DELAY * 2 ** (job.attempts - 1)) if retry else None,
+                    worker_id=None,
+                    error=error,
+                    error_status=error_status
+                )
+            ).rowcount)
+
+    def requeue_expired(self, lease: float) -> int:
+        """Put back running jobs whose worker stopped sending heartbeats, and return how many there were."""
+
+        expired_before = datetime.utcnow() - timedelta(seconds=lease)
+
+        with self.engine.begin() as connection:
+            return connection.execute(
+                sync_jobs.update().where(
+                    sync_jobs.c.status == RUNNING,
+                    or_(sync_jobs.c.heartbeat_at.is_(None), sync_jobs.c.heartbeat_at < expired_before)
+                ).values(status=QUEUED, worker_id=None)
+            ).rowcount
+
+    def release(self, worker_id: str) -> int:
+        """Put back the jobs a stopping worker was running, and return how many there were."""
+
+        with self.engine.begin() as connection:
+            return connection.execute(
+                sync_jobs.update().where(sync_jobs.c.status == RUNNING, sync_jobs.c.worker_id == worker_id)
+                .values(status=QUEUED, worker_id=None)
+            ).rowcount
+
+    def get_recent_failure(self, owner: str, repo: str, within: float) -> Optional[Dict[str, Any]]:
+        """Get the repository's latest job if it failed for good within the given number of seconds, or None."""
+
+        failed_after = datetime.utcnow() - timedelta(seconds=within)
+
+        with self.engine.connect() as connection:
+            job = connection.execute(
+                select(sync_jobs).where(sync_jobs.c.owner == owner.lower(), sync_jobs.c.name == repo.lower())
+                .order_by(sync_jobs.c.id.desc())
+                .limit(1)
+            ).first()
+
+        if job is None or job.status != FAILED or job.finished_at < failed_after:
+            return None
+        return serialize_job(job)
+
+    def get(self, job_id: int) -> Optional[Dict[str, Any]]:
+        """Get a job, or None if it doesn't exist."""
+
+        with self.engine.connect() as connection:
+            return self._get(connection, job_id)
+
+    def list_jobs(self, status: Optional[str] = None, limit: int = 50) -> List[Dict[str, Any]]:
+        """Get the most recent jobs, optionally only those with the given status."""
+
+        query = select(sync_jobs).order_by(sync_jobs.c.id.desc()).limit(limit)
+        if status:
+            query = query.where(sync_jobs.c.status == status)
+
+        with self.engine.connect() as connection:
+            return [serialize_job(row) for row in connection.execute(query)]
+
+    def get_due_repositories(self, interval: float) -> List[Tuple[str, str]]:
+        """Get the tracked repositories that weren't synced within the interval and have no pending job.
+
+        Repositories whose last resync failed for good aren't due again before the interval either.
+        """
+
+        stale_before = datetime.utcnow() - timedelta(seconds=interval)
+
+        with self.engine.connect() as connection:
+            tracked = connection.execute(select(tracked_repositories.c.owner, tracked_repositories.c.name)).all()
+
+            last_synced = {
+                (owner, name): synced_at
+                for owner, name, synced_at in connection.execute(
+                    select(
+                        func.lower(repositories.c.owner),
+                        func.lower(repositories.c.name),
+                        repositories.c.last_synced_at
+                    )
+                )
+            }
+
+            pending = set(connection.execute(
+                select(sync_jobs.c.owner, sync_jobs.c.name).where(sync_jobs.c.status.in_([QUEUED, RUNNING]))
+            ).all())
+
+            last_failed = {
+                (owner, name): failed_at
+                for owner, name, failed_at in connection.execute(
+                    select(sync_jobs.c.owner, sync_jobs.c.name, func.max(sync_jobs.c.finished_at))
+                    .where(sync_jobs.c.status == FAILED)
+                    .group_by(sync_jobs.c.owner, sync_jobs.c.name)
+                )
+            }
+
+        return [
+            (owner, name) for owner, name in tracked
+            if (owner, name) not in pending
+            and (last_synced.get((owner, name)) is None or last_synced[(owner, name)] < stale_before)
+            and (last_failed.get((owner, name)) is None or last_failed[(owner, name)] < stale_before)
+        ]
+
+    @staticmethod
+    def _track(connection, owner: str, repo: str):
+        """Add a repository to the ones kept in sync periodically."""
+
+        exists = connection.execute(
+            select(tracked_repositories).where(
+                tracked_repositories.c.owner == owner,
+                tracked_repositories.c.name == repo
+            )
+        ).first()
+        if exists is None:
+            connection.execute(
+                tracked_repositories.insert().values(owner=owner, name=repo, created_at=datetime.utcnow())
+            )
+
+    def _get(self, connection, job_id: int) -> Optional[Dict[str, Any]]:
+        row = self._get_row(connection, job_id)
+        return serialize_job(row) if row is not None else None
+
+    @staticmethod
+    def _get_row(connection, job_id: int) -> Optional[Row]:
+        return connection.execute(select(sync_jobs).where(sync_jobs.c.id == job_id)).first()
@@ -1,9 +1,12 @@
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
 import logging
 from dotenv import load_dotenv
 
+from app.dependencies import get_services
 from app.routers import router
+from app.utils.metrics import MetricsMiddleware
 
 # Load environment variables from .env file
 load_dotenv()
@@ -15,11 +18,26 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """Create the shared services and warm them up before serving, and release them on shutdown."""
+
+    services = get_services()
+    app.state.services = services
+    await services.start()
+    try:
+        yield
+    finally:
+        await services.close()
+
+
 # Create FastAPI app
 app = FastAPI(
     title="GitBoss AI API",
     description="API for GitBoss AI Dashboard",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
 # Add CORS middleware
@@ -31,8 +49,12 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+# Record request latencies and trace the requests asking for it
+app.add_middleware(MetricsMiddleware)
+
 app.include_router(router)
 
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
\ No newline at end of file
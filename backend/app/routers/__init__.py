@@ -3,6 +3,9 @@ from fastapi import APIRouter
 from app.routers.health import router as health_router
 from app.routers.repos import router as repository_router
 from app.routers.contributors import router as contributors_router
+from app.routers.orgs import router as orgs_router
+from app.routers.jobs import router as jobs_router
+from app.routers.webhooks import router as webhooks_router
 from app.routers.websockets import router as websocket_router
 
 # Create main router
@@ -12,4 +15,7 @@ router = APIRouter()
 router.include_router(health_router)
 router.include_router(repository_router)
 router.include_router(contributors_router)
+router.include_router(orgs_router)
+router.include_router(jobs_router)
+router.include_router(webhooks_router)
 router.include_router(websocket_router)
\ No newline at end of file
@@ -1,9 +1,15 @@
 # backend/app/routers/contributors.py
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from typing import List, Optional
 import logging
 
 from app.controllers.contributors import ContributorsController
+from app.dependencies import get_contributors_cache, get_contributors_controller
+from app.jobs.manager import RepositoryNotSyncedError, RepositorySyncFailedError
+from app.routers.errors import rate_limited_response
+from app.routers.jobs import sync_failed_response, sync_pending_response
+from app.services.github.ratelimit import RateLimitExceededError
+from app.utils.response_cache import ResponseCache, cached_json_response
 
 logger = logging.getLogger(__name__)
 
@@ -12,21 +18,36 @@ router = APIRouter(prefix="/api/contributors", tags=["contributors"])
 
 @router.get("/{owner}/{repo}")
 async def get_repository_contributors(
+        request: Request,
         owner: str,
         repo: str,
         start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD format"),
         end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format"),
-        controller: ContributorsController = Depends(ContributorsController)
+        mode: str = Query("aggregate", pattern="^(aggregate|search)$",
+                          description="Aggregate the period's activity in one pass, or search per contributor"),
+        controller: ContributorsController = Depends(get_contributors_controller),
+        contributors_cache: ResponseCache = Depends(get_contributors_cache)
 ):
     """Get repository contributors with their statistics."""
 
     try:
-        return await controller.get_repository_contributors(
-            owner=owner,
-            repo=repo,
-            start_date=start_date,
-            end_date=end_date
+        result = await contributors_cache.get_or_compute(
+            (owner.lower(), repo.lower(), start_date, end_date, mode),
+            lambda: controller.get_repository_contributors(
+                owner=owner,
+                repo=repo,
+                start_date=start_date,
+                end_date=end_date,
+                mode=mode
+            )
         )
+        return cached_json_response(request, contributors_cache, result)
+    except RepositoryNotSyncedError as e:
+        return sync_pending_response(e.job)
+    except RepositorySyncFailedError as e:
+        return sync_failed_response(e.job)
+    except RateLimitExceededError as e:
+        return rate_limited_response(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -38,8 +59,8 @@ async def get_repository_contributors(
 async def get_contributor_weekly_stats(
         owner: str,
         repo: str,
-        weeks: int = Query(4, description="Number of weeks to include in the statistics"),
-        controller: ContributorsController = Depends(ContributorsController)
+        weeks: int = Query(4, ge=1, le=520, description="Number of weeks to include in the statistics"),
+        controller: ContributorsController = Depends(get_contributors_controller)
 ):
     """Get weekly statistics for each contributor."""
 
@@ -49,6 +70,12 @@ async def get_contributor_weekly_stats(
             repo=repo,
             weeks=weeks
         )
+    except RepositoryNotSyncedError as e:
+        return sync_pending_response(e.job)
+    except RepositorySyncFailedError as e:
+        return sync_failed_response(e.job)
+    except RateLimitExceededError as e:
+        return rate_limited_response(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
@@ -0,0 +1,15 @@
+# backend/app/routers/errors.py
+from fastapi import status
+from fastapi.responses import JSONResponse
+
+from app.services.github.ratelimit import RateLimitExceededError
+
+
+def rate_limited_response(error: RateLimitExceededError) -> JSONResponse:
+    """Tell the client GitHub's rate limits are exhausted and when to come back."""
+
+    return JSONResponse(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        content={"detail": str(error)},
+        headers={"Retry-After": str(error.retry_after)}
+    )
@@ -1,7 +1,16 @@
 # backend/app/routers/health.py
-from fastapi import APIRouter
+from fastapi import APIRouter, HTTPException, status
+from fastapi.responses import PlainTextResponse
 import logging
 
+from app.services.github.cache import get_http_cache
+from app.services.github.ratelimit import get_rate_limiter
+from app.services.github.tokens import get_token_pool
+from app.utils.metrics import MetricsRegistry, get_metrics, get_trace
+from app.utils.response_cache import get_response_cache_stats
+from app.utils.singleflight import get_single_flight_stats
+from app.websocket.hub import get_connection_hub
+
 logger = logging.getLogger(__name__)
 
 router = APIRouter(prefix="/api", tags=["system"])
@@ -9,4 +18,107 @@ router = APIRouter(prefix="/api", tags=["system"])
 @router.get("/health")
 async def health_check():
     """Health check endpoint"""
-    return {"status": "ok"}
\ No newline at end of file
+    return {"status": "ok"}
+
+
+@router.get("/cache")
+async def cache_stats():
+    """GitHub HTTP cache counters"""
+    cache = get_http_cache()
+    return {"enabled": cache is not None, **(cache.stats() if cache else {})}
+
+
+@router.get("/coalescing")
+async def coalescing_stats():
+    """Counters of identical in-flight requests that shared one computation"""
+    return get_single_flight_stats()
+
+
+@router.get("/rate-limits")
+async def rate_limits():
+    """Usage and remaining GitHub rate limit budgets of every token"""
+    rate_limiter = get_rate_limiter()
+    return {"throttled": rate_limiter.throttled, "tokens": get_token_pool().stats(rate_limiter)}
+
+
+@router.get("/response-cache")
+async def response_cache_stats():
+    """Counters of the stats and contributors result caches"""
+    return get_response_cache_stats()
+
+
+@router.get("/websockets")
+async def websocket_stats():
+    """WebSocket connections and broadcast counters"""
+    return get_connection_hub().stats()
+
+
+def _hit_ratio(hits: int, total: int) -> float:
+    return hits / total if total else 0.0
+
+
+def collect_component_metrics(metrics: MetricsRegistry):
+    """Copy the counters and state of the caches, coalescing groups and rate limits into the metrics."""
+
+    http_cache = get_http_cache()
+    if http_cache is not None:
+        cache_stats = http_cache.stats()
+        requests = metrics.counter("github_http_cache_lookups_total", "GitHub HTTP cache lookups", ("result",))
+        requests.set_total(cache_stats["hits"], result="hit")
+        requests.set_total(cache_stats["misses"], result="miss")
+        metrics.counter(
+            "github_http_cache_not_modified_total", "GitHub responses served from the HTTP cache after a 304"
+        ).set_total(cache_stats["not_modified"])
+        metrics.gauge("github_http_cache_hit_ratio", "Share of GitHub HTTP cache lookups that found a response").set(
+            _hit_ratio(cache_stats["hits"], cache_stats["hits"] + cache_stats["misses"])
+        )
+
+    lookups = metrics.counter("response_cache_lookups_total", "Response cache lookups", ("cache", "result"))
+    hit_ratio = metrics.gauge(
+        "response_cache_hit_ratio", "Share of response cache lookups answered from the cache, fresh or stale", ("cache",)
+    )
+    entries = metrics.gauge("response_cache_entries", "Entries in the response cache", ("cache",))
+    for name, cache_stats in get_response_cache_stats().items():
+        for counter, result in (("hits", "hit"), ("stale_hits", "stale_hit"), ("misses", "miss")):
+            lookups.set_total(cache_stats[counter], cache=name, result=result)
+        hit_ratio.set(_hit_ratio(
+            cache_stats["hits"] + cache_stats["stale_hits"],
+            cache_stats["hits"] + cache_stats["stale_hits"] + cache_stats["misses"]
+        ), cache=name)
+        entries.set(cache_stats["entries"], cache=name)
+
+    calls = metrics.counter("coalescing_calls_total", "Calls of the single-flight groups", ("group", "result"))
+    for name, flight_stats in get_single_flight_stats().items():
+        calls.set_total(flight_stats["executions"], group=name, result="executed")
+        calls.set_total(flight_stats["coalesced"], group=name, result="coalesced")
+
+    remaining = metrics.gauge(
+        "github_rate_limit_remaining", "Requests left in the rate limit budget", ("token", "resource")
+    )
+    limit = metrics.gauge("github_rate_limit_limit", "Size of the rate limit budget", ("token", "resource"))
+    remaining.clear()
+    limit.clear()
+    for token, resources in get_rate_limiter().stats().items():
+        for resource, budget in resources.items():
+            remaining.set(budget["remaining"], token=token, resource=resource)
+            limit.set(budget["limit"], token=token, resource=resource)
+    metrics.counter(
+        "github_rate_limited_total", "GitHub responses that paused a rate limit budget"
+    ).set_total(get_rate_limiter().throttled)
+
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def prometheus_metrics():
+    """Metrics of this worker process in the Prometheus text format"""
+    metrics = get_metrics()
+    collect_component_metrics(metrics)
+    return PlainTextResponse(metrics.render(), media_type="text/plain; version=0.0.4")
+
+
+@router.get("/traces/{trace_id}")
+async def request_trace(trace_id: str):
+    """GitHub calls made by a recent request sent with an X-Trace header"""
+    trace = get_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Trace not found")
+    return trace
@@ -0,0 +1,80 @@
+# backend/app/routers/jobs.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi.responses import JSONResponse
+from typing import Any, Dict, Optional
+import logging
+
+from app.controllers.jobs import JobsController
+from app.dependencies import get_jobs_controller
+from app.jobs.manager import RepositorySyncFailedError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/jobs", tags=["jobs"])
+
+# Seconds clients are asked to wait before polling a repository that is being synced
+SYNC_RETRY_AFTER = 5
+
+
+def sync_failed_response(job: Dict[str, Any]) -> JSONResponse:
+    """Tell the client the repository's last sync failed: not found if GitHub said so, a bad gateway otherwise."""
+
+    not_found = job["error_status"] in (status.HTTP_404_NOT_FOUND, status.HTTP_410_GONE)
+    return JSONResponse(
+        status_code=status.HTTP_404_NOT_FOUND if not_found else status.HTTP_502_BAD_GATEWAY,
+        content={"status": "failed", "job": job}
+    )
+
+
+def sync_pending_response(job: Dict[str, Any]) -> JSONResponse:
+    """Tell the client the repository is being synced and when to come back."""
+
+    return JSONResponse(
+        status_code=status.HTTP_202_ACCEPTED,
+        content={"status": "syncing", "job": job},
+        headers={"Retry-After": str(SYNC_RETRY_AFTER)}
+    )
+
+
+@router.get("")
+async def list_jobs(
+        job_status: Optional[str] = Query(None, alias="status", pattern="^(queued|running|succeeded|failed)$",
+                                          description="Only return jobs with this status"),
+        limit: int = Query(50, ge=1, le=500, description="Maximum number of jobs to return"),
+        controller: JobsController = Depends(get_jobs_controller)
+):
+    """Get the most recent sync jobs."""
+
+    return await controller.list_jobs(status=job_status, limit=limit)
+
+
+@router.get("/{job_id}")
+async def get_job(
+        job_id: int,
+        controller: JobsController = Depends(get_jobs_controller)
+):
+    """Get a sync job."""
+
+    job = await controller.get_job(job_id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Job {job_id} not found")
+    return job
+
+
+@router.post("/{owner}/{repo}", status_code=status.HTTP_202_ACCEPTED)
+async def create_job(
+        owner: str,
+        repo: str,
+        controller: JobsController = Depends(get_jobs_controller)
+):
+    """Queue a sync of a repository, which is then kept in sync periodically."""
+
+    try:
+        return await controller.create_job(owner=owner, repo=repo)
+    except RepositorySyncFailedError as e:
+        return sync_failed_response(e.job)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to queue sync job: {str(e)}"
+        )
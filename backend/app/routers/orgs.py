@@ -0,0 +1,45 @@
+# backend/app/routers/orgs.py
+from fastapi import APIRouter, Depends, HTTPException, Query, status
+from typing import Optional
+import logging
+
+from app.controllers.orgs import OrganizationController
+from app.dependencies import get_organization_controller
+from app.routers.errors import rate_limited_response
+from app.services.github.ratelimit import RateLimitExceededError
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/orgs", tags=["organizations"])
+
+
+@router.get("/{org}/stats")
+async def get_organization_stats(
+        org: str,
+        repos: Optional[str] = Query(None, description="Comma-separated repositories to include instead of all of "
+                                                       "the organization's, as names or owner/name"),
+        start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD format"),
+        end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format"),
+        timeout: Optional[float] = Query(None, gt=0, le=300,
+                                         description="Seconds to wait for repositories before returning partial results"),
+        top: int = Query(50, ge=1, le=1000, description="Number of contributors in the leaderboard"),
+        controller: OrganizationController = Depends(get_organization_controller)
+):
+    """Get statistics and a merged contributor leaderboard across an organization's repositories."""
+
+    try:
+        return await controller.get_organization_stats(
+            org=org,
+            repos=[name.strip() for name in repos.split(",") if name.strip()] if repos else None,
+            start_date=start_date,
+            end_date=end_date,
+            timeout=timeout,
+            top=top
+        )
+    except RateLimitExceededError as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to fetch organization stats: {str(e)}"
+        )
@@ -1,9 +1,17 @@
 # backend/app/routers/repositories.py
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
+from fastapi.responses import StreamingResponse
 from typing import Optional
+import json
 import logging
 
 from app.controllers.repos import RepositoryController
+from app.dependencies import get_repository_controller, get_stats_cache
+from app.jobs.manager import RepositoryNotSyncedError, RepositorySyncFailedError
+from app.routers.errors import rate_limited_response
+from app.routers.jobs import sync_failed_response, sync_pending_response
+from app.services.github.ratelimit import RateLimitExceededError
+from app.utils.response_cache import ResponseCache, cached_json_response
 
 logger = logging.getLogger(__name__)
 
@@ -12,23 +20,96 @@ router = APIRouter(prefix="/api/repos", tags=["repositories"])
 
 @router.get("/{owner}/{repo}/stats")
 async def get_repository_stats(
+        request: Request,
         owner: str,
         repo: str,
         start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD format"),
         end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format"),
-        controller: RepositoryController = Depends(RepositoryController)
+        controller: RepositoryController = Depends(get_repository_controller),
+        stats_cache: ResponseCache = Depends(get_stats_cache)
 ):
     """Get repository statistics for a specific time period."""
 
     try:
-        return await controller.get_repository_stats(
-            owner=owner,
-            repo=repo,
-            start_date=start_date,
-            end_date=end_date
+        result = await stats_cache.get_or_compute(
+            (owner.lower(), repo.lower(), start_date, end_date),
+            lambda: controller.get_repository_stats(
+                owner=owner,
+                repo=repo,
+                start_date=start_date,
+                end_date=end_date
+            )
         )
+        return cached_json_response(request, stats_cache, result)
+    except RepositoryNotSyncedError as e:
+        return sync_pending_response(e.job)
+    except RepositorySyncFailedError as e:
+        return sync_failed_response(e.job)
+    except RateLimitExceededError as e:
+        return rate_limited_response(e)
     except Exception as e:
         raise HTTPException(
             status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
             detail=f"Failed to fetch repository stats: {str(e)}"
-        )
\ No newline at end of file
+        )
+
+
+@router.get("/{owner}/{repo}/stats/stream")
+async def stream_repository_stats(
+        owner: str,
+        repo: str,
+        start_date: Optional[str] = Query(None, description="Start date in YYYY-MM-DD format"),
+        end_date: Optional[str] = Query(None, description="End date in YYYY-MM-DD format"),
+        controller: RepositoryController = Depends(get_repository_controller)
+):
+    """Stream repository statistics as newline-delimited JSON: partial counts as they grow, then the result."""
+
+    async def events():
+        try:
+            async for event in controller.stream_repository_stats(
+                    owner=owner,
+                    repo=repo,
+                    start_date=start_date,
+                    end_date=end_date
+            ):
+                yield json.dumps(event) + "\n"
+        except Exception as e:
+            # The status line is already sent, so report the failure in the stream
+            logger.error(f"Error streaming repository stats: {str(e)}")
+            yield json.dumps({"type": "error", "message": f"Failed to fetch repository stats: {str(e)}"}) + "\n"
+
+    return StreamingResponse(events(), media_type="application/x-ndjson")
+
+
+@router.post("/{owner}/{repo}/sync")
+async def sync_repository(
+        owner: str,
+        repo: str,
+        controller: RepositoryController = Depends(get_repository_controller)
+):
+    """Sync a repository's activity into the local store."""
+
+    try:
+        return await controller.sync_repository(owner=owner, repo=repo)
+    except RepositoryNotSyncedError as e:
+        return sync_pending_response(e.job)
+    except RepositorySyncFailedError as e:
+        return sync_failed_response(e.job)
+    except RateLimitExceededError as e:
+        return rate_limited_response(e)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to sync repository: {str(e)}"
+        )
+
+
+@router.delete("/{owner}/{repo}/cache")
+async def invalidate_repository_cache(
+        owner: str,
+        repo: str,
+        controller: RepositoryController = Depends(get_repository_controller)
+):
+    """Drop the cached stats and contributors of a repository."""
+
+    return controller.invalidate_cache(owner=owner, repo=repo)
@@ -0,0 +1,51 @@
+# backend/app/routers/webhooks.py
+from fastapi import APIRouter, Depends, Header, HTTPException, Request, status
+from typing import Optional
+import json
+import logging
+import os
+
+from app.controllers.webhooks import WebhooksController
+from app.dependencies import get_webhooks_controller
+from app.services.github.webhooks import verify_signature
+
+logger = logging.getLogger(__name__)
+
+router = APIRouter(prefix="/api/webhooks", tags=["webhooks"])
+
+
+@router.post("/github")
+async def receive_github_webhook(
+        request: Request,
+        x_github_event: str = Header(...),
+        x_github_delivery: Optional[str] = Header(None),
+        x_hub_signature_256: Optional[str] = Header(None),
+        controller: WebhooksController = Depends(get_webhooks_controller)
+):
+    """Receive a GitHub webhook delivery and apply it to the stored repository activity."""
+
+    secret = os.getenv("GITHUB_WEBHOOK_SECRET")
+    if not secret:
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+            detail="GitHub webhooks are not configured"
+        )
+
+    # The signature covers the raw body, so check it before parsing
+    body = await request.body()
+    if not verify_signature(secret, body, x_hub_signature_256):
+        logger.warning(f"Rejected webhook delivery {x_github_delivery} with an invalid signature")
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid webhook signature")
+
+    try:
+        payload = json.loads(body)
+    except json.JSONDecodeError:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="Invalid webhook payload")
+
+    try:
+        return await controller.handle_delivery(event=x_github_event, delivery_id=x_github_delivery, payload=payload)
+    except Exception as e:
+        raise HTTPException(
+            status_code=status.HTTP_500_INTERNAL_SERVER_ERROR,
+            detail=f"Failed to apply webhook delivery: {str(e)}"
+        )
@@ -1,15 +1,17 @@
-from fastapi import APIRouter, WebSocket
+from fastapi import APIRouter, Depends, WebSocket
 import logging
 
+from app.dependencies import get_chat_handler
 from app.websocket.chat import ChatWebSocketHandler
 
 logger = logging.getLogger(__name__)
 
 router = APIRouter(tags=["websocket"])
 
-chat_handler = ChatWebSocketHandler()
-
 @router.websocket("/ws/chat")
-async def websocket_endpoint(websocket: WebSocket):
+async def websocket_endpoint(
+        websocket: WebSocket,
+        chat_handler: ChatWebSocketHandler = Depends(get_chat_handler)
+):
     """WebSocket endpoint for chat"""
     await chat_handler.handle_connection(websocket)
\ No newline at end of file
@@ -1,85 +1,518 @@
 import os
+import re
+import math
+import time
+import asyncio
 import logging
-import requests
-from typing import Dict, List, Optional
+import httpx
+from datetime import datetime, timedelta, timezone
+from typing import Any, AsyncIterator, Callable, Dict, Iterable, List, Optional, Tuple, TypeVar
+from urllib.parse import parse_qs, urlparse
+
+from app.services.github.cache import ConditionalRequestCache, get_http_cache
+from app.services.github.client import GitHubClient, get_github_client
+from app.services.github.projection import Projection
+from app.services.github.ratelimit import RateLimitScheduler, get_rate_limiter
+from app.services.github.tokens import TokenPool, get_token_pool
+from app.utils.metrics import record_github_call, record_pages
 
 logger = logging.getLogger(__name__)
 
+# Maximum page size accepted by the GitHub API
+PER_PAGE = 100
+
+# Search endpoints stop returning results after this many items
+SEARCH_RESULT_LIMIT = 1000
+
+# Maximum number of PRs looked up in a single GraphQL query
+GRAPHQL_PR_BATCH_SIZE = 100
+
+# Searches without a start date are split from here when they match too many results
+SEARCH_EPOCH = datetime(2008, 1, 1, tzinfo=timezone.utc)
+
+T = TypeVar("T")
+
+
+def search_date_filter(field: str, start_date: Optional[str] = None, end_date: Optional[str] = None) -> str:
+    """Build the search qualifiers limiting a date field to a period, e.g. ``+created:>=2024-01-01``."""
+
+    date_filter = ""
+    if start_date:
+        date_filter += f"+{field}:>={start_date}"
+    if end_date:
+        date_filter += f"+{field}:<={end_date}"
+    return date_filter
+
+
+class GitHubGraphQLError(Exception):
+    """Raised when a GitHub GraphQL query returns no data."""
+
 
 class GitHubBaseService:
     """Base service for interacting with the GitHub API."""
 
-    def __init__(self):
-        self.token = os.getenv("GITHUB_TOKEN")
-        self.base_url = "https://api.github.com"
+    def __init__(self, client: Optional[GitHubClient] = None, cache: Optional[ConditionalRequestCache] = None,
+                 rate_limiter: Optional[RateLimitScheduler] = None, token_pool: Optional[TokenPool] = None):
+        self.base_url = os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+        self.graphql_url = f"{self.base_url}/graphql"
         self.headers = {
-            "Accept": "application/vnd.github.v3+json",
-            "Authorization": f"token {self.token}"
+            "Accept": "application/vnd.github.v3+json"
         }
+        self.token_pool = token_pool or get_token_pool()
+        self.client = client or get_github_client()
+        self.cache = cache or get_http_cache()
+        self.rate_limiter = rate_limiter or get_rate_limiter()
+        self.page_concurrency = int(os.getenv("GITHUB_PAGE_CONCURRENCY", "5"))
 
-    def make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
-        """Make a request to the GitHub API."""
+    async def _send(self, method: str, url: str, headers: Dict, **kwargs) -> httpx.Response:
+        """Send a request with the least used token once the rate limit scheduler allows it.
+
+        Requests throttled by GitHub cool their token down and are retried, on another token if one is available.
+        """
+
+        resource = self.rate_limiter.resource_for(url)
+        send = self.client.post if method == "POST" else self.client.get
+
+        attempt = 0
+        while True:
+            token = self.token_pool.select(resource, self.rate_limiter)
+            await self.rate_limiter.acquire(resource, token=token.id)
+
+            token_value = await token.get_value(self.client)
+            request_headers = {**headers, "Authorization": f"token {token_value}"} if token_value else headers
+
+            started_at = time.time()
+            start = time.perf_counter()
+            response = await send(url, headers=request_headers, **kwargs)
+            record_github_call(
+                method, str(response.request.url), response.status_code,
+                time.perf_counter() - start, len(response.content), started_at
+            )
+            self.token_pool.record(token, resource)
+            self.rate_limiter.update(resource, response.headers, token=token.id)
+
+            delay = self.rate_limiter.get_retry_delay(response, attempt)
+            if delay is None or attempt >= self.rate_limiter.max_retries:
+                return response
+
+            logger.warning(f"Rate limited on {url} with {token.id} ({response.status_code}), retrying")
+            self.rate_limiter.block(resource, delay, token=token.id)
+            attempt += 1
+
+    async def _get(self, endpoint: str, params: Optional[Dict] = None) -> httpx.Response:
+        """Send a GET request to the GitHub API, revalidating cached responses, and raise on any error response."""
 
         url = f"{self.base_url}/{endpoint}"
-        response = requests.get(url, headers=self.headers, params=params)
+        headers = self.headers
+
+        cache_key = None
+        cached = None
+        if self.cache is not None:
+            cache_key = str(httpx.URL(url).copy_merge_params(params or {}))
+            cached = await self.cache.lookup(cache_key)
+            if cached is not None:
+                headers = {**headers, **self.cache.conditional_headers(cached)}
+
+        response = await self._send("GET", url, headers=headers, params=params)
+
+        if response.status_code == 304 and cached is not None:
+            self.cache.record_not_modified()
+            return httpx.Response(200, content=cached.body, headers=cached.headers, request=response.request)
+
+        if response.status_code == 202:
+            # Accepted: GitHub is still computing the result, let the caller decide whether to retry
+            return response
+
+        if response.status_code == 204:
+            # No Content, e.g. statistics of an empty repository: nothing worth caching
+            return response
 
         if response.status_code != 200:
             logger.error(f"Error making request to {url}: {response.status_code} - {response.text}")
             response.raise_for_status()
 
+        if cache_key is not None:
+            await self.cache.store(cache_key, response.content, response.headers)
+
+        return response
+
+    async def make_request(self, endpoint: str, params: Optional[Dict] = None) -> Dict:
+        """Make a request to the GitHub API."""
+
+        response = await self._get(endpoint, params)
         return response.json()
 
-    def get_paginated_results(self, endpoint: str, params: Optional[Dict] = None) -> List[Dict]:
-        """Get all results from a paginated GitHub API endpoint."""
+    async def make_graphql_request(self, query: str, variables: Optional[Dict] = None) -> Dict:
+        """Run a query against the GitHub GraphQL API and return its data."""
+
+        response = await self._send(
+            "POST",
+            self.graphql_url,
+            headers=self.headers,
+            json={"query": query, "variables": variables or {}}
+        )
+
+        if response.status_code != 200:
+            logger.error(f"Error making GraphQL request: {response.status_code} - {response.text}")
+            response.raise_for_status()
+
+        payload = response.json()
+        if payload.get("errors"):
+            logger.warning(f"GraphQL request returned errors: {payload['errors']}")
+        if not payload.get("data"):
+            raise GitHubGraphQLError(str(payload.get("errors")))
+
+        return payload["data"]
+
+    async def query_pull_request_reviews(self, owner: str, repo: str, pr_numbers: List[int],
+                                        review_fields: str) -> Dict[int, Optional[Dict]]:
+        """Get the first 100 reviews of up to 100 PRs in a single GraphQL query.
+
+        Maps every PR number to its ``reviews`` connection with the given fields, or None if the PR
+        wasn't found.
+        """
+
+        pull_requests = "\n".join(
+            f"pr{number}: pullRequest(number: {number}) {{ reviews(first: 100) {{ {review_fields} }} }}"
+            for number in pr_numbers
+        )
+        query = f"""
+            query($owner: String!, $repo: String!) {{
+                repository(owner: $owner, name: $repo) {{
+                    {pull_requests}
+                }}
+            }}
+        """
+        data = await self.make_graphql_request(query, {"owner": owner, "repo": repo})
+        repository = data.get("repository") or {}
+
+        return {number: (repository.get(f"pr{number}") or {}).get("reviews") for number in pr_numbers}
+
+    async def get_pull_request_reviews(self, owner: str, repo: str, pr_numbers: List[int],
+                                       projection: Projection) -> Dict[int, List[Any]]:
+        """Get the reviews of many PRs, projected, with one GraphQL query per batch of up to 100 PRs.
+
+        Reviews are translated to their REST representation before being projected. PRs with more
+        reviews than fit in one query, those of batches whose query failed, and every PR when GraphQL
+        can't be used, are listed over REST.
+        """
+
+        reviews_per_pr: Dict[int, List[Any]] = {}
+        leftovers = list(pr_numbers)
+
+        async def query_batch(batch: List[int]) -> Optional[Dict[int, Optional[Dict]]]:
+            try:
+                return await self.query_pull_request_reviews(
+                    owner, repo, batch, "totalCount nodes { databaseId author { login avatarUrl } submittedAt state }"
+                )
+            except Exception as e:
+                logger.warning(f"GraphQL review listing failed for {owner}/{repo}, falling back to REST: {str(e)}")
+                return None
+
+        if self.token_pool.authenticated:
+            batches = [
+                pr_numbers[i:i + GRAPHQL_PR_BATCH_SIZE]
+                for i in range(0, len(pr_numbers), GRAPHQL_PR_BATCH_SIZE)
+            ]
+            results = await asyncio.gather(*(query_batch(batch) for batch in batches))
+
+            leftovers = []
+            for batch, batch_reviews in zip(batches, results):
+                if batch_reviews is None:
+                    leftovers.extend(batch)
+                    continue
+
+                for number, reviews in batch_reviews.items():
+                    if reviews is None or reviews["totalCount"] > len(reviews["nodes"]):
+                        leftovers.append(number)
+                        continue
+                    reviews_per_pr[number] = [
+                        projection({
+                            "id": node.get("databaseId"),
+                            "user": {
+                                "login": node["author"].get("login"),
+                                "avatar_url": node["author"].get("avatarUrl")
+                            } if node.get("author") else None,
+                            "submitted_at": node.get("submittedAt"),
+                            "state": node.get("state")
+                        })
+                        for node in reviews["nodes"]
+                    ]
+
+        rest_reviews = await asyncio.gather(*(
+            self.get_paginated_results(f"repos/{owner}/{repo}/pulls/{number}/reviews", projection=projection)
+            for number in leftovers
+        ))
+        reviews_per_pr.update(zip(leftovers, rest_reviews))
+
+        return reviews_per_pr
+
+    async def get_paginated_results(self, endpoint: str, params: Optional[Dict] = None,
+                                    max_concurrency: Optional[int] = None,
+                                    projection: Optional[Projection] = None) -> List[Any]:
+        """Get all results from a paginated GitHub API endpoint, in page order.
 
-        if params is None:
-            params = {}
+        With a projection, each page is reduced to its records as soon as it arrives and the decoded
+        page is released, so only the projected fields are held until the last page is in.
+        """
+
+        pages = {}
+        async for page, items in self.iter_pages(endpoint, params, max_concurrency):
+            pages[page] = projection.page(items) if projection is not None else items
+        record_pages(endpoint, len(pages))
+
+        return [item for page in sorted(pages) for item in pages[page]]
+
+    async def fold_pages(self, endpoint: str, reducer: Callable[[T, List[Dict]], T], initial: T,
+                         params: Optional[Dict] = None, max_concurrency: Optional[int] = None) -> T:
+        """Fold every page of a paginated GitHub API endpoint into an accumulator.
+
+        ``reducer(accumulator, items)`` is called with each page as it arrives, which may be out of
+        page order, and returns the new accumulator. Nothing but the accumulator outlives a page,
+        which suits counting and grouping over long result sets.
+        """
+
+        accumulator = initial
+        pages = 0
+        async for _, items in self.iter_pages(endpoint, params, max_concurrency):
+            accumulator = reducer(accumulator, items)
+            pages += 1
+        record_pages(endpoint, pages)
+
+        return accumulator
+
+    async def iter_pages(self, endpoint: str, params: Optional[Dict] = None,
+                         max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """Yield ``(page, items)`` for each page of a paginated endpoint as soon as it arrives.
+
+        The first page is fetched on its own to discover the page count from the ``rel="last"``
+        link (or ``total_count`` for search endpoints). The remaining pages are then fetched
+        concurrently, so they may be yielded out of order.
+        """
+
+        params = dict(params or {})
 
         # Set page size to maximum (100)
-        params["per_page"] = 100
+        params["per_page"] = PER_PAGE
+        params["page"] = 1
 
-        # Initialize with first page
-        all_results = []
-        page = 1
-        more_pages = True
+        response = await self._get(endpoint, params)
+        page_results = response.json()
+        items = self._page_items(page_results)
+        yield 1, items
 
-        while more_pages:
+        links = self._parse_link_header(response.headers.get("Link"))
+        last_page = self._get_last_page(links, page_results, items)
+
+        if last_page is not None:
+            pages = range(2, last_page + 1)
+            async for page, items in self._fetch_pages(endpoint, params, pages, max_concurrency):
+                yield page, items
+            return
+
+        # Without a page count we can only follow the pages one by one
+        page = 1
+        while self._has_next_page(links, items):
+            page += 1
             params["page"] = page
-            url = f"{self.base_url}/{endpoint}"
 
-            response = requests.get(url, headers=self.headers, params=params)
+            response = await self._get(endpoint, params)
+            items = self._page_items(response.json())
+            links = self._parse_link_header(response.headers.get("Link"))
+            yield page, items
+
+    async def _fetch_pages(self, endpoint: str, params: Dict, pages: Iterable[int],
+                           max_concurrency: Optional[int] = None) -> AsyncIterator[Tuple[int, List[Dict]]]:
+        """Fetch the given pages concurrently and yield them in completion order.
+
+        A fixed number of workers take the pages in turn and hand the decoded ones over through a
+        bounded queue, so at most a few pages are held in memory at any time: each one is released
+        as soon as the consumer moves on, and the workers wait while the consumer is busy.
+        """
+
+        pages = list(pages)
+        concurrency = max(1, min(max_concurrency or self.page_concurrency, len(pages)))
+        remaining = iter(pages)
+        results: asyncio.Queue = asyncio.Queue(maxsize=concurrency)
+
+        async def worker():
+            try:
+                for page in remaining:
+                    response = await self._get(endpoint, {**params, "page": page})
+                    await results.put((page, self._page_items(response.json())))
+            except Exception as e:
+                await results.put(e)
+
+        workers = [asyncio.ensure_future(worker()) for _ in range(concurrency)] if pages else []
+        try:
+            for _ in pages:
+                result = await results.get()
+                if isinstance(result, Exception):
+                    raise result
+                yield result
+                del result
+        finally:
+            for task in workers:
+                task.cancel()
+            await asyncio.gather(*workers, return_exceptions=True)
+
+    async def count_search_results(self, kind: str, query: str, date_field: Optional[str] = None,
+                                   start_date: Optional[str] = None, end_date: Optional[str] = None) -> int:
+        """Count the results of a search query from its ``total_count``.
+
+        Unlike the results themselves the total isn't capped at 1000, and it only takes one request.
+        """
+
+        date_filter = search_date_filter(date_field, start_date, end_date) if date_field else ""
+        response = await self._get(f"search/{kind}?q={query}{date_filter}", {"per_page": 1})
+        return response.json().get("total_count", 0)
+
+    async def iter_search(self, kind: str, query: str, date_field: str, start_date: Optional[str] = None,
+                          end_date: Optional[str] = None, key: str = "id") -> AsyncIterator[List[Dict]]:
+        """Yield every result of a search query page by page, past the 1000 results GitHub returns.
+
+        The query is run over the whole period first. If it matches more than 1000 results its date
+        window is split into as many parts as needed to fit under the cap, recursively for the parts
+        which still don't. Windows are crawled concurrently, within the search budget of the rate
+        limiter, and pages are yielded as they arrive. Results already yielded are skipped, as
+        results created while crawling shift the later pages.
+        """
+
+        results: asyncio.Queue = asyncio.Queue(maxsize=self.page_concurrency)
+        pages = 0
 
-            if response.status_code != 200:
-                logger.error(f"Error making request to {url}: {response.status_code} - {response.text}")
-                response.raise_for_status()
+        async def crawl(date_filter: str, window: Optional[Tuple[datetime, datetime]] = None):
+            nonlocal pages
 
-            # Add results from this page
+            endpoint = f"search/{kind}?q={query}{date_filter}"
+            params = {"per_page": PER_PAGE, "page": 1}
+            response = await self._get(endpoint, params)
             page_results = response.json()
+            total_count = page_results.get("total_count", 0)
 
-            # Handle different pagination formats
-            if isinstance(page_results, list):
-                if not page_results:  # Empty list means we've reached the end
-                    more_pages = False
-                all_results.extend(page_results)
-            elif isinstance(page_results, dict) and "items" in page_results:
-                # For search endpoints that return {items: [...], total_count: X}
-                all_results.extend(page_results["items"])
-
-                # Check if we've got all items
-                if len(all_results) >= page_results.get("total_count", 0):
-                    more_pages = False
-
-            # Check for next link in headers
-            if "Link" in response.headers:
-                has_next = any(
-                    'rel="next"' in link for link in response.headers["Link"].split(",")
-                )
-                if not has_next:
-                    more_pages = False
-            elif isinstance(page_results, list) and len(page_results) < params["per_page"]:
-                # If we got fewer items than the max per page, we're on the last page
-                more_pages = False
+            if total_count > SEARCH_RESULT_LIMIT:
+                start, end = window or self._search_window(start_date, end_date)
+                parts = self._split_window(start, end, math.ceil(total_count / SEARCH_RESULT_LIMIT) + 1)
+                if len(parts) > 1:
+                    await asyncio.gather(*(
+                        crawl(f"+{date_field}:{part_start:%Y-%m-%dT%H:%M:%SZ}..{part_end:%Y-%m-%dT%H:%M:%SZ}",
+                              (part_start, part_end))
+                        for part_start, part_end in parts
+                    ))
+                    return
 
-            page += 1
+                logger.warning(f"{endpoint} matches {total_count} results within a second, keeping the first "
+                               f"{SEARCH_RESULT_LIMIT}")
+
+            pages += 1
+            await results.put(self._page_items(page_results))
+            del page_results
+
+            last_page = math.ceil(min(total_count, SEARCH_RESULT_LIMIT) / PER_PAGE)
+            async for _, items in self._fetch_pages(endpoint, params, range(2, last_page + 1)):
+                pages += 1
+                await results.put(items)
+
+        async def crawl_all():
+            try:
+                await crawl(search_date_filter(date_field, start_date, end_date))
+                await results.put(None)
+            except Exception as e:
+                await results.put(e)
+
+        crawler = asyncio.ensure_future(crawl_all())
+        seen = set()
+        try:
+            while True:
+                items = await results.get()
+                if items is None:
+                    break
+                if isinstance(items, Exception):
+                    raise items
+
+                items = [item for item in items if item.get(key) not in seen]
+                seen.update(item.get(key) for item in items)
+                yield items
+        finally:
+            crawler.cancel()
+            await asyncio.gather(crawler, return_exceptions=True)
+
+        record_pages(f"search/{kind}", pages)
+
+    @staticmethod
+    def _search_window(start_date: Optional[str] = None, end_date: Optional[str] = None) -> Tuple[datetime, datetime]:
+        """Get the first and last second of a search period, open ends included."""
+
+        start = SEARCH_EPOCH
+        if start_date:
+            start = datetime.strptime(start_date, "%Y-%m-%d").replace(tzinfo=timezone.utc)
+
+        end = datetime.now(timezone.utc).replace(microsecond=0)
+        if end_date:
+            end = datetime.strptime(end_date, "%Y-%m-%d").replace(tzinfo=timezone.utc) + timedelta(days=1, seconds=-1)
+
+        return start, end
+
+    @staticmethod
+    def _split_window(start: datetime, end: datetime, parts: int) -> List[Tuple[datetime, datetime]]:
+        """Split an inclusive window of whole seconds into up to ``parts`` consecutive windows."""
+
+        seconds = int((end - start).total_seconds()) + 1
+        parts = max(1, min(parts, seconds))
+        bounds = [start + timedelta(seconds=seconds * i // parts) for i in range(parts + 1)]
+        return [(bounds[i], bounds[i + 1] - timedelta(seconds=1)) for i in range(parts)]
+
+    @staticmethod
+    def _page_items(page_results: Any) -> List[Dict]:
+        """Extract the items from a page of results."""
+
+        if isinstance(page_results, list):
+            return page_results
+        if isinstance(page_results, dict):
+            # For search endpoints that return {items: [...], total_count: X}
+            return page_results.get("items", [])
+        return []
+
+    @staticmethod
+    def _parse_link_header(link_header: Optional[str]) -> Dict[str, str]:
+        """Parse a Link header into a mapping of rel to URL."""
+
+        links = {}
+        if not link_header:
+            return links
+
+        for link in link_header.split(","):
+            match = re.search(r'<([^>]+)>;\s*rel="([^"]+)"', link)
+            if match:
+                links[match.group(2)] = match.group(1)
+        return links
+
+    @staticmethod
+    def _get_last_page(links: Dict[str, str], page_results: Any, items: List[Dict]) -> Optional[int]:
+        """Work out the number of pages from the first page, or None if it can't be known upfront."""
+
+        if "last" in links:
+            query = parse_qs(urlparse(links["last"]).query)
+            return int(query.get("page", ["1"])[0])
+
+        if isinstance(page_results, dict) and "total_count" in page_results:
+            # Search endpoints only ever return the first 1000 results
+            total_count = min(page_results["total_count"], SEARCH_RESULT_LIMIT)
+            return max(1, math.ceil(total_count / PER_PAGE))
+
+        if links and "next" not in links:
+            return 1
+        if not links and len(items) < PER_PAGE:
+            # GitHub omits the Link header when everything fits on a single page
+            return 1
+
+        return None
+
+    @staticmethod
+    def _has_next_page(links: Dict[str, str], items: List[Dict]) -> bool:
+        """Check whether another page follows the one that was just fetched."""
 
-        return all_results
\ No newline at end of file
+        if links:
+            return "next" in links
+        # If we got fewer items than the max per page, we're on the last page
+        return len(items) == PER_PAGE
@@ -0,0 +1,289 @@
+import os
+import time
+import asyncio
+import hashlib
+import logging
+from abc import ABC, abstractmethod
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Dict, Optional
+
+from sqlalchemy import Column, Float, Integer, LargeBinary, MetaData, String, Table, JSON, create_engine, func, select
+
+logger = logging.getLogger(__name__)
+
+# Response headers kept alongside a cached body
+CACHED_HEADERS = ("Content-Type", "ETag", "Last-Modified", "Link")
+
+
+@dataclass
+class CachedResponse:
+    """A response body stored together with its validators."""
+
+    body: bytes
+    etag: Optional[str] = None
+    last_modified: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    @property
+    def size(self) -> int:
+        return len(self.body)
+
+
+class CacheBackend(ABC):
+    """Storage for cached responses with size-bounded LRU eviction."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self.evictions = 0
+
+    @abstractmethod
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        """Get a cached response and mark it as recently used."""
+
+    @abstractmethod
+    async def set(self, key: str, entry: CachedResponse):
+        """Store a response, evicting the least recently used entries if over the limits."""
+
+    @abstractmethod
+    async def delete(self, key: str):
+        """Remove a cached response."""
+
+    @abstractmethod
+    async def clear(self):
+        """Remove all cached responses."""
+
+
+class MemoryCacheBackend(CacheBackend):
+    """In-process cache backend."""
+
+    def __init__(self, max_entries: int, max_bytes: int):
+        super().__init__(max_entries, max_bytes)
+        self._entries: "OrderedDict[str, CachedResponse]" = OrderedDict()
+        self._size = 0
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is not None:
+            self._entries.move_to_end(key)
+        return entry
+
+    async def set(self, key: str, entry: CachedResponse):
+        if entry.size > self.max_bytes:
+            return
+
+        await self.delete(key)
+        self._entries[key] = entry
+        self._size += entry.size
+
+        while len(self._entries) > self.max_entries or self._size > self.max_bytes:
+            _, evicted = self._entries.popitem(last=False)
+            self._size -= evicted.size
+            self.evictions += 1
+
+    async def delete(self, key: str):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self._size -= entry.size
+
+    async def clear(self):
+        self._entries.clear()
+        self._size = 0
+
+
+class SQLCacheBackend(CacheBackend):
+    """Cache backend persisted in a SQL database (SQLite or Postgres) through SQLAlchemy."""
+
+    def __init__(self, url: str, max_entries: int, max_bytes: int):
+        super().__init__(max_entries, max_bytes)
+
+        connect_args = {"check_same_thread": False} if url.startswith("sqlite") else {}
+        self.engine = create_engine(url, connect_args=connect_args)
+
+        metadata = MetaData()
+        self.table = Table(
+            "github_http_cache",
+            metadata,
+            Column("key", String(64), primary_key=True),
+            Column("etag", String(255)),
+            Column("last_modified", String(255)),
+            Column("headers", JSON),
+            Column("body", LargeBinary),
+            Column("size", Integer, nullable=False),
+            Column("accessed_at", Float, nullable=False, index=True)
+        )
+        metadata.create_all(self.engine)
+
+    @staticmethod
+    def _hash_key(key: str) -> str:
+        return hashlib.sha256(key.encode()).hexdigest()
+
+    def _get(self, key: str) -> Optional[CachedResponse]:
+        hashed_key = self._hash_key(key)
+
+        with self.engine.begin() as connection:
+            row = connection.execute(select(self.table).where(self.table.c.key == hashed_key)).first()
+            if row is None:
+                return None
+
+            connection.execute(
+                self.table.update().where(self.table.c.key == hashed_key).values(accessed_at=time.time())
+            )
+
+        return CachedResponse(
+            body=row.body,
+            etag=row.etag,
+            last_modified=row.last_modified,
+            headers=row.headers or {}
+        )
+
+    def _set(self, key: str, entry: CachedResponse):
+        if entry.size > self.max_bytes:
+            return
+
+        hashed_key = self._hash_key(key)
+
+        with self.engine.begin() as connection:
+            connection.execute(self.table.delete().where(self.table.c.key == hashed_key))
+            connection.execute(self.table.insert().values(
+                key=hashed_key,
+                etag=entry.etag,
+                last_modified=entry.last_modified,
+                headers=entry.headers,
+                body=entry.body,
+                size=entry.size,
+                accessed_at=time.time()
+            ))
+
+            count, total_size = connection.execute(
+                select(func.count(), func.coalesce(func.sum(self.table.c.size), 0)).select_from(self.table)
+            ).one()
+            if count <= self.max_entries and total_size <= self.max_bytes:
+                return
+
+            # Walk entries from least to most recently used until we're back within the limits
+            evicted_keys = []
+            rows = connection.execute(
+                select(self.table.c.key, self.table.c.size).order_by(self.table.c.accessed_at)
+            )
+            for row in rows:
+                if count <= self.max_entries and total_size <= self.max_bytes:
+                    break
+                evicted_keys.append(row.key)
+                count -= 1
+                total_size -= row.size
+
+            connection.execute(self.table.delete().where(self.table.c.key.in_(evicted_keys)))
+            self.evictions += len(evicted_keys)
+
+    def _delete(self, key: str):
+        with self.engine.begin() as connection:
+            connection.execute(self.table.delete().where(self.table.c.key == self._hash_key(key)))
+
+    def _clear(self):
+        with self.engine.begin() as connection:
+            connection.execute(self.table.delete())
+
+    async def get(self, key: str) -> Optional[CachedResponse]:
+        return await asyncio.to_thread(self._get, key)
+
+    async def set(self, key: str, entry: CachedResponse):
+        await asyncio.to_thread(self._set, key, entry)
+
+    async def delete(self, key: str):
+        await asyncio.to_thread(self._delete, key)
+
+    async def clear(self):
+        await asyncio.to_thread(self._clear)
+
+
+class ConditionalRequestCache:
+    """HTTP cache that revalidates stored GitHub responses with ETag / Last-Modified.
+
+    GitHub doesn't count 304 Not Modified responses against the rate limit, so revalidating
+    a stored body is much cheaper than downloading it again.
+    """
+
+    def __init__(self, backend: CacheBackend):
+        self.backend = backend
+        self.hits = 0
+        self.misses = 0
+        self.not_modified = 0
+
+    async def lookup(self, key: str) -> Optional[CachedResponse]:
+        """Find the stored response for a request, if any."""
+
+        entry = await self.backend.get(key)
+        if entry is None:
+            self.misses += 1
+        else:
+            self.hits += 1
+        return entry
+
+    @staticmethod
+    def conditional_headers(entry: CachedResponse) -> Dict[str, str]:
+        """Build the headers that ask GitHub to only send the body if it changed."""
+
+        headers = {}
+        if entry.etag:
+            headers["If-None-Match"] = entry.etag
+        if entry.last_modified:
+            headers["If-Modified-Since"] = entry.last_modified
+        return headers
+
+    def record_not_modified(self):
+        """Count a response served from the cache after a 304."""
+        self.not_modified += 1
+
+    async def store(self, key: str, body: bytes, headers: Dict[str, str]):
+        """Store a response body if it carries validators."""
+
+        etag = headers.get("ETag")
+        last_modified = headers.get("Last-Modified")
+        if not etag and not last_modified:
+            return
+
+        await self.backend.set(key, CachedResponse(
+            body=body,
+            etag=etag,
+            last_modified=last_modified,
+            headers={name: headers[name] for name in CACHED_HEADERS if name in headers}
+        ))
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache counters."""
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "not_modified": self.not_modified,
+            "evictions": self.backend.evictions
+        }
+
+
+_default_cache: Optional[ConditionalRequestCache] = None
+
+
+def get_http_cache() -> Optional[ConditionalRequestCache]:
+    """Get the process-wide GitHub HTTP cache, or None if caching is disabled."""
+    global _default_cache
+
+    if _default_cache is None:
+        backend_name = os.getenv("GITHUB_CACHE_BACKEND", "memory")
+        max_entries = int(os.getenv("GITHUB_CACHE_MAX_ENTRIES", "10000"))
+        max_bytes = int(os.getenv("GITHUB_CACHE_MAX_BYTES", str(256 * 1024 * 1024)))
+
+        if backend_name == "none":
+            return None
+        if backend_name == "memory":
+            backend = MemoryCacheBackend(max_entries, max_bytes)
+        elif backend_name == "sql":
+            url = os.getenv("GITHUB_CACHE_URL", "sqlite:///github_cache.db")
+            backend = SQLCacheBackend(url, max_entries, max_bytes)
+        else:
+            raise ValueError(f"Unknown GitHub cache backend: {backend_name}")
+
+        logger.info(f"Using {backend_name} GitHub HTTP cache")
+        _default_cache = ConditionalRequestCache(backend)
+
+    return _default_cache
@@ -0,0 +1,81 @@
+import os
+import asyncio
+import logging
+import httpx
+from typing import Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class GitHubClient:
+    """Async HTTP client for the GitHub API backed by a shared keep-alive connection pool."""
+
+    def __init__(self, max_connections: Optional[int] = None, max_concurrency: Optional[int] = None,
+                 timeout: Optional[float] = None):
+        self.max_connections = max_connections or int(os.getenv("GITHUB_MAX_CONNECTIONS", "20"))
+        self.max_concurrency = max_concurrency or int(os.getenv("GITHUB_MAX_CONCURRENCY", "10"))
+        self.timeout = timeout or float(os.getenv("GITHUB_TIMEOUT", "30"))
+
+        self._client: Optional[httpx.AsyncClient] = None
+        self._semaphore = asyncio.Semaphore(self.max_concurrency)
+
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """The underlying httpx client, created lazily on first use."""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                limits=httpx.Limits(
+                    max_connections=self.max_connections,
+                    max_keepalive_connections=self.max_connections
+                ),
+                timeout=self.timeout
+            )
+        return self._client
+
+    async def get(self, url: str, headers: Optional[Dict] = None, params: Optional[Dict] = None) -> httpx.Response:
+        """Send a GET request, waiting for a free concurrency slot first."""
+        async with self._semaphore:
+            return await self.client.get(url, headers=headers, params=params)
+
+    async def post(self, url: str, headers: Optional[Dict] = None, json: Optional[Dict] = None) -> httpx.Response:
+        """Send a POST request, waiting for a free concurrency slot first."""
+        async with self._semaphore:
+            return await self.client.post(url, headers=headers, json=json)
+
+    async def warm(self, url: str, connections: int) -> int:
+        """Open pooled connections ahead of the first requests, so that they don't wait for the handshakes.
+
+        The requests are sent concurrently to get a connection each. Failures are only logged, so an
+        unreachable API doesn't keep the application from starting. Returns the number of connections opened.
+        """
+
+        async def connect() -> Optional[Exception]:
+            try:
+                await self.client.head(url)
+            except httpx.HTTPError as e:
+                return e
+            return None
+
+        errors = await asyncio.gather(*(connect() for _ in range(min(connections, self.max_connections))))
+        failures = [error for error in errors if error is not None]
+        if failures:
+            logger.warning(f"Could not open {len(failures)} connection(s) to {url}: {str(failures[0])}")
+        return len(errors) - len(failures)
+
+    async def aclose(self):
+        """Close all pooled connections."""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+
+_default_client: Optional[GitHubClient] = None
+
+
+def get_github_client() -> GitHubClient:
+    """Get the process-wide GitHub client shared by all services."""
+    global _default_client
+
+    if _default_client is None:
+        _default_client = GitHubClient()
+    return _default_client
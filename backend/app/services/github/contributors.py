@@ -1,28 +1,186 @@
+import asyncio
 import logging
-from typing import Dict, List, Optional, Any
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Any, Tuple
+
+import numpy as np
 
 from app.services.github.base import GitHubBaseService
+from app.services.github.projection import Projection, first_line
+from app.utils.timebuckets import EventTable, build_weekly_stats, to_epoch_seconds, week_starts
 
 logger = logging.getLogger(__name__)
 
+# Number of events returned in each contributor's recent activity
+RECENT_ACTIVITY_LIMIT = 5
+
+# How many times to poll GitHub's contributor statistics while they're being computed
+CONTRIBUTOR_STATS_ATTEMPTS = 3
+
+# GitHub's precomputed contributor statistics only cover this many top contributors
+CONTRIBUTOR_STATS_LIMIT = 100
+
+COMMIT = Projection(
+    "Commit", sha="sha", login="author.login", avatar_url="author.avatar_url",
+    message=first_line("commit.message"), date="commit.author.date"
+)
+PULL_REQUEST = Projection(
+    "PullRequest", number="number", title="title", login="user.login", avatar_url="user.avatar_url",
+    created_at="created_at"
+)
+COMMITTED = Projection("Committed", login="author.login", avatar_url="author.avatar_url", date="commit.committer.date")
+REVIEW = Projection("Review", login="user.login", avatar_url="user.avatar_url", submitted_at="submitted_at")
+
+# Per author: avatar URL, number of events and their latest (timestamp, event) pairs
+AuthorEvents = Dict[str, list]
+
 
 class GitHubContributorsService(GitHubBaseService):
     """Service for fetching GitHub repository contributor data."""
 
-    def get_repository_contributors(self, owner: str, repo: str, start_date: Optional[str] = None,
-                                    end_date: Optional[str] = None) -> List[Dict[str, Any]]:
-        """Get repository contributors with statistics."""
+    async def get_repository_contributors(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                          end_date: Optional[str] = None,
+                                          mode: str = "aggregate") -> List[Dict[str, Any]]:
+        """Get repository contributors with statistics.
 
-        # Get basic list of contributors
-        contributors_endpoint = f"repos/{owner}/{repo}/contributors"
-        contributors = self.get_paginated_results(contributors_endpoint)
+        In ``aggregate`` mode the repository's commits, PRs and reviews for the period are fetched
+        once and grouped by author, so the number of requests grows with activity rather than with
+        the number of contributors. Like for synced repositories, only the contributors with activity
+        in the period are included. ``search`` mode runs separate search queries for every contributor.
+        """
+
+        if mode == "aggregate":
+            return await self._aggregate_repository_contributors(owner, repo, start_date, end_date)
+        if mode == "search":
+            return await self._search_repository_contributors(owner, repo, start_date, end_date)
 
-        # Create date filter strings for GitHub search
-        date_filter = ""
+        raise ValueError(f"Unknown contributors mode: {mode}")
+
+    async def _aggregate_repository_contributors(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                                 end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get repository contributors by grouping the period's commits, PRs and reviews by author in one pass."""
+
+        commits_params = {}
         if start_date:
-            date_filter += f"+committer-date:>={start_date}"
+            commits_params["since"] = f"{start_date}T00:00:00Z"
         if end_date:
-            date_filter += f"+committer-date:<={end_date}"
+            commits_params["until"] = f"{end_date}T23:59:59Z"
+
+        # Commits and PRs are folded into per-author counts page by page, keeping only each author's
+        # latest events, so memory follows the number of contributors rather than of commits
+        def add_events(authors: AuthorEvents, events: List[Tuple[Optional[str], Optional[str], str, Any]]) -> AuthorEvents:
+            for username, avatar_url, timestamp, event in events:
+                # Commits whose email isn't linked to a GitHub account have no author
+                if not username:
+                    continue
+
+                author = authors.get(username)
+                if author is None:
+                    author = authors[username] = [avatar_url, 0, []]
+                author[1] += 1
+                recent = author[2]
+                recent.append((timestamp or "", event))
+                if len(recent) >= 2 * RECENT_ACTIVITY_LIMIT:
+                    recent.sort(key=lambda pair: pair[0], reverse=True)
+                    del recent[RECENT_ACTIVITY_LIMIT:]
+            return authors
+
+        def add_commits(authors: AuthorEvents, commits: List[Dict[str, Any]]) -> AuthorEvents:
+            return add_events(authors, [
+                (
+                    commit.login,
+                    commit.avatar_url,
+                    commit.date,
+                    {"type": "commit", "repo": repo, "details": {"sha": commit.sha[:7], "message": commit.message}}
+                )
+                for commit in map(COMMIT, commits)
+            ])
+
+        def add_prs(authors: AuthorEvents, prs: List[Dict[str, Any]]) -> AuthorEvents:
+            return add_events(authors, [
+                (
+                    pr.login,
+                    pr.avatar_url,
+                    pr.created_at,
+                    {"type": "pull_request", "repo": repo, "details": {"number": pr.number, "title": pr.title}}
+                )
+                for pr in map(PULL_REQUEST, prs)
+            ])
+
+        def in_period(timestamp: Optional[str]) -> bool:
+            # GitHub timestamps are in UTC, so their date compares with the period's bounds
+            date = (timestamp or "")[:10]
+            return bool(date) and (not start_date or date >= start_date) and (not end_date or date <= end_date)
+
+        async def fold_prs() -> Tuple[AuthorEvents, List[int]]:
+            # Reviews update their PR, so the PRs updated since the start have all the period's reviews,
+            # and the PRs created in the period among them
+            authors: AuthorEvents = {}
+            numbers: List[int] = []
+            async for prs in self.iter_search("issues", f"repo:{owner}/{repo}+is:pr", "updated", start_date):
+                numbers.extend(pr["number"] for pr in prs)
+                authors = add_prs(authors, [pr for pr in prs if in_period(pr.get("created_at"))])
+            return authors, numbers
+
+        commit_authors, (pr_authors, pr_numbers) = await asyncio.gather(
+            self.fold_pages(f"repos/{owner}/{repo}/commits", add_commits, {}, commits_params),
+            fold_prs()
+        )
+
+        reviews_per_pr = await self.get_pull_request_reviews(owner, repo, pr_numbers, REVIEW)
+        review_authors: AuthorEvents = {}
+        for pr_reviews in reviews_per_pr.values():
+            for review in pr_reviews:
+                if not review.login or not in_period(review.submitted_at):
+                    continue
+                author = review_authors.setdefault(review.login, [review.avatar_url, 0, []])
+                author[1] += 1
+
+        contributor_stats: Dict[str, Dict[str, Any]] = {}
+        activity: Dict[str, List[Tuple[str, Dict[str, Any]]]] = defaultdict(list)
+
+        def get_entry(username: Optional[str], avatar_url: Optional[str]) -> Optional[Dict[str, Any]]:
+            if not username:
+                return None
+
+            if username not in contributor_stats:
+                contributor_stats[username] = {
+                    "username": username,
+                    "avatar_url": avatar_url,
+                    "commits": 0,
+                    "pull_requests": 0,
+                    "reviews": 0,
+                    "total_contributions": 0,
+                    "recent_activity": []
+                }
+            return contributor_stats[username]
+
+        for field, authors in (
+                ("commits", commit_authors), ("pull_requests", pr_authors), ("reviews", review_authors)
+        ):
+            for username, (avatar_url, count, recent) in authors.items():
+                entry = get_entry(username, avatar_url)
+                entry[field] += count
+                activity[username].extend(recent)
+
+        for username, entry in contributor_stats.items():
+            entry["total_contributions"] = entry["commits"] + entry["pull_requests"] + entry["reviews"]
+            events = sorted(activity[username], key=lambda pair: pair[0], reverse=True)
+            entry["recent_activity"] = [
+                {**event, "timestamp": timestamp or None} for timestamp, event in events[:RECENT_ACTIVITY_LIMIT]
+            ]
+
+        # Sort by total contributions
+        return sorted(contributor_stats.values(), key=lambda x: x["total_contributions"], reverse=True)
+
+    async def _search_repository_contributors(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                              end_date: Optional[str] = None) -> List[Dict[str, Any]]:
+        """Get repository contributors by running search queries for every contributor."""
+
+        # Get basic list of contributors
+        contributors_endpoint = f"repos/{owner}/{repo}/contributors"
+        contributors = await self.get_paginated_results(contributors_endpoint)
 
         # Detailed contributor stats
         contributor_stats = []
@@ -31,23 +189,17 @@ class GitHubContributorsService(GitHubBaseService):
             username = contributor.get("login")
             avatar_url = contributor.get("avatar_url")
 
-            # Get commits by this contributor
-            commits_query = f"search/commits?q=repo:{owner}/{repo}+author:{username}{date_filter}"
-            try:
-                commits_data = self.make_request(commits_query)
-                commit_count = commits_data.get("total_count", 0)
-            except Exception as e:
-                logger.error(f"Error fetching commits for {username}: {str(e)}")
-                commit_count = 0
-
-            # Get PRs created by this contributor
-            prs_query = f"search/issues?q=repo:{owner}/{repo}+author:{username}+is:pr{date_filter.replace('committer-date', 'created')}"
-            try:
-                prs_data = self.get_paginated_results(prs_query)
-                pr_count = len(prs_data)
-            except Exception as e:
-                logger.error(f"Error fetching PRs for {username}: {str(e)}")
-                pr_count = 0
+            # Only the totals of the searches are needed, which aren't capped at 1000 results
+            # Throttled searches are retried by the rate limiter, any other failure is
+            # raised rather than silently reported as zero activity
+            commit_count, pr_count = await asyncio.gather(
+                self.count_search_results(
+                    "commits", f"repo:{owner}/{repo}+author:{username}", "committer-date", start_date, end_date
+                ),
+                self.count_search_results(
+                    "issues", f"repo:{owner}/{repo}+author:{username}+is:pr", "created", start_date, end_date
+                )
+            )
 
             # Get reviews done by this contributor
             reviews_count = 0
@@ -56,7 +208,7 @@ class GitHubContributorsService(GitHubBaseService):
             # This is a placeholder for the actual implementation
 
             # Get recent activity
-            recent_activity = self._get_contributor_recent_activity(owner, repo, username)
+            recent_activity = await self._get_contributor_recent_activity(owner, repo, username)
 
             contributor_stats.append({
                 "username": username,
@@ -73,13 +225,115 @@ class GitHubContributorsService(GitHubBaseService):
 
         return contributor_stats
 
-    def _get_contributor_recent_activity(self, owner: str, repo: str, username: str) -> List[Dict[str, Any]]:
+    async def _get_contributor_recent_activity(self, owner: str, repo: str, username: str) -> List[Dict[str, Any]]:
         """Get recent activity for a contributor."""
         # TODO
         return None
 
+    async def get_contributor_weekly_stats(self, owner: str, repo: str, weeks: int = 4,
+                                           use_stats_api: bool = True) -> Dict[str, Any]:
+        """Get weekly statistics for each contributor.
 
-    def get_contributor_weekly_stats(self, owner: str, repo: str, weeks: int = 4) -> Dict[str, Any]:
-        """Get weekly statistics for each contributor."""
-        # TODO
+        Commits, PRs and reviews are collected into a columnar event table and bucketed into a
+        contributors x weeks matrix. Commit counts come from GitHub's precomputed weekly
+        ``stats/contributors`` data when it's available and covers every contributor, otherwise
+        from the commit list.
+        """
+
+        starts = week_starts(weeks)
+        since = datetime.fromtimestamp(int(starts[0]), timezone.utc)
+        since_date = since.strftime("%Y-%m-%d")
+
+        events = EventTable()
+        avatars: Dict[str, str] = {}
+
+        def add_users(users: List[Tuple[Optional[str], Optional[str]]]) -> List[Optional[str]]:
+            logins = []
+            for login, avatar_url in users:
+                if login and login not in avatars:
+                    avatars[login] = avatar_url
+                logins.append(login)
+            return logins
+
+        contributor_stats = await self._get_contributor_stats(owner, repo) if use_stats_api else None
+        # Reviews update their PR, so the PRs updated in the window have all the reviews submitted in it
+        prs = [
+            PULL_REQUEST(pr)
+            async for page in self.iter_search("issues", f"repo:{owner}/{repo}+is:pr", "updated", since_date)
+            for pr in page
+        ]
+
+        if contributor_stats is not None:
+            # Weekly commit counts are already aggregated per author, weight each week by its count
+            stats = [item for item in contributor_stats if (item.get("author") or {}).get("login")]
+            authors = add_users([(item["author"]["login"], item["author"].get("avatar_url")) for item in stats])
+            lengths = [len(item["weeks"]) for item in stats]
+            events.add(
+                "commits",
+                np.repeat(np.array(authors, dtype=object), lengths),
+                np.array([week["w"] for item in stats for week in item["weeks"]], dtype=np.int64),
+                np.array([week["c"] for item in stats for week in item["weeks"]], dtype=np.float64)
+            )
+        else:
+            commits = await self.get_paginated_results(
+                f"repos/{owner}/{repo}/commits", {"since": since.strftime("%Y-%m-%dT%H:%M:%SZ")},
+                projection=COMMITTED
+            )
+            commits = [commit for commit in commits if commit.login]
+            events.add(
+                "commits",
+                add_users([(commit.login, commit.avatar_url) for commit in commits]),
+                to_epoch_seconds([commit.date for commit in commits])
+            )
+
+        reviews_per_pr = await self.get_pull_request_reviews(owner, repo, [pr.number for pr in prs], REVIEW)
+
+        # PRs opened before the window fall outside of the weeks and aren't counted
+        prs = [pr for pr in prs if pr.login]
+        events.add(
+            "pull_requests",
+            add_users([(pr.login, pr.avatar_url) for pr in prs]),
+            to_epoch_seconds([pr.created_at for pr in prs])
+        )
+
+        reviews = [
+            review for pr_reviews in reviews_per_pr.values() for review in pr_reviews
+            if review.login and review.submitted_at
+        ]
+        events.add(
+            "reviews",
+            add_users([(review.login, review.avatar_url) for review in reviews]),
+            to_epoch_seconds([review.submitted_at for review in reviews])
+        )
+
+        return build_weekly_stats(events, starts, avatars)
+
+    async def _get_contributor_stats(self, owner: str, repo: str) -> Optional[List[Dict[str, Any]]]:
+        """Get GitHub's precomputed weekly commit counts per contributor, or None if they can't be used.
+
+        GitHub answers 202 while it computes the statistics in the background, so we poll a few times,
+        and 204 for an empty repository, which has no contributors. The statistics only cover the top
+        100 contributors, so they're incomplete for larger repos.
+        """
+
+        for attempt in range(CONTRIBUTOR_STATS_ATTEMPTS):
+            response = await self._get(f"repos/{owner}/{repo}/stats/contributors")
+            if response.status_code == 204:
+                return []
+            if response.status_code == 200:
+                stats = response.json()
+                if len(stats) >= CONTRIBUTOR_STATS_LIMIT:
+                    logger.info(
+                        f"Contributor statistics for {owner}/{repo} are capped at {CONTRIBUTOR_STATS_LIMIT} "
+                        f"contributors, falling back to the commit list"
+                    )
+                    return None
+                return stats
+
+            # Still being computed: wait before polling again, but not after the last attempt
+            if attempt + 1 < CONTRIBUTOR_STATS_ATTEMPTS:
+                logger.info(f"Contributor statistics for {owner}/{repo} are being computed, waiting")
+                await asyncio.sleep(2 ** attempt)
+
+        logger.info(f"Contributor statistics for {owner}/{repo} aren't ready, falling back to the commit list")
         return None
\ No newline at end of file
@@ -0,0 +1,26 @@
+import logging
+from typing import Any, Dict, List
+
+from app.services.github.base import GitHubBaseService
+
+logger = logging.getLogger(__name__)
+
+
+class GitHubOrganizationService(GitHubBaseService):
+    """Service for fetching GitHub organization data."""
+
+    async def get_organization_repositories(self, org: str) -> List[Dict[str, Any]]:
+        """Get the repositories of an organization, leaving out archived ones."""
+
+        repositories = await self.get_paginated_results(f"orgs/{org}/repos", {"type": "all"})
+
+        return [
+            {
+                "owner": repository["owner"]["login"],
+                "repo": repository["name"],
+                # Kilobytes, a rough measure of how long the repository takes to crawl
+                "size": repository.get("size", 0)
+            }
+            for repository in repositories
+            if not repository.get("archived")
+        ]
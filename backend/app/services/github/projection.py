@@ -0,0 +1,54 @@
+from collections import namedtuple
+from typing import Any, Callable, Dict, Iterable, List, Union
+
+# A dotted path into an API object, e.g. "commit.author.date", or a function of the object
+Field = Union[str, Callable[[Dict[str, Any]], Any]]
+
+
+def _getter(field: Field) -> Callable[[Dict[str, Any]], Any]:
+    if callable(field):
+        return field
+
+    keys = field.split(".")
+
+    def get(item: Any) -> Any:
+        for key in keys:
+            if not isinstance(item, dict):
+                return None
+            item = item.get(key)
+        return item
+
+    return get
+
+
+class Projection:
+    """Keeps only the given fields of API objects, as compact tuple records.
+
+    A page of commits decodes to several kilobytes of nested dicts per commit, while most callers
+    need a handful of values out of each one. Projecting every page as it arrives lets the decoded
+    page be freed right away::
+
+        Commit = Projection("Commit", sha="sha", login="author.login", date="commit.committer.date")
+        commits = await service.get_paginated_results(endpoint, projection=Commit)
+        commits[0].login
+
+    Missing fields, and fields under a null object (like the author of a commit whose email isn't
+    linked to a GitHub account), are projected to None.
+    """
+
+    def __init__(self, name: str, **fields: Field):
+        self.record = namedtuple(name, fields)
+        self.getters = [_getter(field) for field in fields.values()]
+
+    def __call__(self, item: Dict[str, Any]):
+        return self.record(*[get(item) for get in self.getters])
+
+    def page(self, items: Iterable[Dict[str, Any]]) -> List:
+        return [self(item) for item in items]
+
+
+def first_line(field: str) -> Callable[[Dict[str, Any]], str]:
+    """Project the first line of a text field, e.g. the title of a commit message."""
+
+    get = _getter(field)
+    return lambda item: (get(item) or "").split("\n", 1)[0]
@@ -0,0 +1,278 @@
+import os
+import math
+import time
+import random
+import asyncio
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from enum import IntEnum
+from typing import Dict, Iterator, List, Mapping, Optional, Tuple
+
+import httpx
+
+logger = logging.getLogger(__name__)
+
+# Default hourly (search: per minute) limits of an authenticated token
+DEFAULT_LIMITS = {"core": 5000, "search": 30, "graphql": 5000}
+DEFAULT_WINDOWS = {"core": 3600, "search": 60, "graphql": 3600}
+
+# Budgets are paced once less than this fraction of them is left
+PACING_THRESHOLD = 0.2
+
+# Budgets of unauthenticated requests
+ANONYMOUS = "anonymous"
+
+# Bounds of the exponential backoff used when GitHub gives no hint how long to wait
+BACKOFF_BASE = 1.0
+BACKOFF_MAX = 60.0
+
+
+class Priority(IntEnum):
+    """Priority of a GitHub request; lower values are served first."""
+
+    INTERACTIVE = 0
+    BACKGROUND = 1
+
+
+_priority: ContextVar[Priority] = ContextVar("github_request_priority", default=Priority.INTERACTIVE)
+
+# How long requests may wait for a rate limit budget; None for the scheduler's default for their priority
+_max_wait: ContextVar[Optional[float]] = ContextVar("github_request_max_wait", default=None)
+
+
+class RateLimitExceededError(Exception):
+    """Raised when a request would have to wait longer than it may for a rate limit budget."""
+
+    def __init__(self, resource: str, retry_after: float):
+        super().__init__(f"GitHub {resource} rate limit exceeded, retry in {math.ceil(retry_after)} seconds")
+        self.resource = resource
+        self.retry_after = math.ceil(retry_after)
+
+
+@contextmanager
+def request_priority(priority: Priority) -> Iterator[None]:
+    """Send every GitHub request made within the block with the given priority."""
+
+    token = _priority.set(priority)
+    try:
+        yield
+    finally:
+        _priority.reset(token)
+
+
+@contextmanager
+def max_rate_limit_wait(seconds: float) -> Iterator[None]:
+    """Let every GitHub request made within the block wait up to the given number of seconds for a budget.
+
+    Use ``math.inf`` for work that should wait for rate limits to reset rather than fail, like syncs.
+    """
+
+    token = _max_wait.set(seconds)
+    try:
+        yield
+    finally:
+        _max_wait.reset(token)
+
+
+class RateLimitBudget:
+    """What is left of one rate limit resource of a token, as last reported by GitHub."""
+
+    def __init__(self, resource: str):
+        self.resource = resource
+        self.limit = DEFAULT_LIMITS.get(resource, DEFAULT_LIMITS["core"])
+        self.window = DEFAULT_WINDOWS.get(resource, DEFAULT_WINDOWS["core"])
+        self.remaining = self.limit
+        self.reset_at = time.time() + self.window
+        self.blocked_until = 0.0
+        self.last_request_at = 0.0
+        self.waiting = {priority: 0 for priority in Priority}
+        self.condition = asyncio.Condition()
+
+    def refresh(self, now: float):
+        """Assume a fresh budget once the reset time has passed."""
+        if now >= self.reset_at:
+            self.remaining = self.limit
+            self.reset_at = now + self.window
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            "limit": self.limit,
+            "remaining": self.remaining,
+            "reset_at": self.reset_at,
+            "blocked_until": self.blocked_until,
+            "waiting": sum(self.waiting.values())
+        }
+
+
+class RateLimitScheduler:
+    """Paces all GitHub requests to stay within each token's core, search and GraphQL rate limits.
+
+    Interactive requests are always served before background ones, and a share of every budget
+    is reserved for them. When GitHub answers with a primary or secondary rate limit error, the
+    whole resource is paused for the ``Retry-After`` / reset time or a jittered backoff.
+
+    Background requests wait as long as it takes, but interactive ones, which a client is waiting
+    for, fail with RateLimitExceededError rather than wait more than ``max_interactive_wait`` seconds.
+    """
+
+    def __init__(self, reserve: Optional[float] = None, max_retries: Optional[int] = None,
+                 max_interactive_wait: Optional[float] = None):
+        self.reserve = reserve if reserve is not None else float(os.getenv("GITHUB_RATE_LIMIT_RESERVE", "0.1"))
+        self.max_retries = max_retries if max_retries is not None else int(os.getenv("GITHUB_MAX_RETRIES", "5"))
+        self.max_interactive_wait = max_interactive_wait if max_interactive_wait is not None \
+            else float(os.getenv("GITHUB_MAX_INTERACTIVE_WAIT", "5"))
+        self.budgets: Dict[Tuple[str, str], RateLimitBudget] = {}
+        self.throttled = 0
+
+    def budget(self, resource: str, token: str = ANONYMOUS) -> RateLimitBudget:
+        if (token, resource) not in self.budgets:
+            self.budgets[(token, resource)] = RateLimitBudget(resource)
+        return self.budgets[(token, resource)]
+
+    def get_resources(self, token: str = ANONYMOUS) -> List[str]:
+        """Get the resources the token has been used for."""
+        return [resource for budget_token, resource in self.budgets if budget_token == token]
+
+    def get_cooling_until(self, resource: str, token: str = ANONYMOUS, now: Optional[float] = None) -> float:
+        """Get when the token can be used for the resource again; in the past if it can be used right away."""
+
+        now = time.time() if now is None else now
+        budget = self.budget(resource, token)
+        budget.refresh(now)
+
+        cooling_until = budget.blocked_until
+        if budget.remaining <= 0:
+            cooling_until = max(cooling_until, budget.reset_at)
+        return cooling_until
+
+    @staticmethod
+    def resource_for(url: str) -> str:
+        """Work out which rate limit resource a request URL counts against."""
+
+        path = httpx.URL(url).path
+        if path.startswith("/search/"):
+            return "search"
+        if path == "/graphql":
+            return "graphql"
+        return "core"
+
+    async def acquire(self, resource: str, priority: Optional[Priority] = None, token: str = ANONYMOUS):
+        """Wait until a request against the resource can be sent with the token without exceeding its budget.
+
+        Raises RateLimitExceededError if that's further away than the request may wait.
+        """
+
+        priority = _priority.get() if priority is None else priority
+        max_wait = _max_wait.get()
+        if max_wait is None:
+            max_wait = self.max_interactive_wait if priority == Priority.INTERACTIVE else math.inf
+        deadline = time.time() + max_wait
+        budget = self.budget(resource, token)
+
+        async with budget.condition:
+            budget.waiting[priority] += 1
+            try:
+                while True:
+                    delay = self._get_delay(budget, priority)
+                    if delay <= 0:
+                        break
+                    if time.time() + delay > deadline:
+                        raise RateLimitExceededError(resource, delay)
+                    try:
+                        await asyncio.wait_for(budget.condition.wait(), timeout=delay)
+                    except asyncio.TimeoutError:
+                        pass
+
+                budget.remaining -= 1
+                budget.last_request_at = time.time()
+            finally:
+                budget.waiting[priority] -= 1
+                budget.condition.notify_all()
+
+    def _get_delay(self, budget: RateLimitBudget, priority: Priority) -> float:
+        """Get how long a request has to wait before it may be sent, or 0 to send it now."""
+
+        now = time.time()
+        budget.refresh(now)
+
+        if budget.blocked_until > now:
+            return budget.blocked_until - now
+
+        if priority > Priority.INTERACTIVE and budget.waiting[Priority.INTERACTIVE]:
+            # Let interactive requests go first, we'll be notified when they're through
+            return 1.0
+
+        reserved = budget.limit * self.reserve if priority > Priority.INTERACTIVE else 0
+        if budget.remaining <= reserved:
+            return max(budget.reset_at - now, 0.1)
+
+        if budget.remaining < budget.limit * PACING_THRESHOLD:
+            # Spread what's left evenly over the time until the reset
+            interval = max(budget.reset_at - now, 0) / budget.remaining
+            return budget.last_request_at + interval - now
+
+        return 0
+
+    def update(self, resource: str, headers: Mapping[str, str], token: str = ANONYMOUS):
+        """Update a token's budget from the X-RateLimit-* headers of a response."""
+
+        resource = headers.get("X-RateLimit-Resource", resource)
+        if "X-RateLimit-Remaining" not in headers:
+            return
+
+        budget = self.budget(resource, token)
+        budget.remaining = int(headers["X-RateLimit-Remaining"])
+        if "X-RateLimit-Limit" in headers:
+            budget.limit = int(headers["X-RateLimit-Limit"])
+        if "X-RateLimit-Reset" in headers:
+            budget.reset_at = float(headers["X-RateLimit-Reset"])
+
+    def get_retry_delay(self, response: httpx.Response, attempt: int) -> Optional[float]:
+        """Get how long to wait before retrying a rate limited response, or None if it wasn't rate limited."""
+
+        if response.status_code not in (403, 429):
+            return None
+
+        retry_after = response.headers.get("Retry-After")
+        remaining = response.headers.get("X-RateLimit-Remaining")
+
+        if response.status_code == 403 and retry_after is None and remaining != "0" \
+                and "rate limit" not in response.text.lower():
+            # A plain permission error
+            return None
+
+        if retry_after is not None:
+            return float(retry_after)
+        if remaining == "0" and "X-RateLimit-Reset" in response.headers:
+            return max(float(response.headers["X-RateLimit-Reset"]) - time.time(), 0) + 1
+
+        # Secondary rate limit without any hint: jittered exponential backoff
+        return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** attempt) * random.uniform(0.5, 1.5)
+
+    def block(self, resource: str, delay: float, token: str = ANONYMOUS):
+        """Pause every request against the resource with the token for the given number of seconds."""
+
+        self.throttled += 1
+        budget = self.budget(resource, token)
+        budget.blocked_until = max(budget.blocked_until, time.time() + delay)
+
+    def stats(self) -> Dict[str, Dict[str, Dict[str, float]]]:
+        """Get the state of every budget, by token and resource."""
+
+        stats: Dict[str, Dict[str, Dict[str, float]]] = {}
+        for (token, resource), budget in self.budgets.items():
+            stats.setdefault(token, {})[resource] = budget.stats()
+        return stats
+
+
+_default_scheduler: Optional[RateLimitScheduler] = None
+
+
+def get_rate_limiter() -> RateLimitScheduler:
+    """Get the process-wide rate limit scheduler shared by all services."""
+    global _default_scheduler
+
+    if _default_scheduler is None:
+        _default_scheduler = RateLimitScheduler()
+    return _default_scheduler
@@ -1,21 +1,78 @@
+import asyncio
 import logging
-import re
-from typing import Dict, Optional, Any
+from typing import AsyncIterator, Callable, Dict, List, Optional, Any, Tuple
 
-from app.services.github.base import GitHubBaseService
+from app.services.github.base import GRAPHQL_PR_BATCH_SIZE, GitHubBaseService
 
 logger = logging.getLogger(__name__)
 
+# Called with the number of reviews and of PRs counted since the previous call
+ReviewCallback = Callable[[int, int], None]
+
 
 class GitHubRepositoryService(GitHubBaseService):
     """Service for interacting with GitHub repository data."""
 
-    def get_repository_stats(self, owner: str, repo: str, start_date: Optional[str] = None,
-                             end_date: Optional[str] = None) -> Dict[str, Any]:
+    async def get_repository_stats(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                   end_date: Optional[str] = None) -> Dict[str, Any]:
         """Get repository statistics for a specific time period."""
 
-        # Get basic repository info
-        repo_info = self.make_request(f"repos/{owner}/{repo}")
+        return await self._collect_repository_stats(owner, repo, start_date, end_date)
+
+    async def stream_repository_stats(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                      end_date: Optional[str] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Get repository statistics for a specific time period, yielding partial counts as pages arrive.
+
+        Yields progress events, then a single result event with the same statistics as get_repository_stats.
+        Progress made while the consumer is busy is coalesced into the next event.
+        """
+
+        progress: Dict[str, int] = {}
+        changed = asyncio.Event()
+
+        def on_progress(counts: Dict[str, int]):
+            progress.update(counts)
+            changed.set()
+
+        collect = asyncio.create_task(
+            self._collect_repository_stats(owner, repo, start_date, end_date, on_progress)
+        )
+        try:
+            while not collect.done():
+                wait_changed = asyncio.create_task(changed.wait())
+                await asyncio.wait({collect, wait_changed}, return_when=asyncio.FIRST_COMPLETED)
+                wait_changed.cancel()
+
+                if changed.is_set() and not collect.done():
+                    changed.clear()
+                    yield {"type": "progress", **progress}
+
+            yield {"type": "result", "stats": collect.result()}
+        finally:
+            # The client may go away before the crawl is over
+            collect.cancel()
+
+    async def _collect_repository_stats(self, owner: str, repo: str, start_date: Optional[str] = None,
+                                        end_date: Optional[str] = None,
+                                        on_progress: Optional[Callable[[Dict[str, int]], None]] = None
+                                        ) -> Dict[str, Any]:
+        """Crawl commits, PRs with their reviews and issues concurrently, reporting running counts as they grow."""
+
+        progress = {
+            "total_commits": 0,
+            "pull_requests": 0,
+            "open_pull_requests": 0,
+            "reviewed_pull_requests": 0,
+            "code_reviews": 0,
+            "issues": 0,
+            "active_issues": 0
+        }
+
+        def report(**increments: int):
+            for field, increment in increments.items():
+                progress[field] += increment
+            if on_progress:
+                on_progress(progress)
 
         # Get commits with date filter if provided
         commits_query = f"repos/{owner}/{repo}/commits"
@@ -26,67 +83,169 @@ class GitHubRepositoryService(GitHubBaseService):
         if end_date:
             commits_params["until"] = f"{end_date}T23:59:59Z"
 
-        commits = self.get_paginated_results(commits_query, commits_params)
-        total_commits = len(commits)
+        async def count_commits():
+            async for _, commits in self.iter_pages(commits_query, commits_params):
+                report(total_commits=len(commits))
+
+        async def count_pull_requests():
+            # Get all PRs created during the specified period, past the 1000 results of a single search
+            pr_numbers = []
+            async for prs in self.iter_search("issues", f"repo:{owner}/{repo}+is:pr", "created", start_date, end_date):
+                pr_numbers.extend(pr["number"] for pr in prs)
+                report(pull_requests=len(prs))
+
+            await self._count_reviews(
+                owner, repo, pr_numbers, start_date, end_date,
+                on_reviews=lambda reviews, prs: report(code_reviews=reviews, reviewed_pull_requests=prs)
+            )
+
+        async def count_open_pull_requests():
+            # Count PRs that are still open
+            report(open_pull_requests=await self.count_search_results(
+                "issues", f"repo:{owner}/{repo}+is:pr+is:open", "created", start_date, end_date
+            ))
+
+        async def count_issues():
+            # Only the issue counts are needed, which the searches' totals give without listing them
+            issues, active_issues = await asyncio.gather(
+                self.count_search_results("issues", f"repo:{owner}/{repo}+is:issue", "created", start_date, end_date),
+                self.count_search_results(
+                    "issues", f"repo:{owner}/{repo}+is:issue+is:open", "created", start_date, end_date
+                )
+            )
+            report(issues=issues, active_issues=active_issues)
 
-        # Handle date ranges properly for search queries
-        date_filter = ""
-        if start_date:
-            date_filter += f"+created:>={start_date}"
-        if end_date:
-            date_filter += f"+created:<={end_date}"
-
-        # Get all PRs created during the specified period
-        prs_in_period_query = f"search/issues?q=repo:{owner}/{repo}+is:pr{date_filter}"
-        prs_in_period = self.get_paginated_results(prs_in_period_query)
-
-        # Count PRs that are still open
-        open_prs_count = sum(1 for pr in prs_in_period if pr.get("state") == "open")
-
-        # Extract PR numbers
-        pr_numbers = []
-        for item in prs_in_period:
-            pr_url = item.get("pull_request", {}).get("url", "")
-            match = re.search(r'/pulls/(\d+)$', pr_url)
-            if match:
-                pr_numbers.append(match.group(1))
-
-        # Get reviews for each PR
-        total_reviews = 0
-        for pr_number in pr_numbers:
-            reviews_endpoint = f"repos/{owner}/{repo}/pulls/{pr_number}/reviews"
-            reviews = self.get_paginated_results(reviews_endpoint)
-
-            # Filter reviews by date if needed
-            if start_date or end_date:
-                for review in reviews:
-                    submitted_at = review.get("submitted_at", "")
-                    if submitted_at:
-                        review_date = submitted_at.split("T")[0]  # Extract YYYY-MM-DD part
-
-                        # Only count if review is within the specified date range
-                        if (not start_date or review_date >= start_date) and \
-                                (not end_date or review_date <= end_date):
-                            total_reviews += 1
-            else:
-                total_reviews += len(reviews)
-
-        # Get all issues created during the specified period
-        issues_in_period_query = f"search/issues?q=repo:{owner}/{repo}+is:issue{date_filter}"
-        issues_in_period = self.get_paginated_results(issues_in_period_query)
-
-        # Count issues that are still open
-        active_issues_count = sum(1 for issue in issues_in_period if issue.get("state") == "open")
+        # Get basic repository info
+        tasks = [
+            asyncio.create_task(crawl)
+            for crawl in (self.make_request(f"repos/{owner}/{repo}"), count_commits(), count_pull_requests(),
+                          count_open_pull_requests(), count_issues())
+        ]
+        try:
+            repo_info, *_ = await asyncio.gather(*tasks)
+        finally:
+            # Don't keep crawling once one of them failed
+            for task in tasks:
+                task.cancel()
 
         return {
             "repository_name": repo_info["name"],
             "owner": repo_info["owner"]["login"],
-            "total_commits": total_commits,
-            "open_pull_requests": open_prs_count,
-            "code_reviews": total_reviews,
-            "active_issues": active_issues_count,
+            "total_commits": progress["total_commits"],
+            "open_pull_requests": progress["open_pull_requests"],
+            "code_reviews": progress["code_reviews"],
+            "active_issues": progress["active_issues"],
             "period": {
                 "start_date": start_date,
                 "end_date": end_date
             }
-        }
\ No newline at end of file
+        }
+
+    async def _count_reviews(self, owner: str, repo: str, pr_numbers: List[int], start_date: Optional[str] = None,
+                             end_date: Optional[str] = None, on_reviews: Optional[ReviewCallback] = None) -> int:
+        """Count the reviews submitted on the given PRs, preferring batched GraphQL queries over REST.
+
+        on_reviews is called with the number of reviews and of PRs counted each time a part of the PRs is done.
+        """
+
+        if not self.token_pool.authenticated:
+            # The GraphQL API can't be used anonymously
+            return await self._count_reviews_rest(owner, repo, pr_numbers, start_date, end_date, on_reviews)
+
+        counted = [0, 0]
+
+        def track(reviews: int, prs: int):
+            counted[0] += reviews
+            counted[1] += prs
+            if on_reviews:
+                on_reviews(reviews, prs)
+
+        try:
+            return await self._count_reviews_graphql(owner, repo, pr_numbers, start_date, end_date, track)
+        except Exception as e:
+            logger.warning(f"GraphQL review count failed for {owner}/{repo}, falling back to REST: {str(e)}")
+            if on_reviews:
+                # REST counts every PR again
+                on_reviews(-counted[0], -counted[1])
+            return await self._count_reviews_rest(owner, repo, pr_numbers, start_date, end_date, on_reviews)
+
+    async def _count_reviews_graphql(self, owner: str, repo: str, pr_numbers: List[int],
+                                     start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                     on_reviews: Optional[ReviewCallback] = None) -> int:
+        """Count reviews with one GraphQL query per batch of up to 100 PRs."""
+
+        filter_dates = bool(start_date or end_date)
+        batches = [
+            pr_numbers[i:i + GRAPHQL_PR_BATCH_SIZE]
+            for i in range(0, len(pr_numbers), GRAPHQL_PR_BATCH_SIZE)
+        ]
+
+        async def count_batch(batch: List[int]) -> Tuple[int, List[int]]:
+            # Review timestamps are only needed when filtering by date
+            review_fields = "totalCount nodes { submittedAt }" if filter_dates else "totalCount"
+            batch_reviews = await self.query_pull_request_reviews(owner, repo, batch, review_fields)
+
+            count = 0
+            leftovers = []
+            for number in batch:
+                reviews = batch_reviews[number]
+                if reviews is None:
+                    leftovers.append(number)
+                elif not filter_dates:
+                    count += reviews["totalCount"]
+                elif reviews["totalCount"] > len(reviews["nodes"]):
+                    # More reviews than fit in one query, let REST page through them
+                    leftovers.append(number)
+                else:
+                    count += sum(
+                        1 for review in reviews["nodes"]
+                        if self._review_in_period(review.get("submittedAt"), start_date, end_date)
+                    )
+
+            if on_reviews:
+                on_reviews(count, len(batch) - len(leftovers))
+            return count, leftovers
+
+        results = await asyncio.gather(*(count_batch(batch) for batch in batches))
+
+        total_reviews = sum(count for count, _ in results)
+        leftovers = [number for _, batch_leftovers in results for number in batch_leftovers]
+        if leftovers:
+            total_reviews += await self._count_reviews_rest(owner, repo, leftovers, start_date, end_date, on_reviews)
+
+        return total_reviews
+
+    async def _count_reviews_rest(self, owner: str, repo: str, pr_numbers: List[int],
+                                  start_date: Optional[str] = None, end_date: Optional[str] = None,
+                                  on_reviews: Optional[ReviewCallback] = None) -> int:
+        """Count reviews by listing each PR's reviews over REST."""
+
+        async def count_pr_reviews(pr_number: int) -> int:
+            def add_page(count: int, reviews: List[Dict]) -> int:
+                # Filter reviews by date if needed
+                if start_date or end_date:
+                    return count + sum(
+                        1 for review in reviews
+                        if self._review_in_period(review.get("submitted_at"), start_date, end_date)
+                    )
+                return count + len(reviews)
+
+            count = await self.fold_pages(f"repos/{owner}/{repo}/pulls/{pr_number}/reviews", add_page, 0)
+
+            if on_reviews:
+                on_reviews(count, 1)
+            return count
+
+        # Get reviews for each PR, fetched concurrently over the shared connection pool
+        return sum(await asyncio.gather(*(count_pr_reviews(pr_number) for pr_number in pr_numbers)))
+
+    @staticmethod
+    def _review_in_period(submitted_at: Optional[str], start_date: Optional[str] = None,
+                          end_date: Optional[str] = None) -> bool:
+        """Check whether a review's submission timestamp falls within the date range."""
+
+        if not submitted_at:
+            return False
+
+        review_date = submitted_at.split("T")[0]  # Extract YYYY-MM-DD part
+        return (not start_date or review_date >= start_date) and (not end_date or review_date <= end_date)
@@ -0,0 +1,164 @@
+import asyncio
+import logging
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional
+
+from app.db.store import RepositoryStore, format_timestamp, get_store, parse_timestamp
+from app.services.github.base import GitHubBaseService
+from app.services.github.projection import Projection
+
+logger = logging.getLogger(__name__)
+
+# Deltas re-read this much history before the last sync, to pick up commits
+# that were pushed late with an older commit date. Upserts make the overlap harmless.
+SYNC_OVERLAP = timedelta(days=1)
+
+REVIEW = Projection("Review", id="id", user="user", state="state", submitted_at="submitted_at")
+
+
+class ActivityRows:
+    """Store rows built from GitHub API objects, as returned by the REST API or sent in webhook payloads."""
+
+    def __init__(self):
+        self.users: Dict[str, Dict[str, Any]] = {}
+        self.commits: List[Dict[str, Any]] = []
+        self.pull_requests: List[Dict[str, Any]] = []
+        self.reviews: List[Dict[str, Any]] = []
+        self.issues: List[Dict[str, Any]] = []
+
+    def author_of(self, user: Optional[Dict[str, Any]]) -> Optional[str]:
+        """Get a user's login, recording the user if their avatar is known."""
+
+        login = (user or {}).get("login")
+        if login and user.get("avatar_url"):
+            self.users[login] = {"login": login, "avatar_url": user.get("avatar_url")}
+        return login
+
+    def add_commit(self, sha: str, user: Optional[Dict[str, Any]], committed_at: str, message: Optional[str]):
+        self.commits.append({
+            "sha": sha,
+            "author": self.author_of(user),
+            "committed_at": parse_timestamp(committed_at),
+            "message": message
+        })
+
+    def add_pull_request(self, pr: Dict[str, Any]):
+        # The issues endpoint nests merged_at, the pulls endpoint and webhooks don't
+        merged_at = pr["pull_request"].get("merged_at") if "pull_request" in pr else pr.get("merged_at")
+
+        self.pull_requests.append({
+            "number": pr["number"],
+            "author": self.author_of(pr.get("user")),
+            "title": pr.get("title"),
+            "state": pr["state"],
+            "created_at": parse_timestamp(pr["created_at"]),
+            "updated_at": parse_timestamp(pr.get("updated_at")),
+            "closed_at": parse_timestamp(pr.get("closed_at")),
+            "merged_at": parse_timestamp(merged_at)
+        })
+
+    def add_review(self, pr_number: int, review: Dict[str, Any]):
+        self.reviews.append({
+            "id": review["id"],
+            "pr_number": pr_number,
+            "author": self.author_of(review.get("user")),
+            # Webhooks send lowercase states
+            "state": (review.get("state") or "").upper() or None,
+            "submitted_at": parse_timestamp(review.get("submitted_at"))
+        })
+
+    def add_issue(self, issue: Dict[str, Any]):
+        self.issues.append({
+            "number": issue["number"],
+            "author": self.author_of(issue.get("user")),
+            "title": issue.get("title"),
+            "state": issue["state"],
+            "created_at": parse_timestamp(issue["created_at"]),
+            "updated_at": parse_timestamp(issue.get("updated_at")),
+            "closed_at": parse_timestamp(issue.get("closed_at"))
+        })
+
+    def counts(self) -> Dict[str, int]:
+        return {
+            "commits": len(self.commits),
+            "pull_requests": len(self.pull_requests),
+            "reviews": len(self.reviews),
+            "issues": len(self.issues)
+        }
+
+
+class GitHubSyncService(GitHubBaseService):
+    """Service that copies repository activity from GitHub into the local store."""
+
+    def __init__(self, store: Optional[RepositoryStore] = None, **kwargs):
+        super().__init__(**kwargs)
+        self.store = store or get_store()
+
+    async def sync_repository(self, owner: str, repo: str) -> Dict[str, Any]:
+        """Backfill a repository on its first sync, then fetch only what changed since the last one."""
+
+        synced_at = datetime.utcnow()
+        repository = await asyncio.to_thread(self.store.get_repository, owner, repo)
+
+        since = None
+        if repository is not None and repository.last_synced_at is not None:
+            since = repository.last_synced_at - SYNC_OVERLAP
+
+        params = {"since": format_timestamp(since)} if since else {}
+
+        # Pages are turned into store rows as they arrive rather than kept whole until the end
+        rows = ActivityRows()
+        pr_numbers: List[int] = []
+
+        def add_commits(rows: ActivityRows, commits: List[Dict[str, Any]]) -> ActivityRows:
+            for commit in commits:
+                rows.add_commit(
+                    sha=commit["sha"],
+                    user=commit.get("author"),
+                    committed_at=commit["commit"]["committer"]["date"],
+                    message=commit["commit"].get("message")
+                )
+            return rows
+
+        def add_issues_and_prs(rows: ActivityRows, items: List[Dict[str, Any]]) -> ActivityRows:
+            for item in items:
+                if "pull_request" in item:
+                    rows.add_pull_request(item)
+                    pr_numbers.append(item["number"])
+                else:
+                    rows.add_issue(item)
+            return rows
+
+        # The issues endpoint lists PRs as well and, unlike the pulls endpoint, supports `since`
+        repo_info, *_ = await asyncio.gather(
+            self.make_request(f"repos/{owner}/{repo}"),
+            self.fold_pages(f"repos/{owner}/{repo}/commits", add_commits, rows, dict(params)),
+            self.fold_pages(f"repos/{owner}/{repo}/issues", add_issues_and_prs, rows, {"state": "all", **params})
+        )
+
+        # A new review bumps the PR's updated_at, so only updated PRs need their reviews fetched
+        reviews_per_pr = await self.get_pull_request_reviews(owner, repo, pr_numbers, REVIEW)
+        for number, reviews in reviews_per_pr.items():
+            for review in reviews:
+                rows.add_review(number, review._asdict())
+
+        await asyncio.to_thread(
+            self.store.save_sync,
+            repo_info["owner"]["login"],
+            repo_info["name"],
+            synced_at,
+            list(rows.users.values()),
+            rows.commits,
+            rows.pull_requests,
+            rows.reviews,
+            rows.issues
+        )
+
+        return {
+            "owner": repo_info["owner"]["login"],
+            "repository_name": repo_info["name"],
+            "mode": "delta" if since else "backfill",
+            "since": format_timestamp(since),
+            "synced_at": format_timestamp(synced_at),
+            **rows.counts()
+        }
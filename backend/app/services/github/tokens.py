@@ -0,0 +1,182 @@
+import os
+import time
+import asyncio
+import logging
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from app.services.github.client import GitHubClient
+from app.services.github.ratelimit import RateLimitScheduler
+
+logger = logging.getLogger(__name__)
+
+# Installation tokens are renewed this many seconds before they expire
+INSTALLATION_TOKEN_MARGIN = 300
+
+
+class GitHubToken:
+    """A credential used to authenticate GitHub requests."""
+
+    kind = "anonymous"
+
+    def __init__(self, id: str):
+        self.id = id
+
+    async def get_value(self, client: GitHubClient) -> Optional[str]:
+        """Get the token value to send, or None for unauthenticated requests."""
+        return None
+
+
+class PersonalAccessToken(GitHubToken):
+    """A personal access token."""
+
+    kind = "pat"
+
+    def __init__(self, value: str, index: int = 0):
+        # Never expose more than the last characters of a token
+        super().__init__(f"pat-{index}…{value[-4:]}")
+        self.value = value
+
+    async def get_value(self, client: GitHubClient) -> Optional[str]:
+        return self.value
+
+
+class AppInstallationToken(GitHubToken):
+    """A GitHub App installation token, renewed automatically before it expires."""
+
+    kind = "app"
+
+    def __init__(self, app_id: str, private_key: str, installation_id: str, base_url: str = "https://api.github.com"):
+        super().__init__(f"app-{app_id}/installation-{installation_id}")
+        self.app_id = app_id
+        self.private_key = private_key
+        self.installation_id = installation_id
+        self.base_url = base_url
+
+        self._value: Optional[str] = None
+        self._expires_at = 0.0
+        self._lock = asyncio.Lock()
+
+    def _create_app_jwt(self) -> str:
+        import jwt
+
+        now = int(time.time())
+        # Backdate the token a little to allow for clock drift
+        payload = {"iat": now - 60, "exp": now + 540, "iss": self.app_id}
+        return jwt.encode(payload, self.private_key, algorithm="RS256")
+
+    async def get_value(self, client: GitHubClient) -> Optional[str]:
+        async with self._lock:
+            if self._value is None or time.time() >= self._expires_at - INSTALLATION_TOKEN_MARGIN:
+                response = await client.post(
+                    f"{self.base_url}/app/installations/{self.installation_id}/access_tokens",
+                    headers={
+                        "Accept": "application/vnd.github.v3+json",
+                        "Authorization": f"Bearer {self._create_app_jwt()}"
+                    }
+                )
+                response.raise_for_status()
+
+                data = response.json()
+                self._value = data["token"]
+                self._expires_at = datetime.fromisoformat(data["expires_at"].replace("Z", "+00:00")).timestamp()
+                logger.info(f"Renewed GitHub App installation token {self.id}")
+
+            return self._value
+
+
+ANONYMOUS_TOKEN = GitHubToken("anonymous")
+
+
+class TokenPool:
+    """Balances GitHub requests across several tokens.
+
+    Each request goes to the token with the most quota left for its rate limit resource. Tokens
+    that are exhausted or were throttled cool down until GitHub allows them again.
+    """
+
+    def __init__(self, tokens: List[GitHubToken]):
+        self.tokens = tokens
+        self.usage: Dict[str, Dict[str, int]] = defaultdict(lambda: defaultdict(int))
+
+    @property
+    def authenticated(self) -> bool:
+        return bool(self.tokens)
+
+    def select(self, resource: str, rate_limiter: RateLimitScheduler) -> GitHubToken:
+        """Pick the token with the most remaining quota for the resource."""
+
+        if not self.tokens:
+            return ANONYMOUS_TOKEN
+
+        now = time.time()
+
+        def availability(token: GitHubToken):
+            cooling_until = rate_limiter.get_cooling_until(resource, token.id, now)
+            # Tokens that can be used right away come first, then the ones that recover soonest
+            return cooling_until > now, cooling_until, -rate_limiter.budget(resource, token.id).remaining
+
+        return min(self.tokens, key=availability)
+
+    def record(self, token: GitHubToken, resource: str):
+        """Count a request sent with the token."""
+        self.usage[token.id][resource] += 1
+
+    def stats(self, rate_limiter: RateLimitScheduler) -> List[Dict[str, Any]]:
+        """Get the usage and remaining quota of every token."""
+
+        now = time.time()
+        return [
+            {
+                "id": token.id,
+                "kind": token.kind,
+                "requests": dict(self.usage[token.id]),
+                "cooling_down": [
+                    resource for resource in rate_limiter.get_resources(token.id)
+                    if rate_limiter.get_cooling_until(resource, token.id, now) > now
+                ],
+                "budgets": rate_limiter.stats().get(token.id, {})
+            }
+            for token in (self.tokens or [ANONYMOUS_TOKEN])
+        ]
+
+
+def load_tokens_from_env() -> List[GitHubToken]:
+    """Build the tokens configured through the environment."""
+
+    tokens: List[GitHubToken] = []
+
+    values = [os.getenv("GITHUB_TOKEN", "")] + os.getenv("GITHUB_TOKENS", "").split(",")
+    for value in dict.fromkeys(value.strip() for value in values):
+        if value:
+            tokens.append(PersonalAccessToken(value, index=len(tokens)))
+
+    app_id = os.getenv("GITHUB_APP_ID")
+    if app_id:
+        private_key = os.getenv("GITHUB_APP_PRIVATE_KEY")
+        if not private_key and os.getenv("GITHUB_APP_PRIVATE_KEY_PATH"):
+            with open(os.getenv("GITHUB_APP_PRIVATE_KEY_PATH")) as key_file:
+                private_key = key_file.read()
+
+        for installation_id in os.getenv("GITHUB_APP_INSTALLATION_IDS", "").split(","):
+            if installation_id.strip():
+                tokens.append(AppInstallationToken(
+                    app_id, private_key, installation_id.strip(),
+                    base_url=os.getenv("GITHUB_API_URL", "https://api.github.com").rstrip("/")
+                ))
+
+    return tokens
+
+
+_default_pool: Optional[TokenPool] = None
+
+
+def get_token_pool() -> TokenPool:
+    """Get the process-wide token pool shared by all services."""
+    global _default_pool
+
+    if _default_pool is None:
+        _default_pool = TokenPool(load_tokens_from_env())
+        logger.info(f"Using {len(_default_pool.tokens)} GitHub token(s)")
+    return _default_pool
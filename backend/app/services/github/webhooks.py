@@ -0,0 +1,71 @@
+import hmac
+import hashlib
+import logging
+from typing import Any, Dict, Optional
+
+from app.services.github.sync import ActivityRows
+
+logger = logging.getLogger(__name__)
+
+# Webhook events turned into stored activity
+SUPPORTED_EVENTS = ("push", "pull_request", "pull_request_review", "issues")
+
+
+def verify_signature(secret: str, body: bytes, signature: Optional[str]) -> bool:
+    """Check a delivery's X-Hub-Signature-256 header against the HMAC of its body."""
+
+    if not signature or not signature.startswith("sha256="):
+        return False
+
+    expected = hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+    return hmac.compare_digest(expected, signature[len("sha256="):])
+
+
+def parse_delivery(event: str, payload: Dict[str, Any]) -> Optional[ActivityRows]:
+    """Build the store rows carried by a webhook delivery, or None if it doesn't change stored activity."""
+
+    rows = ActivityRows()
+    action = payload.get("action")
+
+    if event == "push":
+        repository = payload["repository"]
+        # Only the default branch is counted, like the commits the sync fetches
+        if payload.get("ref") != f"refs/heads/{repository.get('default_branch')}":
+            return None
+
+        # Commits that aren't distinct were pushed to another branch first, like the commits of a
+        # merged PR, and are new to the default branch all the same; the store dedupes them by SHA
+        for commit in payload.get("commits", []):
+            # Push payloads only carry the commit author's login, not a full user
+            username = (commit.get("author") or {}).get("username")
+            rows.add_commit(
+                sha=commit["id"],
+                user={"login": username} if username else None,
+                committed_at=commit["timestamp"],
+                message=commit.get("message")
+            )
+
+    elif event == "pull_request":
+        rows.add_pull_request(payload["pull_request"])
+
+    elif event == "pull_request_review":
+        if action not in ("submitted", "edited", "dismissed"):
+            return None
+
+        rows.add_pull_request(payload["pull_request"])
+        rows.add_review(payload["pull_request"]["number"], payload["review"])
+
+    elif event == "issues":
+        # Deleted and transferred issues are left for the next sync
+        if action in ("deleted", "transferred"):
+            return None
+
+        rows.add_issue(payload["issue"])
+
+    else:
+        return None
+
+    # The sender's avatar is known even when the activity only names them
+    rows.author_of(payload.get("sender"))
+
+    return rows
@@ -0,0 +1,351 @@
+import re
+import time
+import uuid
+import bisect
+import logging
+from collections import OrderedDict
+from contextvars import ContextVar
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+from urllib.parse import urlsplit
+
+from starlette.datastructures import MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+logger = logging.getLogger(__name__)
+
+# Upper bounds (seconds) of the latency histogram buckets
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+# Upper bounds of the pages-per-call histogram buckets
+PAGE_BUCKETS = (1, 2, 5, 10, 20, 50, 100, 200, 500)
+
+# Number of finished request traces kept for retrieval
+TRACE_BUFFER_SIZE = 100
+
+LabelValues = Tuple[str, ...]
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str]) -> str:
+    if not names:
+        return ""
+    return "{" + ",".join(f'{name}="{_escape(str(value))}"' for name, value in zip(names, values)) + "}"
+
+
+def _format_value(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+class Metric:
+    """A named metric with one sample per combination of label values."""
+
+    kind = "untyped"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        self.name = name
+        self.description = description
+        self.labels = tuple(labels)
+
+    def _key(self, labels: Dict[str, Any]) -> LabelValues:
+        return tuple(str(labels.get(name, "")) for name in self.labels)
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        """Yield (name suffix, formatted labels, value) for every sample."""
+        raise NotImplementedError
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.description}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(f"{self.name}{suffix}{labels} {_format_value(value)}" for suffix, labels, value in self.samples())
+        return lines
+
+
+class Counter(Metric):
+    """A monotonically increasing count."""
+
+    kind = "counter"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def inc(self, amount: float = 1, **labels):
+        key = self._key(labels)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def set_total(self, value: float, **labels):
+        """Set the count from a counter kept elsewhere."""
+        self.values[self._key(labels)] = value
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for key, value in self.values.items():
+            yield "", _format_labels(self.labels, key), value
+
+
+class Gauge(Metric):
+    """A value that goes up and down, usually set from the state of a component when scraped."""
+
+    kind = "gauge"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = ()):
+        super().__init__(name, description, labels)
+        self.values: Dict[LabelValues, float] = {}
+
+    def set(self, value: float, **labels):
+        self.values[self._key(labels)] = value
+
+    def clear(self):
+        """Drop every sample, so that label values which went away aren't reported anymore."""
+        self.values.clear()
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        for key, value in self.values.items():
+            yield "", _format_labels(self.labels, key), value
+
+
+class Histogram(Metric):
+    """Counts of observed values in cumulative buckets, with their sum."""
+
+    kind = "histogram"
+
+    def __init__(self, name: str, description: str, labels: Sequence[str] = (),
+                 buckets: Sequence[float] = LATENCY_BUCKETS):
+        super().__init__(name, description, labels)
+        self.buckets = tuple(sorted(buckets))
+        # Per label values: count of each bucket (the last one being +Inf), and the sum
+        self.counts: Dict[LabelValues, List[int]] = {}
+        self.sums: Dict[LabelValues, float] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        counts = self.counts.get(key)
+        if counts is None:
+            counts = self.counts[key] = [0] * (len(self.buckets) + 1)
+            self.sums[key] = 0.0
+
+        counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sums[key] += value
+
+    def samples(self) -> Iterable[Tuple[str, str, float]]:
+        bucket_labels = self.labels + ("le",)
+        for key, counts in self.counts.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                yield "_bucket", _format_labels(bucket_labels, key + (_format_value(bound),)), cumulative
+            yield "_sum", _format_labels(self.labels, key), self.sums[key]
+            yield "_count", _format_labels(self.labels, key), cumulative
+
+
+class MetricsRegistry:
+    """The metrics of the process, rendered in the Prometheus text exposition format."""
+
+    def __init__(self):
+        self.metrics: Dict[str, Metric] = {}
+
+    def _get_or_create(self, cls, name: str, *args, **kwargs):
+        if name not in self.metrics:
+            self.metrics[name] = cls(name, *args, **kwargs)
+        return self.metrics[name]
+
+    def counter(self, name: str, description: str, labels: Sequence[str] = ()) -> Counter:
+        return self._get_or_create(Counter, name, description, labels)
+
+    def gauge(self, name: str, description: str, labels: Sequence[str] = ()) -> Gauge:
+        return self._get_or_create(Gauge, name, description, labels)
+
+    def histogram(self, name: str, description: str, labels: Sequence[str] = (),
+                  buckets: Sequence[float] = LATENCY_BUCKETS) -> Histogram:
+        return self._get_or_create(Histogram, name, description, labels, buckets)
+
+    def render(self) -> str:
+        lines = []
+        for metric in self.metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+_default_registry: Optional[MetricsRegistry] = None
+
+
+def get_metrics() -> MetricsRegistry:
+    """Get the process-wide metrics registry."""
+    global _default_registry
+
+    if _default_registry is None:
+        _default_registry = MetricsRegistry()
+    return _default_registry
+
+
+# Path segments following these ones are names rather than parts of the endpoint
+_NAMED_SEGMENTS = {"repos": ("{owner}", "{repo}"), "orgs": ("{org}",), "users": ("{user}",)}
+_VARIABLE_SEGMENT = re.compile(r"^(\d+|[0-9a-f]{40})$")
+
+
+def endpoint_template(path: str) -> str:
+    """Reduce a GitHub API path to its endpoint, e.g. ``repos/{owner}/{repo}/pulls/{number}/reviews``."""
+
+    segments = [segment for segment in path.split("/") if segment]
+    template = []
+    i = 0
+    while i < len(segments):
+        segment = segments[i]
+        if _VARIABLE_SEGMENT.match(segment):
+            template.append("{sha}" if len(segment) == 40 else "{number}")
+            i += 1
+            continue
+
+        template.append(segment)
+        names = _NAMED_SEGMENTS.get(segment) if i == 0 else None
+        if names:
+            template.extend(names[:len(segments) - i - 1])
+            i += len(names)
+        elif segment in ("commits", "git") and i + 1 < len(segments):
+            # Commits are addressed by SHA or ref, which aren't always 40 hex digits
+            template.append("{ref}")
+            i += 1
+        i += 1
+
+    return "/".join(template)
+
+
+class Trace:
+    """The GitHub calls made while serving one request."""
+
+    __slots__ = ("id", "method", "path", "started_at", "duration", "status", "spans")
+
+    def __init__(self, method: str, path: str):
+        self.id = uuid.uuid4().hex
+        self.method = method
+        self.path = path
+        self.started_at = time.time()
+        self.duration: Optional[float] = None
+        self.status: Optional[int] = None
+        self.spans: List[Dict[str, Any]] = []
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "method": self.method,
+            "path": self.path,
+            "started_at": self.started_at,
+            "duration": self.duration,
+            "status": self.status,
+            "github_calls": len(self.spans),
+            "github_time": sum(span["duration"] for span in self.spans),
+            "spans": sorted(self.spans, key=lambda span: span["start"])
+        }
+
+
+_current_trace: ContextVar[Optional[Trace]] = ContextVar("current_trace", default=None)
+
+_traces: "OrderedDict[str, Trace]" = OrderedDict()
+
+
+def get_trace(trace_id: str) -> Optional[Dict[str, Any]]:
+    """Get one of the recent request traces, or None if it doesn't exist (anymore)."""
+
+    trace = _traces.get(trace_id)
+    return trace.to_dict() if trace is not None else None
+
+
+def record_github_call(method: str, url: str, status: int, duration: float, size: int, started_at: float):
+    """Record a GitHub API call in the metrics, and in the trace of the request that made it if any."""
+
+    endpoint = endpoint_template(urlsplit(url).path)
+    metrics = get_metrics()
+
+    metrics.counter(
+        "github_requests_total", "GitHub API calls", ("method", "endpoint", "status")
+    ).inc(method=method, endpoint=endpoint, status=status)
+    metrics.histogram(
+        "github_request_duration_seconds", "Latency of GitHub API calls", ("method", "endpoint")
+    ).observe(duration, method=method, endpoint=endpoint)
+    metrics.counter(
+        "github_response_bytes_total", "Bytes received from GitHub API calls", ("method", "endpoint")
+    ).inc(size, method=method, endpoint=endpoint)
+
+    # Tasks spawned while serving the request inherit its trace
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.spans.append({
+            "method": method,
+            "endpoint": endpoint,
+            "url": url,
+            "status": status,
+            "start": round(started_at - trace.started_at, 6),
+            "duration": round(duration, 6),
+            "bytes": size
+        })
+
+
+def record_pages(endpoint: str, pages: int):
+    """Record how many pages one paginated fetch needed."""
+
+    get_metrics().histogram(
+        "github_pages_per_call", "Pages fetched per paginated GitHub call", ("endpoint",), PAGE_BUCKETS
+    ).observe(pages, endpoint=endpoint_template(endpoint))
+
+
+class MetricsMiddleware:
+    """Records the latency of every request per route, and traces the requests asking for it.
+
+    A request sent with an ``X-Trace: 1`` header gets an ``X-Trace-Id`` response header naming the
+    trace of the GitHub calls it made, which ``GET /api/traces/{trace_id}`` returns.
+    """
+
+    def __init__(self, app: ASGIApp):
+        self.app = app
+        self.latency = get_metrics().histogram(
+            "http_request_duration_seconds", "Latency of API requests", ("method", "route", "status")
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        trace = None
+        token = None
+        for name, value in scope["headers"]:
+            if name == b"x-trace" and value.strip() in (b"1", b"true"):
+                trace = Trace(scope["method"], scope["path"])
+                token = _current_trace.set(trace)
+                _traces[trace.id] = trace
+                while len(_traces) > TRACE_BUFFER_SIZE:
+                    _traces.popitem(last=False)
+                break
+
+        status = 500
+
+        async def send_wrapper(message: Message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                if trace is not None:
+                    MutableHeaders(scope=message).append("X-Trace-Id", trace.id)
+            await send(message)
+
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            duration = time.perf_counter() - start
+
+            # The template rather than the path, so that every repository shares the same series
+            route = scope.get("route")
+            self.latency.observe(
+                duration,
+                method=scope["method"],
+                route=route.path if route is not None else "unmatched",
+                status=status
+            )
+
+            if trace is not None:
+                trace.duration = duration
+                trace.status = status
+                _current_trace.reset(token)
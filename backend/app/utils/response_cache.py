@@ -0,0 +1,202 @@
+import os
+import json
+import time
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from dataclasses import dataclass
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional, Set, Tuple
+
+from fastapi import Request, Response
+from fastapi.responses import JSONResponse
+
+logger = logging.getLogger(__name__)
+
+
+@dataclass
+class CacheResult:
+    """A cached endpoint result together with the data needed for HTTP caching headers."""
+
+    value: Any
+    etag: str
+    created_at: float
+    state: str  # "fresh", "stale" or "miss"
+
+
+class ResponseCache:
+    """Bounded endpoint result cache with stale-while-revalidate semantics.
+
+    Entries younger than ``ttl`` are served as they are. Entries that are older, but still within
+    ``stale_ttl`` past it, are served immediately while a background task recomputes them.
+    Invalidating a key bumps its generation, so computations that started before are not stored.
+    """
+
+    def __init__(self, name: str, ttl: float, stale_ttl: float, max_entries: int):
+        self.name = name
+        self.ttl = ttl
+        self.stale_ttl = stale_ttl
+        self.max_entries = max_entries
+
+        self._entries: "OrderedDict[Hashable, CacheResult]" = OrderedDict()
+        self._refreshing: Set[Hashable] = set()
+        # Generations are only kept for the keys being computed, which are counted in _computing
+        self._computing: Dict[Hashable, int] = {}
+        self._generations: Dict[Hashable, int] = {}
+        self._tasks: Set[asyncio.Task] = set()
+
+        self.hits = 0
+        self.stale_hits = 0
+        self.misses = 0
+        self.refreshes = 0
+        self.evictions = 0
+
+    async def get_or_compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> CacheResult:
+        """Get the cached result for the key, computing it if missing and refreshing it if stale."""
+
+        entry = self._entries.get(key)
+        age = time.time() - entry.created_at if entry is not None else None
+
+        if entry is not None and age < self.ttl:
+            self.hits += 1
+            self._entries.move_to_end(key)
+            return entry
+
+        if entry is not None and age < self.ttl + self.stale_ttl:
+            self.stale_hits += 1
+            self._entries.move_to_end(key)
+            if key not in self._refreshing:
+                self._refreshing.add(key)
+                task = asyncio.create_task(self._refresh(key, compute))
+                self._tasks.add(task)
+                task.add_done_callback(self._tasks.discard)
+            return CacheResult(entry.value, entry.etag, entry.created_at, "stale")
+
+        self.misses += 1
+        value, current = await self._compute(key, compute)
+        if not current:
+            # Invalidated while computing: answer this request, but don't cache data that may predate it
+            return self._result(value, "miss")
+        return self._store(key, value, "miss")
+
+    async def _refresh(self, key: Hashable, compute: Callable[[], Awaitable[Any]]):
+        try:
+            value, current = await self._compute(key, compute)
+            if current:
+                self._store(key, value, "fresh")
+                self.refreshes += 1
+            else:
+                logger.debug(f"Discarding the refresh of {self.name} cache entry {key}, invalidated meanwhile")
+        except Exception as e:
+            logger.error(f"Error refreshing {self.name} cache entry {key}: {str(e)}")
+        finally:
+            self._refreshing.discard(key)
+
+    async def _compute(self, key: Hashable, compute: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Compute the value of a key, and tell whether the key wasn't invalidated meanwhile."""
+
+        generation = self._generations.get(key, 0)
+        self._computing[key] = self._computing.get(key, 0) + 1
+        try:
+            value = await compute()
+            return value, self._generations.get(key, 0) == generation
+        finally:
+            self._computing[key] -= 1
+            if not self._computing[key]:
+                del self._computing[key]
+                self._generations.pop(key, None)
+
+    @staticmethod
+    def _result(value: Any, state: str) -> CacheResult:
+        body = json.dumps(value, sort_keys=True, default=str).encode()
+        return CacheResult(value, f'"{hashlib.sha1(body).hexdigest()}"', time.time(), state)
+
+    def _store(self, key: Hashable, value: Any, state: str) -> CacheResult:
+        entry = self._result(value, state)
+
+        self._entries[key] = CacheResult(value, entry.etag, entry.created_at, "fresh")
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+            self.evictions += 1
+
+        return entry
+
+    def invalidate(self, match: Optional[Callable[[Hashable], bool]] = None) -> int:
+        """Drop the entries whose key matches, or every entry, and return how many were dropped.
+
+        Computations of matching keys that are under way are discarded when they finish.
+        """
+
+        for key in self._computing:
+            if match is None or match(key):
+                self._generations[key] = self._generations.get(key, 0) + 1
+
+        keys = [key for key in self._entries if match is None or match(key)]
+        for key in keys:
+            del self._entries[key]
+        return len(keys)
+
+    def invalidate_repository(self, owner: str, repo: str) -> int:
+        """Drop every entry of a repository. Keys are expected to start with the lowercased owner and repo."""
+        return self.invalidate(lambda key: key[:2] == (owner.lower(), repo.lower()))
+
+    def cache_control(self, result: CacheResult) -> str:
+        """Build a Cache-Control header letting the client reuse the result too, but not shared caches."""
+
+        max_age = max(0, int(self.ttl - (time.time() - result.created_at)))
+        return f"private, max-age={max_age}, stale-while-revalidate={int(self.stale_ttl)}"
+
+    def stats(self) -> Dict[str, int]:
+        """Get the cache counters."""
+        return {
+            "entries": len(self._entries),
+            "hits": self.hits,
+            "stale_hits": self.stale_hits,
+            "misses": self.misses,
+            "refreshes": self.refreshes,
+            "evictions": self.evictions
+        }
+
+
+def cached_json_response(request: Request, cache: ResponseCache, result: CacheResult) -> Response:
+    """Build the HTTP response for a cached result, answering 304 when the client already has it."""
+
+    headers = {
+        "ETag": result.etag,
+        "Cache-Control": cache.cache_control(result),
+        "X-Cache": result.state.upper()
+    }
+
+    if_none_match = request.headers.get("If-None-Match", "")
+    client_etags = {etag.strip().removeprefix("W/") for etag in if_none_match.split(",")}
+    if result.etag in client_etags:
+        return Response(status_code=304, headers=headers)
+
+    return JSONResponse(content=result.value, headers=headers)
+
+
+_response_caches: Dict[str, ResponseCache] = {}
+
+
+def get_response_cache(name: str) -> ResponseCache:
+    """Get the named response cache, creating it on first use."""
+
+    if name not in _response_caches:
+        _response_caches[name] = ResponseCache(
+            name,
+            ttl=float(os.getenv("RESPONSE_CACHE_TTL", "300")),
+            stale_ttl=float(os.getenv("RESPONSE_CACHE_STALE_TTL", "3600")),
+            max_entries=int(os.getenv("RESPONSE_CACHE_MAX_ENTRIES", "1000"))
+        )
+    return _response_caches[name]
+
+
+def get_response_cache_stats() -> Dict[str, Dict[str, int]]:
+    """Get the counters of every response cache."""
+    return {name: cache.stats() for name, cache in _response_caches.items()}
+
+
+def invalidate_repository(owner: str, repo: str) -> int:
+    """Drop the cached results of a repository from every response cache."""
+    return sum(cache.invalidate_repository(owner, repo) for cache in _response_caches.values())
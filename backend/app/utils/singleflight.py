@@ -0,0 +1,65 @@
+import asyncio
+import logging
+from typing import Any, Awaitable, Callable, Dict, Hashable, TypeVar
+
+logger = logging.getLogger(__name__)
+
+T = TypeVar("T")
+
+
+class SingleFlight:
+    """Coalesces identical in-flight calls so they share one underlying computation."""
+
+    def __init__(self, name: str):
+        self.name = name
+        self.executions = 0
+        self.coalesced = 0
+        self._in_flight: Dict[Hashable, asyncio.Future] = {}
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[T]]) -> T:
+        """Run ``fn`` for the key, or wait for the run already in flight for the same key."""
+
+        future = self._in_flight.get(key)
+        if future is not None:
+            self.coalesced += 1
+            logger.debug(f"Coalesced {self.name} call for {key}")
+        else:
+            self.executions += 1
+            # Run as a separate task so a caller going away doesn't cancel it for everyone else
+            future = asyncio.ensure_future(fn())
+            self._in_flight[key] = future
+            future.add_done_callback(lambda done: self._finish(key, done))
+
+        return await asyncio.shield(future)
+
+    def _finish(self, key: Hashable, future: asyncio.Future):
+        if self._in_flight.get(key) is future:
+            del self._in_flight[key]
+
+        # Mark the exception as retrieved in case every caller was cancelled
+        if not future.cancelled():
+            future.exception()
+
+    def stats(self) -> Dict[str, Any]:
+        """Get the coalescing counters."""
+        return {
+            "executions": self.executions,
+            "coalesced": self.coalesced,
+            "in_flight": len(self._in_flight)
+        }
+
+
+_single_flights: Dict[str, SingleFlight] = {}
+
+
+def get_single_flight(name: str) -> SingleFlight:
+    """Get the named single-flight group, creating it on first use."""
+
+    if name not in _single_flights:
+        _single_flights[name] = SingleFlight(name)
+    return _single_flights[name]
+
+
+def get_single_flight_stats() -> Dict[str, Dict[str, Any]]:
+    """Get the counters of every single-flight group."""
+    return {name: single_flight.stats() for name, single_flight in _single_flights.items()}
@@ -0,0 +1,126 @@
+from datetime import datetime, timedelta, timezone
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+WEEK_SECONDS = 7 * 24 * 60 * 60
+
+# Kinds of events counted in the weekly statistics
+EVENT_KINDS = ("commits", "pull_requests", "reviews")
+
+
+def week_starts(weeks: int, now: Optional[datetime] = None) -> np.ndarray:
+    """Get the start (Sunday 00:00 UTC, like GitHub's statistics) of each of the last weeks, oldest first."""
+
+    now = now or datetime.utcnow()
+    today = datetime(now.year, now.month, now.day, tzinfo=timezone.utc)
+    current_week = today - timedelta(days=(today.weekday() + 1) % 7)
+    first_week = current_week - timedelta(weeks=weeks - 1)
+
+    return int(first_week.timestamp()) + WEEK_SECONDS * np.arange(weeks, dtype=np.int64)
+
+
+def to_epoch_seconds(values: Sequence[Any]) -> np.ndarray:
+    """Convert datetimes or GitHub ISO 8601 timestamps to an array of epoch seconds."""
+
+    if len(values) and isinstance(values[0], str):
+        # numpy doesn't parse the "Z" suffix
+        values = [value[:19] for value in values]
+    return np.array(values, dtype="datetime64[s]").astype(np.int64)
+
+
+class EventTable:
+    """Activity events stored column-wise: parallel author and timestamp (and optional weight) arrays per kind."""
+
+    def __init__(self):
+        self._columns: Dict[str, List[Tuple[np.ndarray, np.ndarray, np.ndarray]]] = {kind: [] for kind in EVENT_KINDS}
+
+    def add(self, kind: str, authors: Sequence[str], timestamps: np.ndarray, weights: Optional[np.ndarray] = None):
+        """Add events of a kind. Weights count each event more than once, e.g. for pre-aggregated weekly counts."""
+
+        if len(authors) == 0:
+            return
+
+        weights = np.ones(len(authors)) if weights is None else np.asarray(weights, dtype=np.float64)
+        self._columns[kind].append((np.asarray(authors, dtype=object), np.asarray(timestamps, dtype=np.int64), weights))
+
+    def weekly_counts(self, starts: np.ndarray) -> Tuple[np.ndarray, Dict[str, np.ndarray]]:
+        """Count every author's events per week.
+
+        Returns the sorted author logins and, for each kind, an (authors x weeks) matrix of counts.
+        """
+
+        weeks = len(starts)
+        columns = {
+            kind: tuple(np.concatenate(parts) for parts in zip(*chunks)) if chunks else None
+            for kind, chunks in self._columns.items()
+        }
+
+        authors = [column[0] for column in columns.values() if column is not None]
+        if not authors:
+            return np.array([], dtype=object), {kind: np.zeros((0, weeks), dtype=np.int64) for kind in EVENT_KINDS}
+
+        # Map logins to dense ids once for all kinds
+        logins, author_ids = np.unique(np.concatenate(authors).astype(str), return_inverse=True)
+
+        counts = {}
+        offset = 0
+        for kind, column in columns.items():
+            if column is None:
+                counts[kind] = np.zeros((len(logins), weeks), dtype=np.int64)
+                continue
+
+            _, timestamps, weights = column
+            ids = author_ids[offset:offset + len(timestamps)]
+            offset += len(timestamps)
+
+            week_index = (timestamps - starts[0]) // WEEK_SECONDS
+            in_window = (week_index >= 0) & (week_index < weeks)
+            cells = ids[in_window] * weeks + week_index[in_window]
+
+            counts[kind] = np.bincount(
+                cells, weights=weights[in_window], minlength=len(logins) * weeks
+            ).reshape(len(logins), weeks).astype(np.int64)
+
+        return logins, counts
+
+
+def build_weekly_stats(events: EventTable, starts: np.ndarray, avatars: Dict[str, str]) -> Dict[str, Any]:
+    """Build the weekly statistics of every contributor active during the weeks."""
+
+    logins, counts = events.weekly_counts(starts)
+
+    week_start_dates = [datetime.fromtimestamp(int(start), timezone.utc).date() for start in starts]
+    weeks_meta = [
+        (f"W{i + 1}", week_start.isoformat(), (week_start + timedelta(days=7)).isoformat())
+        for i, week_start in enumerate(week_start_dates)
+    ]
+
+    totals = sum(counts[kind] for kind in EVENT_KINDS)
+    active = np.flatnonzero(totals.sum(axis=1))
+
+    # Convert whole rows at once rather than reading the matrices cell by cell
+    rows = {kind: counts[kind][active].tolist() for kind in EVENT_KINDS}
+
+    weekly_stats = {}
+    for position, author_index in enumerate(active.tolist()):
+        username = str(logins[author_index])
+        weekly_stats[username] = {
+            "username": username,
+            "avatar_url": avatars.get(username),
+            "weekly_data": [
+                {
+                    "week": week,
+                    "week_start": week_start,
+                    "week_end": week_end,
+                    "commits": commits,
+                    "pull_requests": pull_requests,
+                    "reviews": reviews
+                }
+                for (week, week_start, week_end), commits, pull_requests, reviews in zip(
+                    weeks_meta, rows["commits"][position], rows["pull_requests"][position], rows["reviews"][position]
+                )
+            ]
+        }
+
+    return weekly_stats
@@ -1,7 +1,9 @@
 from fastapi import WebSocket
 import json
 import logging
-from typing import List
+from typing import Any, Dict, Optional
+
+from app.websocket.hub import ClientConnection, ConnectionHub, get_connection_hub, repository_topic
 
 logger = logging.getLogger(__name__)
 
@@ -9,27 +11,28 @@ logger = logging.getLogger(__name__)
 class ChatWebSocketHandler:
     """Handler for chat WebSocket connections."""
 
-    def __init__(self):
-        self.active_connections: List[WebSocket] = []
+    def __init__(self, hub: Optional[ConnectionHub] = None):
+        self.hub = hub if hub is not None else get_connection_hub()
 
-    async def connect(self, websocket: WebSocket):
+    async def connect(self, websocket: WebSocket) -> ClientConnection:
         """Connect a new WebSocket client."""
         await websocket.accept()
-        self.active_connections.append(websocket)
-        logger.info(f"New WebSocket connection. Total connections: {len(self.active_connections)}")
+        client = await self.hub.join(websocket)
+        logger.info(f"New WebSocket connection. Total connections: {len(self.hub)}")
+        return client
 
-    def disconnect(self, websocket: WebSocket):
+    def disconnect(self, client: ClientConnection):
         """Disconnect a WebSocket client."""
-        self.active_connections.remove(websocket)
-        logger.info(f"WebSocket disconnected. Remaining connections: {len(self.active_connections)}")
+        self.hub.leave(client)
+        logger.info(f"WebSocket disconnected. Remaining connections: {len(self.hub)}")
 
     async def handle_connection(self, websocket: WebSocket):
         """Handle a WebSocket connection."""
-        await self.connect(websocket)
+        client = await self.connect(websocket)
 
         try:
             # Send welcome message
-            await websocket.send_json({
+            self.hub.send(client, {
                 "type": "system",
                 "message": "Connected to GitBoss AI chat."
             })
@@ -41,18 +44,21 @@ class ChatWebSocketHandler:
                 try:
                     message = json.loads(data)
 
-                    # Process message - for now, just echo it back
-                    # In the future, this would integrate with the AI assistant
-                    response = {
-                        "type": "response",
-                        "message": f"Echo: {message.get('message', '')}"
-                    }
+                    if message.get("type") in ("subscribe", "unsubscribe"):
+                        response = self.handle_subscription(client, message)
+                    else:
+                        # Process message - for now, just echo it back
+                        # In the future, this would integrate with the AI assistant
+                        response = {
+                            "type": "response",
+                            "message": f"Echo: {message.get('message', '')}"
+                        }
 
-                    await websocket.send_json(response)
+                    self.hub.send(client, response)
 
                 except json.JSONDecodeError:
                     logger.error(f"Received invalid JSON: {data}")
-                    await websocket.send_json({
+                    self.hub.send(client, {
                         "type": "error",
                         "message": "Invalid message format. Expected JSON."
                     })
@@ -60,4 +66,22 @@ class ChatWebSocketHandler:
         except Exception as e:
             logger.error(f"WebSocket error: {str(e)}")
         finally:
-            self.disconnect(websocket)
\ No newline at end of file
+            self.disconnect(client)
+
+    def handle_subscription(self, client: ClientConnection, message: Dict[str, Any]) -> Dict[str, Any]:
+        """Subscribe or unsubscribe a client to a repository's update events."""
+
+        owner, repo = message.get("owner"), message.get("repo")
+        if not owner or not repo:
+            return {
+                "type": "error",
+                "message": "Subscriptions need an owner and a repo."
+            }
+
+        topic = repository_topic(owner, repo)
+        if message["type"] == "subscribe":
+            self.hub.subscribe(client, topic)
+            return {"type": "subscribed", "topic": topic}
+
+        self.hub.unsubscribe(client, topic)
+        return {"type": "unsubscribed", "topic": topic}
\ No newline at end of file
@@ -0,0 +1,218 @@
+import os
+import json
+import asyncio
+import logging
+from collections import deque
+from typing import Any, Deque, Dict, Optional, Set
+
+from fastapi import WebSocket, status
+
+from app.websocket.pubsub import PubSubBackend, create_pubsub_backend
+
+logger = logging.getLogger(__name__)
+
+
+def repository_topic(owner: str, repo: str) -> str:
+    """Get the topic of a repository's update events."""
+
+    # GitHub owner and repository names are case-insensitive
+    return f"repos/{owner.lower()}/{repo.lower()}"
+
+
+class ClientConnection:
+    """A connected WebSocket with its subscriptions and bounded queue of messages waiting to be sent."""
+
+    __slots__ = ("websocket", "topics", "queue", "queue_size", "ready", "dropped", "closing", "sender")
+
+    def __init__(self, websocket: WebSocket, queue_size: int):
+        self.websocket = websocket
+        self.topics: Set[str] = set()
+        self.queue: Deque[str] = deque()
+        self.queue_size = queue_size
+        self.ready = asyncio.Event()
+        self.dropped = 0
+        self.closing = False
+        self.sender: Optional[asyncio.Task] = None
+
+    def offer(self, text: str) -> bool:
+        """Queue a message, dropping the oldest one if the queue is full. Returns False if a message was dropped."""
+
+        dropped = len(self.queue) >= self.queue_size
+        if dropped:
+            self.queue.popleft()
+            self.dropped += 1
+
+        self.queue.append(text)
+        self.ready.set()
+        return not dropped
+
+
+class ConnectionHub:
+    """Registry of WebSocket connections that broadcasts events to the subscribers of a topic.
+
+    Every connection has its own sender task draining a bounded queue, so a slow client only delays
+    itself: its oldest messages are dropped and it is disconnected once it dropped too many. Events
+    go through the pub/sub backend so that subscribers connected to other worker processes get them too.
+    """
+
+    def __init__(self, backend: Optional[PubSubBackend] = None, queue_size: Optional[int] = None,
+                 max_dropped: Optional[int] = None):
+        self.backend = backend or create_pubsub_backend()
+        self.queue_size = queue_size or int(os.getenv("WEBSOCKET_SEND_QUEUE_SIZE", "100"))
+        self.max_dropped = max_dropped or int(os.getenv("WEBSOCKET_MAX_DROPPED", "100"))
+
+        self.clients: Dict[WebSocket, ClientConnection] = {}
+        self.topics: Dict[str, Set[ClientConnection]] = {}
+
+        self.delivered = 0
+        self.dropped = 0
+        self.slow_disconnects = 0
+
+        self._started = False
+        self._start_lock = asyncio.Lock()
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    async def start(self):
+        """Start receiving events from the pub/sub backend."""
+
+        async with self._start_lock:
+            if not self._started:
+                await self.backend.start(self._deliver)
+                self._started = True
+
+    async def close(self):
+        """Stop receiving events and stop sending to the connected clients."""
+
+        for client in self.clients.values():
+            client.sender.cancel()
+        await self.backend.close()
+        self._started = False
+
+    async def join(self, websocket: WebSocket) -> ClientConnection:
+        """Register an accepted WebSocket."""
+
+        await self.start()
+
+        client = ClientConnection(websocket, self.queue_size)
+        client.sender = asyncio.create_task(self._send(client))
+        self.clients[websocket] = client
+        return client
+
+    def leave(self, client: ClientConnection):
+        """Unregister a WebSocket and drop its subscriptions."""
+
+        self.clients.pop(client.websocket, None)
+        for topic in client.topics:
+            self._remove_subscriber(topic, client)
+        client.topics.clear()
+        client.sender.cancel()
+
+    def subscribe(self, client: ClientConnection, topic: str):
+        """Subscribe a client to the events of a topic."""
+
+        client.topics.add(topic)
+        self.topics.setdefault(topic, set()).add(client)
+
+    def unsubscribe(self, client: ClientConnection, topic: str):
+        """Unsubscribe a client from the events of a topic."""
+
+        client.topics.discard(topic)
+        self._remove_subscriber(topic, client)
+
+    def send(self, client: ClientConnection, message: Dict[str, Any]):
+        """Queue a message for a single client."""
+
+        self._offer(client, json.dumps(message))
+
+    async def publish(self, topic: str, message: Dict[str, Any]):
+        """Send an event to the subscribers of the topic in every worker process."""
+
+        await self.start()
+        await self.backend.publish(topic, message)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "connections": len(self.clients),
+            "topics": len(self.topics),
+            "published": self.backend.published,
+            "delivered": self.delivered,
+            "dropped": self.dropped + self.backend.dropped,
+            "slow_disconnects": self.slow_disconnects
+        }
+
+    def _deliver(self, topic: str, message: Dict[str, Any]):
+        subscribers = self.topics.get(topic)
+        if not subscribers:
+            return
+
+        # Serialize once for all subscribers
+        text = json.dumps(message)
+        for client in list(subscribers):
+            self._offer(client, text)
+            self.delivered += 1
+
+    def _offer(self, client: ClientConnection, text: str):
+        if client.closing:
+            return
+
+        if not client.offer(text):
+            self.dropped += 1
+            if client.dropped >= self.max_dropped:
+                client.closing = True
+                self.slow_disconnects += 1
+                asyncio.create_task(self._disconnect_slow_client(client))
+
+    async def _send(self, client: ClientConnection):
+        try:
+            while True:
+                await client.ready.wait()
+                while client.queue:
+                    await client.websocket.send_text(client.queue.popleft())
+                client.ready.clear()
+        except asyncio.CancelledError:
+            raise
+        except Exception as e:
+            # The receiving side notices the disconnection and leaves
+            logger.debug(f"Stopped sending to WebSocket: {str(e)}")
+
+    async def _disconnect_slow_client(self, client: ClientConnection):
+        logger.warning(f"Disconnecting WebSocket client that dropped {client.dropped} messages")
+
+        self.leave(client)
+        try:
+            await client.websocket.close(code=status.WS_1013_TRY_AGAIN_LATER)
+        except Exception as e:
+            logger.debug(f"Error closing slow WebSocket: {str(e)}")
+
+    def _remove_subscriber(self, topic: str, client: ClientConnection):
+        subscribers = self.topics.get(topic)
+        if subscribers is None:
+            return
+
+        subscribers.discard(client)
+        if not subscribers:
+            del self.topics[topic]
+
+
+_default_hub: Optional[ConnectionHub] = None
+
+
+def get_connection_hub() -> ConnectionHub:
+    """Get the process-wide WebSocket connection hub."""
+    global _default_hub
+
+    if _default_hub is None:
+        _default_hub = ConnectionHub()
+    return _default_hub
+
+
+async def publish_repository_event(owner: str, repo: str, message: Dict[str, Any]):
+    """Send an event to the clients subscribed to a repository."""
+
+    try:
+        await get_connection_hub().publish(repository_topic(owner, repo), message)
+    except Exception as e:
+        # Live updates are best-effort
+        logger.error(f"Error publishing event for {owner}/{repo}: {str(e)}")
@@ -0,0 +1,140 @@
+import os
+import json
+import uuid
+import socket
+import asyncio
+import logging
+from abc import ABC, abstractmethod
+from typing import Any, Callable, Dict, Optional
+
+logger = logging.getLogger(__name__)
+
+# Called with the topic and the message of every published event
+DeliverCallback = Callable[[str, Dict[str, Any]], None]
+
+
+class PubSubBackend(ABC):
+    """Carries published events to the connection hubs of every worker process."""
+
+    def __init__(self):
+        self.published = 0
+        self.dropped = 0
+
+    @abstractmethod
+    async def start(self, deliver: DeliverCallback):
+        """Start receiving events, passing each of them to the callback."""
+
+    @abstractmethod
+    async def publish(self, topic: str, message: Dict[str, Any]):
+        """Send an event to every process, this one included."""
+
+    @abstractmethod
+    async def close(self):
+        """Stop receiving events."""
+
+
+class MemoryPubSubBackend(PubSubBackend):
+    """In-process backend, for a single worker process."""
+
+    def __init__(self):
+        super().__init__()
+        self._deliver: Optional[DeliverCallback] = None
+
+    async def start(self, deliver: DeliverCallback):
+        self._deliver = deliver
+
+    async def publish(self, topic: str, message: Dict[str, Any]):
+        self.published += 1
+        if self._deliver:
+            self._deliver(topic, message)
+
+    async def close(self):
+        self._deliver = None
+
+
+class _DatagramReceiver(asyncio.DatagramProtocol):
+    def __init__(self, deliver: DeliverCallback):
+        self.deliver = deliver
+
+    def datagram_received(self, data: bytes, addr: Any):
+        try:
+            event = json.loads(data)
+            self.deliver(event["topic"], event["message"])
+        except Exception as e:
+            logger.error(f"Invalid pub/sub event: {str(e)}")
+
+
+class LocalSocketPubSubBackend(PubSubBackend):
+    """Backend for worker processes on the same host, exchanging events over Unix datagram sockets.
+
+    Every process binds its own socket in a shared directory, and publishing sends the event to all
+    the sockets found there. Sockets left behind by processes that exited are removed.
+    """
+
+    def __init__(self, directory: str):
+        super().__init__()
+        self.directory = directory
+        self.path: Optional[str] = None
+        self._transport: Optional[asyncio.DatagramTransport] = None
+        self._sender: Optional[socket.socket] = None
+
+    async def start(self, deliver: DeliverCallback):
+        os.makedirs(self.directory, exist_ok=True)
+        self.path = os.path.join(self.directory, f"{os.getpid()}-{uuid.uuid4().hex[:8]}.sock")
+
+        receiver = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        receiver.bind(self.path)
+        self._transport, _ = await asyncio.get_running_loop().create_datagram_endpoint(
+            lambda: _DatagramReceiver(deliver), sock=receiver
+        )
+
+        self._sender = socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM)
+        self._sender.setblocking(False)
+
+    async def publish(self, topic: str, message: Dict[str, Any]):
+        data = json.dumps({"topic": topic, "message": message}).encode()
+        self.published += 1
+
+        for name in os.listdir(self.directory):
+            if not name.endswith(".sock"):
+                continue
+
+            path = os.path.join(self.directory, name)
+            try:
+                self._sender.sendto(data, path)
+            except (ConnectionRefusedError, FileNotFoundError):
+                # Nobody listens there anymore
+                try:
+                    os.unlink(path)
+                except OSError:
+                    pass
+            except BlockingIOError:
+                # The receiving process is too far behind, don't wait for it
+                self.dropped += 1
+                logger.warning(f"Dropped pub/sub event for {path}")
+
+    async def close(self):
+        if self._transport:
+            self._transport.close()
+            self._transport = None
+        if self._sender:
+            self._sender.close()
+            self._sender = None
+        if self.path and os.path.exists(self.path):
+            os.unlink(self.path)
+
+
+def create_pubsub_backend() -> PubSubBackend:
+    """Create the pub/sub backend configured in the environment."""
+
+    backend_name = os.getenv("WEBSOCKET_PUBSUB_BACKEND", "memory")
+
+    if backend_name == "memory":
+        backend = MemoryPubSubBackend()
+    elif backend_name == "socket":
+        backend = LocalSocketPubSubBackend(os.getenv("WEBSOCKET_PUBSUB_DIR", "/tmp/gitboss-pubsub"))
+    else:
+        raise ValueError(f"Unknown WebSocket pub/sub backend: {backend_name}")
+
+    logger.info(f"Using {backend_name} WebSocket pub/sub backend")
+    return backend
@@ -0,0 +1,479 @@
+"""Local stand-in for the GitHub API endpoints the services use, serving synthetic repositories.
+
+Responses are paginated with Link headers like GitHub's, search results stop after the first 1000,
+ETags are honored, every request can be delayed, and each token gets its own rate limit budgets.
+
+    python -m benchmarks.fakegithub --repos small,medium --latency 0.05 --port 9000
+"""
+import re
+import json
+import math
+import time
+import random
+import asyncio
+import hashlib
+import argparse
+from collections import defaultdict
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional, Set, Tuple
+from urllib.parse import urlencode
+
+import numpy as np
+import uvicorn
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, Response
+from starlette.routing import Route
+
+from app.utils.metrics import endpoint_template
+from benchmarks.synthetic import DAY, SIZES, SyntheticRepository
+
+PER_PAGE = 30
+MAX_PER_PAGE = 100
+SEARCH_RESULT_LIMIT = 1000
+
+# Budgets per token: GitHub's own, or large enough never to be hit
+RATE_LIMITS = {
+    "github": {"core": (5000, 3600), "search": (30, 60), "graphql": (5000, 3600)},
+    "unlimited": {"core": (10 ** 9, 3600), "search": (10 ** 9, 60), "graphql": (10 ** 9, 3600)},
+}
+
+# Requests without a token share a much smaller budget
+ANONYMOUS_LIMITS = {"core": (60, 3600), "search": (10, 60), "graphql": (0, 3600)}
+
+
+class Budget:
+    def __init__(self, limit: int, window: int):
+        self.limit = limit
+        self.window = window
+        self.used = 0
+        self.reset_at = time.time() + window
+
+    def take(self) -> bool:
+        now = time.time()
+        if now >= self.reset_at:
+            self.used = 0
+            self.reset_at = now + self.window
+        if self.used >= self.limit:
+            return False
+        self.used += 1
+        return True
+
+    def headers(self, resource: str) -> Dict[str, str]:
+        return {
+            "X-RateLimit-Limit": str(self.limit),
+            "X-RateLimit-Remaining": str(max(0, self.limit - self.used)),
+            "X-RateLimit-Used": str(self.used),
+            "X-RateLimit-Reset": str(int(self.reset_at)),
+            "X-RateLimit-Resource": resource
+        }
+
+
+def parse_date_range(value: str) -> Tuple[Optional[int], Optional[int]]:
+    """Turn a search date qualifier (``>=2024-01-01``, ``2024-01-01..2024-02-01T12:00:00Z``, ...) into inclusive bounds."""
+
+    def first(text: str) -> int:
+        if len(text) > 10:
+            return int(datetime.strptime(text[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp())
+        return int(datetime.strptime(text, "%Y-%m-%d").replace(tzinfo=timezone.utc).timestamp())
+
+    def last(text: str) -> int:
+        # A date covers its whole day, a timestamp only its second
+        return first(text) + (DAY - 1 if len(text) <= 10 else 0)
+
+    if ".." in value:
+        start, end = value.split("..", 1)
+        return (first(start) if start != "*" else None), (last(end) if end != "*" else None)
+    if value.startswith(">="):
+        return first(value[2:]), None
+    if value.startswith(">"):
+        return last(value[1:]) + 1, None
+    if value.startswith("<="):
+        return None, last(value[2:])
+    if value.startswith("<"):
+        return None, first(value[1:]) - 1
+    return first(value), last(value)
+
+
+def parse_search_query(query: str) -> Dict[str, List[str]]:
+    qualifiers: Dict[str, List[str]] = defaultdict(list)
+    for term in query.split():
+        if ":" in term:
+            name, value = term.split(":", 1)
+            qualifiers[name].append(value)
+    return qualifiers
+
+
+def in_range(times: np.ndarray, ranges: List[str]) -> np.ndarray:
+    mask = np.ones(len(times), dtype=bool)
+    for value in ranges:
+        start, end = parse_date_range(value)
+        if start is not None:
+            mask &= times >= start
+        if end is not None:
+            mask &= times <= end
+    return mask
+
+
+def parse_timestamp(value: Optional[str]) -> Optional[int]:
+    if not value:
+        return None
+    return int(datetime.strptime(value[:19], "%Y-%m-%dT%H:%M:%S").replace(tzinfo=timezone.utc).timestamp())
+
+
+class FakeGitHub:
+    """The state of the fake API: repositories, rate limit budgets and request counters."""
+
+    def __init__(self, repositories: List[SyntheticRepository], latency: float = 0.0, jitter: float = 0.0,
+                 rate_limits: str = "unlimited", base_url: str = "http://127.0.0.1", handshake: float = 0.0):
+        self.repositories = {(repo.owner.lower(), repo.name.lower()): repo for repo in repositories}
+        for repo in repositories:
+            repo.base_url = base_url
+        self.base_url = base_url
+        self.latency = latency
+        self.jitter = jitter
+        self.handshake = handshake
+        self.limits = RATE_LIMITS[rate_limits]
+        self.budgets: Dict[Tuple[str, str], Budget] = {}
+        # Client addresses of every connection ever accepted
+        self.clients: Set[Tuple[str, int]] = set()
+        self.reset_stats()
+
+    def reset_stats(self):
+        self.requests: Dict[str, int] = defaultdict(int)
+        self.bytes: Dict[str, int] = defaultdict(int)
+        self.not_modified = 0
+        self.rate_limited = 0
+        self.connections = 0
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "requests": sum(self.requests.values()),
+            "bytes": sum(self.bytes.values()),
+            "not_modified": self.not_modified,
+            "rate_limited": self.rate_limited,
+            "connections": self.connections,
+            "endpoints": {
+                endpoint: {"requests": count, "bytes": self.bytes[endpoint]}
+                for endpoint, count in sorted(self.requests.items())
+            }
+        }
+
+    def budget(self, request: Request, resource: str) -> Budget:
+        authorization = request.headers.get("Authorization", "")
+        token = authorization.split(" ", 1)[1] if " " in authorization else "anonymous"
+        if (token, resource) not in self.budgets:
+            limits = self.limits if token != "anonymous" else ANONYMOUS_LIMITS
+            self.budgets[(token, resource)] = Budget(*limits[resource])
+        return self.budgets[(token, resource)]
+
+    def repository(self, request: Request) -> Optional[SyntheticRepository]:
+        return self.repositories.get((request.path_params["owner"].lower(), request.path_params["repo"].lower()))
+
+    def repository_of_query(self, qualifiers: Dict[str, List[str]]) -> Optional[SyntheticRepository]:
+        for full_name in qualifiers.get("repo", []):
+            owner, _, name = full_name.partition("/")
+            return self.repositories.get((owner.lower(), name.lower()))
+        return None
+
+    async def accept(self, request: Request):
+        """Count the connections opened, delaying their first response by the time a TLS handshake takes."""
+
+        client = (request.client.host, request.client.port) if request.client else ("", 0)
+        if client not in self.clients:
+            self.clients.add(client)
+            self.connections += 1
+            if self.handshake:
+                await asyncio.sleep(self.handshake)
+
+    async def respond(self, request: Request, resource: str, body: Any, status: int = 200,
+                      headers: Optional[Dict[str, str]] = None) -> Response:
+        """Delay, rate limit and count a response, answering 304 when the client has it already."""
+
+        await self.accept(request)
+        if self.latency or self.jitter:
+            await asyncio.sleep(self.latency + random.uniform(0, self.jitter))
+
+        endpoint = endpoint_template(request.url.path)
+        content = json.dumps(body).encode()
+        etag = f'W/"{hashlib.sha1(content).hexdigest()}"'
+        budget = self.budget(request, resource)
+
+        if status == 200 and request.headers.get("If-None-Match") == etag:
+            # Like GitHub, revalidations don't count against the rate limit
+            self.not_modified += 1
+            self.requests[endpoint] += 1
+            return Response(status_code=304, headers={"ETag": etag, **budget.headers(resource)})
+
+        if not budget.take():
+            self.rate_limited += 1
+            return JSONResponse(
+                {"message": "API rate limit exceeded", "documentation_url": "https://docs.github.com/rest"},
+                status_code=403,
+                headers=budget.headers(resource)
+            )
+
+        self.requests[endpoint] += 1
+        self.bytes[endpoint] += len(content)
+        return Response(
+            content,
+            status_code=status,
+            media_type="application/json; charset=utf-8",
+            headers={**(headers or {}), "ETag": etag, **budget.headers(resource)}
+        )
+
+    def page(self, request: Request, total: int, cap: Optional[int] = None) -> Tuple[Optional[range], Dict[str, str]]:
+        """Work out the indexes on the requested page and its Link header, or None if it's past the cap."""
+
+        per_page = min(int(request.query_params.get("per_page", PER_PAGE)), MAX_PER_PAGE)
+        page = max(1, int(request.query_params.get("page", 1)))
+        available = min(total, cap) if cap is not None else total
+        last = max(1, math.ceil(available / per_page))
+
+        start = (page - 1) * per_page
+        if cap is not None and start >= cap:
+            return None, {}
+
+        def link(target: int) -> str:
+            params = {**request.query_params, "per_page": per_page, "page": target}
+            return f"<{self.base_url}{request.url.path}?{urlencode(params)}>"
+
+        links = []
+        if page < last:
+            links += [f'{link(page + 1)}; rel="next"', f'{link(last)}; rel="last"']
+        if page > 1:
+            links += [f'{link(1)}; rel="first"', f'{link(page - 1)}; rel="prev"']
+
+        return range(start, min(start + per_page, available)), ({"Link": ", ".join(links)} if links else {})
+
+    async def get_repository(self, request: Request) -> Response:
+        repo = self.repository(request)
+        if repo is None:
+            return await self.not_found(request)
+        return await self.respond(request, "core", repo.repository())
+
+    async def list_commits(self, request: Request) -> Response:
+        repo = self.repository(request)
+        if repo is None:
+            return await self.not_found(request)
+
+        # Commits are stored newest first
+        descending = -repo.commit_times
+        until = parse_timestamp(request.query_params.get("until"))
+        since = parse_timestamp(request.query_params.get("since"))
+        low = int(np.searchsorted(descending, -until, "left")) if until is not None else 0
+        high = int(np.searchsorted(descending, -since, "right")) if since is not None else len(descending)
+
+        indexes, headers = self.page(request, max(0, high - low))
+        return await self.respond(request, "core", [repo.commit(low + i) for i in indexes], headers=headers)
+
+    async def list_contributors(self, request: Request) -> Response:
+        repo = self.repository(request)
+        if repo is None:
+            return await self.not_found(request)
+
+        contributors = repo.contributors()
+        indexes, headers = self.page(request, len(contributors))
+        return await self.respond(request, "core", [contributors[i] for i in indexes], headers=headers)
+
+    async def contributor_stats(self, request: Request) -> Response:
+        repo = self.repository(request)
+        if repo is None:
+            return await self.not_found(request)
+        return await self.respond(request, "core", repo.contributor_stats())
+
+    async def list_issues(self, request: Request) -> Response:
+        repo = self.repository(request)
+        if repo is None:
+            return await self.not_found(request)
+
+        mask = np.ones(len(repo.item_times), dtype=bool)
+        state = request.query_params.get("state", "open")
+        if state != "all":
+            mask &= repo.item_open == (state == "open")
+        since = parse_timestamp(request.query_params.get("since"))
+        if since is not None:
+            mask &= repo.item_updated_times >= since
+
+        # Newest first
+        matches = np.flatnonzero(mask)[::-1]
+        indexes, headers = self.page(request, len(matches))
+        return await self.respond(request, "core", [repo.item(int(matches[i])) for i in indexes], headers=headers)
+
+    async def list_reviews(self, request: Request) -> Response:
+        repo = self.repository(request)
+        if repo is None:
+            return await self.not_found(request)
+
+        reviews = repo.reviews(int(request.path_params["number"]))
+        indexes, headers = self.page(request, len(reviews))
+        return await self.respond(request, "core", [reviews[i] for i in indexes], headers=headers)
+
+    async def search_issues(self, request: Request) -> Response:
+        qualifiers = parse_search_query(request.query_params.get("q", ""))
+        repo = self.repository_of_query(qualifiers)
+        if repo is None:
+            return await self.validation_failed(request)
+
+        mask = in_range(repo.item_times, qualifiers.get("created", []))
+        mask &= in_range(repo.item_updated_times, qualifiers.get("updated", []))
+        for value in qualifiers.get("is", []):
+            if value in ("pr", "issue"):
+                mask &= repo.item_is_pr == (value == "pr")
+            elif value in ("open", "closed"):
+                mask &= repo.item_open == (value == "open")
+        for value in qualifiers.get("state", []):
+            mask &= repo.item_open == (value == "open")
+        for login in qualifiers.get("author", []):
+            author = repo.logins.index(login) if login in repo.logins else -2
+            mask &= repo.item_authors == author
+
+        matches = np.flatnonzero(mask)[::-1]
+        indexes, headers = self.page(request, len(matches), cap=SEARCH_RESULT_LIMIT)
+        if indexes is None:
+            return await self.validation_failed(request, "Only the first 1000 search results are available")
+
+        items = [{**repo.item(int(matches[i])), "score": 1.0} for i in indexes]
+        return await self.respond(
+            request, "search", {"total_count": len(matches), "incomplete_results": False, "items": items},
+            headers=headers
+        )
+
+    async def search_commits(self, request: Request) -> Response:
+        qualifiers = parse_search_query(request.query_params.get("q", ""))
+        repo = self.repository_of_query(qualifiers)
+        if repo is None:
+            return await self.validation_failed(request)
+
+        mask = in_range(repo.commit_times, qualifiers.get("committer-date", []) + qualifiers.get("author-date", []))
+        for login in qualifiers.get("author", []):
+            author = repo.logins.index(login) if login in repo.logins else -2
+            mask &= repo.commit_authors == author
+
+        matches = np.flatnonzero(mask)
+        indexes, headers = self.page(request, len(matches), cap=SEARCH_RESULT_LIMIT)
+        if indexes is None:
+            return await self.validation_failed(request, "Only the first 1000 search results are available")
+
+        items = [{**repo.commit(int(matches[i])), "score": 1.0} for i in indexes]
+        return await self.respond(
+            request, "search", {"total_count": len(matches), "incomplete_results": False, "items": items},
+            headers=headers
+        )
+
+    async def graphql(self, request: Request) -> Response:
+        """Answer the batched review queries; anything else gets an error."""
+
+        payload = await request.json()
+        variables = payload.get("variables") or {}
+        repo = self.repositories.get((str(variables.get("owner", "")).lower(), str(variables.get("repo", "")).lower()))
+        query = payload.get("query", "")
+        aliases = re.findall(r"(\w+): pullRequest\(number: (\d+)\)", query)
+
+        if repo is None or not aliases:
+            return await self.respond(request, "graphql", {"data": None, "errors": [{"message": "Unsupported query"}]})
+
+        with_nodes = "submittedAt" in query
+        with_authors = "author" in query
+        with_ids = "databaseId" in query
+        repository = {}
+        for alias, number in aliases:
+            reviews = repo.reviews(int(number))
+            if not 0 < int(number) <= len(repo.item_times) or not repo.item_is_pr[int(number) - 1]:
+                repository[alias] = None
+                continue
+            repository[alias] = {"reviews": {"totalCount": len(reviews)}}
+            if with_nodes:
+                repository[alias]["reviews"]["nodes"] = [
+                    {"submittedAt": review["submitted_at"], "state": review["state"]} for review in reviews[:100]
+                ]
+                if with_authors:
+                    for node, review in zip(repository[alias]["reviews"]["nodes"], reviews):
+                        node["author"] = {"login": review["user"]["login"], "avatarUrl": review["user"]["avatar_url"]}
+                if with_ids:
+                    for node, review in zip(repository[alias]["reviews"]["nodes"], reviews):
+                        node["databaseId"] = review["id"]
+
+        return await self.respond(request, "graphql", {"data": {"repository": repository}})
+
+    async def list_org_repositories(self, request: Request) -> Response:
+        org = request.path_params["org"].lower()
+        repos = [repo.repository() for (owner, _), repo in sorted(self.repositories.items()) if owner == org]
+        indexes, headers = self.page(request, len(repos))
+        return await self.respond(request, "core", [repos[i] for i in indexes], headers=headers)
+
+    async def not_found(self, request: Request) -> Response:
+        return await self.respond(request, "core", {"message": "Not Found"}, status=404)
+
+    async def validation_failed(self, request: Request, message: str = "Validation Failed") -> Response:
+        return await self.respond(request, "search", {"message": message}, status=422)
+
+    async def get_rate_limit(self, request: Request) -> Response:
+        """Like GitHub, report the budgets of the token without using any of them."""
+
+        await self.accept(request)
+        resources = {}
+        for resource in ("core", "search", "graphql"):
+            budget = self.budget(request, resource)
+            resources[resource] = {
+                "limit": budget.limit,
+                "remaining": max(0, budget.limit - budget.used),
+                "reset": int(budget.reset_at),
+                "used": budget.used
+            }
+        return JSONResponse({"resources": resources, "rate": resources["core"]})
+
+    async def get_stats(self, request: Request) -> Response:
+        return JSONResponse(self.stats())
+
+    async def post_reset(self, request: Request) -> Response:
+        self.reset_stats()
+        return JSONResponse(self.stats())
+
+
+def create_app(fake: FakeGitHub) -> Starlette:
+    """Build the ASGI app serving the fake API."""
+
+    return Starlette(routes=[
+        Route("/_fake/stats", fake.get_stats),
+        Route("/_fake/reset", fake.post_reset, methods=["POST"]),
+        Route("/rate_limit", fake.get_rate_limit),
+        Route("/graphql", fake.graphql, methods=["POST"]),
+        Route("/search/issues", fake.search_issues),
+        Route("/search/commits", fake.search_commits),
+        Route("/orgs/{org}/repos", fake.list_org_repositories),
+        Route("/repos/{owner}/{repo}", fake.get_repository),
+        Route("/repos/{owner}/{repo}/commits", fake.list_commits),
+        Route("/repos/{owner}/{repo}/contributors", fake.list_contributors),
+        Route("/repos/{owner}/{repo}/stats/contributors", fake.contributor_stats),
+        Route("/repos/{owner}/{repo}/issues", fake.list_issues),
+        Route("/repos/{owner}/{repo}/pulls/{number:int}/reviews", fake.list_reviews),
+    ])
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serve synthetic repositories through a fake GitHub API")
+    parser.add_argument("--repos", default="small", help=f"Comma-separated sizes among {', '.join(SIZES)}")
+    parser.add_argument("--owner", default="bench")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds added to every response")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Up to this many more seconds, at random")
+    parser.add_argument("--rate-limits", choices=sorted(RATE_LIMITS), default="unlimited")
+    parser.add_argument("--handshake", type=float, default=0.0,
+                        help="Seconds added to the first response of every connection, like a TLS handshake")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=9000)
+    args = parser.parse_args()
+
+    repositories = [
+        SyntheticRepository.of_size(args.owner, size.strip(), seed=args.seed)
+        for size in args.repos.split(",") if size.strip()
+    ]
+    fake = FakeGitHub(
+        repositories, args.latency, args.jitter, args.rate_limits, f"http://{args.host}:{args.port}", args.handshake
+    )
+    uvicorn.run(create_app(fake), host=args.host, port=args.port, log_level="warning")
+
+
+if __name__ == "__main__":
+    main()
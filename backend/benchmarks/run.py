@@ -0,0 +1,531 @@
+"""Benchmark the API against a fake GitHub serving synthetic repositories, and compare the reports.
+
+    python -m benchmarks.run --size small --latency 0.05
+    python -m benchmarks.run --compare benchmarks/results/before.json benchmarks/results/after.json
+
+The fake GitHub server and the app run in their own processes on local ports, so the reports
+include the HTTP round trips of both. Every report records the commit it was run on.
+"""
+import os
+import sys
+import json
+import time
+import socket
+import random
+import asyncio
+import argparse
+import resource
+import subprocess
+import tempfile
+from datetime import datetime, timedelta, timezone
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+
+import httpx
+import numpy as np
+
+from benchmarks import webhooks
+from benchmarks.synthetic import SIZES, SyntheticRepository
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+RESULTS_DIR = os.path.join(BACKEND_DIR, "benchmarks", "results")
+
+OWNER = "bench"
+
+# Scenarios in the order they run: restarts first, live crawls before the sync, reads of the synced store after it
+SCENARIOS = (
+    "cold_start", "stats", "contributors", "weekly", "sync", "stored_stats", "stored_contributors", "stored_weekly",
+    "rollups", "webhooks", "websocket"
+)
+
+# Scenarios reading the synced store, which is synced before they're measured
+STORE_SCENARIOS = {"stored_stats", "stored_contributors", "stored_weekly", "rollups", "webhooks", "websocket"}
+
+# Metrics compared between reports, with whether lower is better
+COMPARED_METRICS = (("throughput", False), ("p50", True), ("p99", True), ("github_requests", True),
+                    ("github_connections", True), ("peak_rss_kb", True))
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def git_commit() -> Optional[str]:
+    try:
+        return subprocess.check_output(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=BACKEND_DIR, text=True, stderr=subprocess.DEVNULL
+        ).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def reset_peak_rss(pid: int):
+    # Linux resets the VmHWM high-water mark when 5 is written to clear_refs
+    try:
+        with open(f"/proc/{pid}/clear_refs", "w") as clear_refs:
+            clear_refs.write("5")
+    except OSError:
+        pass
+
+
+def peak_rss_kb(pid: int) -> Optional[int]:
+    try:
+        with open(f"/proc/{pid}/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def raise_file_limit():
+    """Allow as many open sockets as the hard limit does, for the WebSocket clients."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    resource.setrlimit(resource.RLIMIT_NOFILE, (hard, hard))
+
+
+def summarize(latencies: List[float], duration: float, errors: int) -> Dict[str, Any]:
+    values = np.array(latencies) if latencies else np.zeros(1)
+    return {
+        "requests": len(latencies),
+        "errors": errors,
+        "duration": round(duration, 4),
+        "throughput": round(len(latencies) / duration, 3) if duration else 0.0,
+        "mean": round(float(values.mean()), 5),
+        "p50": round(float(np.percentile(values, 50)), 5),
+        "p90": round(float(np.percentile(values, 90)), 5),
+        "p99": round(float(np.percentile(values, 99)), 5),
+        "max": round(float(values.max()), 5)
+    }
+
+
+async def run_requests(send: Callable[[int], Awaitable[httpx.Response]], count: int,
+                       concurrency: int) -> Dict[str, Any]:
+    """Send requests from concurrent clients and summarize their latencies."""
+
+    latencies: List[float] = []
+    errors = 0
+    next_request = iter(range(count))
+
+    async def client():
+        nonlocal errors
+        for n in next_request:
+            start = time.perf_counter()
+            try:
+                response = await send(n)
+                # 202 means a sync job was queued rather than a result computed
+                if response.status_code >= 300:
+                    errors += 1
+            except httpx.HTTPError:
+                errors += 1
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(client() for _ in range(concurrency)))
+    return summarize(latencies, time.perf_counter() - start, errors)
+
+
+class Benchmark:
+    """Runs the scenarios against one app process and one fake GitHub process."""
+
+    def __init__(self, args: argparse.Namespace, workdir: str):
+        self.args = args
+        self.workdir = workdir
+        self.repo = SyntheticRepository.of_size(OWNER, args.size, seed=args.seed)
+        self.fake_url = f"http://127.0.0.1:{free_port()}"
+        self.app_url = f"http://127.0.0.1:{free_port()}"
+        self.database_url = f"sqlite:///{os.path.join(workdir, 'bench.db')}"
+        self.processes: List[subprocess.Popen] = []
+        self.app: Optional[subprocess.Popen] = None
+        self.app_env: Dict[str, str] = {}
+        self.client: Optional[httpx.AsyncClient] = None
+        self.synced = False
+
+        # The same date ranges in every run, so reports stay comparable
+        rng = random.Random(args.seed)
+        end = datetime.fromtimestamp(self.repo.end, timezone.utc).date()
+        span = (self.repo.end - self.repo.start) // 86400
+        self.ranges: List[Tuple[Optional[str], Optional[str]]] = [(None, None)]
+        for _ in range(63):
+            days = rng.choice((7, 30, 90, 365, span))
+            offset = rng.randrange(0, max(1, span - days))
+            start = end - timedelta(days=offset + days)
+            self.ranges.append((start.isoformat(), (end - timedelta(days=offset)).isoformat()))
+
+    def _spawn(self, arguments: List[str], env: Dict[str, str], log: str) -> subprocess.Popen:
+        log_file = open(os.path.join(self.workdir, log), "w")
+        process = subprocess.Popen(
+            [sys.executable, *arguments], cwd=BACKEND_DIR, env={**os.environ, **env},
+            stdout=log_file, stderr=subprocess.STDOUT
+        )
+        self.processes.append(process)
+        return process
+
+    async def start(self):
+        fake_port = self.fake_url.rsplit(":", 1)[1]
+        self._spawn([
+            "-m", "benchmarks.fakegithub", "--repos", self.args.size, "--owner", OWNER, "--seed", str(self.args.seed),
+            "--latency", str(self.args.latency), "--jitter", str(self.args.jitter),
+            "--rate-limits", self.args.rate_limits, "--handshake", str(self.args.handshake), "--port", fake_port
+        ], {}, "fakegithub.log")
+
+        tokens = ",".join(f"bench-token-{n}" for n in range(1, self.args.tokens + 1))
+        env = {
+            "GITHUB_API_URL": self.fake_url,
+            "GITHUB_TOKEN": "",
+            "GITHUB_TOKENS": tokens,
+            "GITHUB_APP_ID": "",
+            "DATABASE_URL": self.database_url,
+            "GITHUB_CACHE_URL": f"sqlite:///{os.path.join(self.workdir, 'github_cache.db')}",
+            "GITHUB_WEBHOOK_SECRET": webhooks.WEBHOOK_SECRET,
+            # Requests are served inline so every one of them does the work being measured
+            "SYNC_WORKERS": "0",
+            "WEBSOCKET_PUBSUB_BACKEND": "memory",
+        }
+        if not self.args.response_cache:
+            env.update(RESPONSE_CACHE_TTL="0", RESPONSE_CACHE_STALE_TTL="0")
+        for assignment in self.args.app_env:
+            name, _, value = assignment.partition("=")
+            env[name] = value
+        self.app_env = env
+
+        self.client = httpx.AsyncClient(timeout=self.args.timeout, limits=httpx.Limits(max_connections=1000))
+        await self._wait_until_up(f"{self.fake_url}/_fake/stats")
+        await self.start_app()
+
+    async def start_app(self):
+        app_port = self.app_url.rsplit(":", 1)[1]
+        self.app = self._spawn([
+            "-m", "uvicorn", "app.main:app", "--host", "127.0.0.1", "--port", app_port, "--log-level", "warning"
+        ], self.app_env, "app.log")
+        await self._wait_until_up(f"{self.app_url}/api/health")
+
+    async def restart_app(self):
+        self.app.terminate()
+        self.app.wait(timeout=30)
+        self.processes.remove(self.app)
+        # Connections to the previous process are gone
+        await self.client.aclose()
+        self.client = httpx.AsyncClient(timeout=self.args.timeout, limits=httpx.Limits(max_connections=1000))
+        await self.start_app()
+
+    async def _wait_until_up(self, url: str, timeout: float = 120):
+        deadline = time.monotonic() + timeout
+        while True:
+            try:
+                if (await self.client.get(url)).status_code == 200:
+                    return
+            except httpx.HTTPError:
+                pass
+            for process in self.processes:
+                if process.poll() is not None:
+                    raise RuntimeError(f"Benchmark process exited, see the logs in {self.workdir}")
+            if time.monotonic() > deadline:
+                raise RuntimeError(f"{url} didn't come up, see the logs in {self.workdir}")
+            await asyncio.sleep(0.2)
+
+    async def stop(self):
+        if self.client:
+            await self.client.aclose()
+        for process in self.processes:
+            process.terminate()
+        for process in self.processes:
+            try:
+                process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                process.kill()
+
+    async def measure(self, scenario: Callable[[], Awaitable[Dict[str, Any]]]) -> Dict[str, Any]:
+        """Run a scenario, adding the GitHub calls it caused and the app's peak memory to its results."""
+
+        await self.client.post(f"{self.fake_url}/_fake/reset")
+        reset_peak_rss(self.app.pid)
+
+        result = await scenario()
+
+        github = (await self.client.get(f"{self.fake_url}/_fake/stats")).json()
+        result.update(
+            github_requests=github["requests"],
+            github_bytes=github["bytes"],
+            github_not_modified=github["not_modified"],
+            github_rate_limited=github["rate_limited"],
+            github_connections=github["connections"],
+            peak_rss_kb=peak_rss_kb(self.app.pid)
+        )
+        return result
+
+    def _range_params(self, n: int) -> Dict[str, str]:
+        start, end = self.ranges[n % len(self.ranges)]
+        return {name: value for name, value in (("start_date", start), ("end_date", end)) if value}
+
+    async def get_many(self, path: str, params: Callable[[int], Dict[str, Any]]) -> Dict[str, Any]:
+        return await run_requests(
+            lambda n: self.client.get(f"{self.app_url}{path}", params=params(n)),
+            self.args.requests, self.args.concurrency
+        )
+
+    async def cold_start(self) -> Dict[str, Any]:
+        """The first request of freshly started app processes, for the stats of the last week."""
+
+        end = datetime.fromtimestamp(self.repo.end, timezone.utc).date()
+        params = {"start_date": (end - timedelta(days=7)).isoformat(), "end_date": end.isoformat()}
+
+        latencies = []
+        errors = 0
+        for _ in range(self.args.requests):
+            await self.restart_app()
+            # The process started up before answering the health check, only its first request is timed
+            start = time.perf_counter()
+            response = await self.client.get(f"{self.app_url}/api/repos/{OWNER}/{self.repo.name}/stats", params=params)
+            latencies.append(time.perf_counter() - start)
+            errors += response.status_code >= 300
+        return summarize(latencies, sum(latencies), errors)
+
+    async def stats(self) -> Dict[str, Any]:
+        return await self.get_many(f"/api/repos/{OWNER}/{self.repo.name}/stats", self._range_params)
+
+    async def contributors(self) -> Dict[str, Any]:
+        return await self.get_many(f"/api/contributors/{OWNER}/{self.repo.name}", self._range_params)
+
+    async def weekly(self) -> Dict[str, Any]:
+        return await self.get_many(
+            f"/api/contributors/{OWNER}/{self.repo.name}/weekly", lambda n: {"weeks": (4, 12, 52)[n % 3]}
+        )
+
+    async def sync(self) -> Dict[str, Any]:
+        """A backfill, then delta syncs."""
+
+        url = f"{self.app_url}/api/repos/{OWNER}/{self.repo.name}/sync"
+        backfill = await run_requests(lambda n: self.client.post(url), 1, 1)
+        delta = await run_requests(lambda n: self.client.post(url), min(self.args.requests, 5), 1)
+        self.synced = True
+        return {**delta, "backfill": backfill["mean"], "errors": backfill["errors"] + delta["errors"]}
+
+    async def ensure_synced(self):
+        if not self.synced:
+            response = await self.client.post(f"{self.app_url}/api/repos/{OWNER}/{self.repo.name}/sync")
+            response.raise_for_status()
+            self.synced = True
+
+    async def stored_stats(self) -> Dict[str, Any]:
+        return await self.stats()
+
+    async def stored_contributors(self) -> Dict[str, Any]:
+        return await self.contributors()
+
+    async def stored_weekly(self) -> Dict[str, Any]:
+        return await self.weekly()
+
+    async def rollups(self) -> Dict[str, Any]:
+        """Stats and contributors of the synced store, from the rollups and from the activity tables."""
+
+        # Read the app's database in this process to reach the raw path the API doesn't expose
+        from sqlalchemy import create_engine
+        from app.db.store import RepositoryStore
+
+        store = RepositoryStore(create_engine(self.database_url))
+        result = {}
+        for name, use_rollups in (("rollups", True), ("raw", False)):
+            latencies = []
+            start = time.perf_counter()
+            for n in range(self.args.requests):
+                start_date, end_date = self.ranges[n % len(self.ranges)]
+                request_start = time.perf_counter()
+                store.get_repository_stats(OWNER, self.repo.name, start_date, end_date, use_rollups=use_rollups)
+                store.get_repository_contributors(OWNER, self.repo.name, start_date, end_date,
+                                                  use_rollups=use_rollups)
+                latencies.append(time.perf_counter() - request_start)
+            result[name] = summarize(latencies, time.perf_counter() - start, 0)
+
+        store.engine.dispose()
+        return {**result["rollups"], "raw": result["raw"]}
+
+    async def webhooks(self) -> Dict[str, Any]:
+        deliveries = webhooks.deliveries(self.repo, self.args.requests)
+        url = f"{self.app_url}/api/webhooks/github"
+        return await run_requests(
+            lambda n: self.client.post(url, content=deliveries[n][2], headers=webhooks.headers(deliveries[n])),
+            len(deliveries), self.args.concurrency
+        )
+
+    async def websocket(self) -> Dict[str, Any]:
+        """Time how long webhook events take to reach every subscribed WebSocket client."""
+
+        import websockets
+
+        raise_file_limit()
+
+        events = max(1, min(self.args.requests, 20))
+        received = [[] for _ in range(events)]
+        sent_at: List[float] = [0.0] * events
+        ws_url = self.app_url.replace("http://", "ws://") + "/ws/chat"
+        subscribe = json.dumps({"type": "subscribe", "owner": OWNER, "repo": self.repo.name})
+
+        async def connect():
+            connection = await websockets.connect(ws_url, open_timeout=self.args.timeout, max_queue=None)
+            await connection.send(subscribe)
+            while json.loads(await connection.recv()).get("type") != "subscribed":
+                pass
+            return connection
+
+        async def listen(connection):
+            sequence = 0
+            async for message in connection:
+                if json.loads(message).get("type") == "repository_updated" and sequence < events:
+                    received[sequence].append(time.perf_counter() - sent_at[sequence])
+                    sequence += 1
+                    if sequence == events:
+                        return
+
+        # Connect in batches rather than all at once, like clients arriving over a few seconds
+        connect_start = time.perf_counter()
+        connections = []
+        for i in range(0, self.args.clients, 500):
+            connections += await asyncio.gather(*(connect() for _ in range(min(500, self.args.clients - i))))
+        connect_time = time.perf_counter() - connect_start
+
+        listeners = [asyncio.create_task(listen(connection)) for connection in connections]
+        deliveries = [delivery for delivery in webhooks.deliveries(self.repo, events * 4)
+                      if delivery[0] == "push"][:events]
+        url = f"{self.app_url}/api/webhooks/github"
+
+        errors = 0
+        fan_out = []
+        for n, delivery in enumerate(deliveries):
+            sent_at[n] = time.perf_counter()
+            response = await self.client.post(url, content=delivery[2], headers=webhooks.headers(delivery))
+            errors += response.status_code != 200
+
+            # Wait for everyone to get it, or give up on the stragglers
+            deadline = time.perf_counter() + self.args.timeout
+            while len(received[n]) < len(connections) and time.perf_counter() < deadline:
+                await asyncio.sleep(0.005)
+            fan_out.append(max(received[n]) if received[n] else self.args.timeout)
+
+        for listener in listeners:
+            listener.cancel()
+        await asyncio.gather(*(connection.close() for connection in connections), return_exceptions=True)
+
+        all_latencies = [latency for event in received for latency in event]
+        return {
+            **summarize(fan_out, sum(fan_out), errors),
+            "clients": len(connections),
+            "connect_time": round(connect_time, 3),
+            "delivered": len(all_latencies),
+            "expected": len(connections) * events,
+            "delivery_p50": round(float(np.percentile(all_latencies, 50)), 5) if all_latencies else None,
+            "delivery_p99": round(float(np.percentile(all_latencies, 99)), 5) if all_latencies else None
+        }
+
+
+async def run(args: argparse.Namespace) -> Dict[str, Any]:
+    scenarios = [name for name in SCENARIOS if name in args.scenarios.split(",")]
+
+    with tempfile.TemporaryDirectory(prefix="gitboss-bench-") as workdir:
+        benchmark = Benchmark(args, workdir)
+        await benchmark.start()
+        try:
+            results = {}
+            for name in scenarios:
+                print(f"Running {name}...", file=sys.stderr)
+                if name in STORE_SCENARIOS:
+                    await benchmark.ensure_synced()
+                results[name] = await benchmark.measure(getattr(benchmark, name))
+        finally:
+            await benchmark.stop()
+
+    return {
+        "commit": git_commit(),
+        "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "config": {
+            name: getattr(args, name)
+            for name in ("size", "seed", "latency", "jitter", "handshake", "rate_limits", "tokens", "requests", "concurrency",
+                         "clients", "response_cache", "app_env")
+        },
+        "repository": {name: value for name, value in SIZES[args.size].items()},
+        "scenarios": results
+    }
+
+
+def print_report(report: Dict[str, Any]):
+    print(f"Commit {report['commit']} on {report['config']['size']} repository, "
+          f"{report['config']['latency'] * 1000:.0f}ms GitHub latency")
+    print(f"{'scenario':<22}{'req/s':>10}{'p50 ms':>10}{'p99 ms':>10}{'errors':>8}{'GitHub':>9}{'peak RSS MB':>13}")
+    for name, result in report["scenarios"].items():
+        rss = f"{result['peak_rss_kb'] / 1024:.1f}" if result.get("peak_rss_kb") else "-"
+        print(f"{name:<22}{result['throughput']:>10.2f}{result['p50'] * 1000:>10.1f}{result['p99'] * 1000:>10.1f}"
+              f"{result['errors']:>8}{result['github_requests']:>9}{rss:>13}")
+        if "raw" in result:
+            raw = result["raw"]
+            print(f"{'  raw scan':<22}{raw['throughput']:>10.2f}{raw['p50'] * 1000:>10.1f}{raw['p99'] * 1000:>10.1f}")
+
+
+def compare(baseline: Dict[str, Any], candidate: Dict[str, Any]):
+    """Print how every scenario's metrics changed from one report to another."""
+
+    print(f"{baseline['commit']} -> {candidate['commit']}")
+    if baseline["config"] != candidate["config"]:
+        print("Warning: the reports were run with different settings")
+
+    print(f"{'scenario':<22}{'metric':<18}{'before':>12}{'after':>12}{'change':>10}")
+    for name, after in candidate["scenarios"].items():
+        before = baseline["scenarios"].get(name)
+        if before is None:
+            continue
+        for metric, lower_is_better in COMPARED_METRICS:
+            old, new = before.get(metric), after.get(metric)
+            if not old or new is None:
+                continue
+            change = (new - old) / old * 100
+            better = (change < 0) == lower_is_better
+            marker = "" if abs(change) < 5 else (" +" if better else " -")
+            print(f"{name:<22}{metric:<18}{old:>12.4g}{new:>12.4g}{change:>+9.1f}%{marker}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the API against a fake GitHub")
+    parser.add_argument("--size", choices=list(SIZES), default="small", help="Synthetic repository size")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS),
+                        help=f"Comma-separated scenarios among {', '.join(SCENARIOS)}")
+    parser.add_argument("--requests", type=int, default=20, help="Requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=4, help="Concurrent clients per scenario")
+    parser.add_argument("--clients", type=int, default=1000, help="WebSocket clients")
+    parser.add_argument("--latency", type=float, default=0.05, help="Seconds of latency of every GitHub response")
+    parser.add_argument("--jitter", type=float, default=0.02, help="Up to this many more seconds, at random")
+    parser.add_argument("--rate-limits", choices=("unlimited", "github"), default="unlimited")
+    parser.add_argument("--handshake", type=float, default=0.0,
+                        help="Seconds GitHub takes to answer on a new connection, like a TLS handshake")
+    parser.add_argument("--tokens", type=int, default=1, help="GitHub tokens the app balances requests across")
+    parser.add_argument("--response-cache", action="store_true",
+                        help="Keep the response cache on, so repeated requests are served from it")
+    parser.add_argument("--app-env", action="append", default=[], metavar="NAME=VALUE",
+                        help="Extra environment variable for the app")
+    parser.add_argument("--timeout", type=float, default=300)
+    parser.add_argument("--output", help="Report path (default: benchmarks/results/<time>-<commit>.json)")
+    parser.add_argument("--compare", nargs=2, metavar=("BEFORE", "AFTER"), help="Compare two reports and exit")
+    args = parser.parse_args()
+
+    if args.compare:
+        with open(args.compare[0]) as before, open(args.compare[1]) as after:
+            compare(json.load(before), json.load(after))
+        return
+
+    report = asyncio.run(run(args))
+
+    output = args.output
+    if not output:
+        os.makedirs(RESULTS_DIR, exist_ok=True)
+        stamp = datetime.now(timezone.utc).strftime("%Y%m%d-%H%M%S")
+        output = os.path.join(RESULTS_DIR, f"{stamp}-{report['commit'] or 'unknown'}-{args.size}.json")
+    with open(output, "w") as report_file:
+        json.dump(report, report_file, indent=2)
+
+    print_report(report)
+    print(f"Report written to {output}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+"""Deterministic synthetic repositories, from a handful of commits up to a million.
+
+Activity is kept in numpy columns and turned into GitHub-shaped JSON only when a page of it is
+requested, so even the largest repositories take a few tens of MB.
+"""
+import hashlib
+from datetime import datetime, timezone
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+DAY = 86400
+
+# Repository sizes: commits, contributors, pull requests, issues and the days of history they span
+SIZES = {
+    "tiny": dict(commits=200, contributors=10, pull_requests=40, issues=30, days=180),
+    "small": dict(commits=5_000, contributors=100, pull_requests=800, issues=600, days=730),
+    "medium": dict(commits=50_000, contributors=800, pull_requests=6_000, issues=4_000, days=1825),
+    "large": dict(commits=250_000, contributors=2_500, pull_requests=25_000, issues=15_000, days=3650),
+    "huge": dict(commits=1_000_000, contributors=5_000, pull_requests=80_000, issues=50_000, days=3650),
+}
+
+# Share of commits whose email isn't linked to a GitHub account
+UNLINKED_COMMITS = 0.05
+
+# Average number of reviews per pull request
+REVIEWS_PER_PULL_REQUEST = 1.5
+
+REVIEW_STATES = ("APPROVED", "COMMENTED", "CHANGES_REQUESTED")
+
+# Filler making bodies about as large as real ones
+LOREM = (
+    "Lorem ipsum dolor sit amet, consectetur adipiscing elit, sed do eiusmod tempor incididunt ut labore "
+    "et dolore magna aliqua. Ut enim ad minim veniam, quis nostrud exercitation ullamco laboris nisi ut "
+    "aliquip ex ea commodo consequat. "
+)
+
+
+def iso(timestamp: int) -> str:
+    return datetime.fromtimestamp(int(timestamp), timezone.utc).strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+class SyntheticRepository:
+    """A repository with reproducible commits, pull requests, reviews and issues.
+
+    Contributions follow a long-tailed distribution, so a few contributors author most of the
+    activity like in real projects. Commits are ordered newest first, like GitHub lists them;
+    pull requests and issues share one numbering that grows with their creation time.
+    """
+
+    def __init__(self, owner: str, name: str, commits: int, contributors: int, pull_requests: int, issues: int,
+                 days: int, seed: int = 0, end: Optional[int] = None):
+        self.owner = owner
+        self.name = name
+        self.seed = seed
+        self.base_url = "https://api.github.com"
+
+        rng = np.random.default_rng(seed)
+
+        # History ends at the start of today so that recent weeks have activity
+        self.end = end if end is not None else int(datetime.now(timezone.utc).timestamp()) // DAY * DAY
+        self.start = self.end - days * DAY
+
+        self.logins = [f"dev{n:05d}" for n in range(contributors)]
+        weights = 1 / np.arange(1, contributors + 1) ** 1.1
+        weights /= weights.sum()
+
+        self.commit_times = np.sort(rng.integers(self.start, self.end, commits))[::-1].copy()
+        self.commit_authors = rng.choice(contributors, commits, p=weights).astype(np.int32)
+        self.commit_authors[rng.random(commits) < UNLINKED_COMMITS] = -1
+
+        # Pull requests and issues, numbered in creation order
+        items = pull_requests + issues
+        self.item_times = np.sort(rng.integers(self.start, self.end, items))
+        self.item_is_pr = np.zeros(items, dtype=bool)
+        self.item_is_pr[rng.choice(items, pull_requests, replace=False)] = True
+        self.item_authors = rng.choice(contributors, items, p=weights).astype(np.int32)
+
+        # Recent items are more likely to still be open
+        recent = self.item_times > self.end - 30 * DAY
+        self.item_open = rng.random(items) < np.where(recent, 0.5, 0.08)
+        self.item_closed_times = self.item_times + rng.integers(3600, 30 * DAY, items)
+        self.item_merged = self.item_is_pr & ~self.item_open & (rng.random(items) < 0.8)
+        self.item_updated_times = np.where(
+            self.item_open,
+            np.minimum(self.item_times + rng.integers(0, 10 * DAY, items), self.end),
+            np.minimum(self.item_closed_times, self.end)
+        )
+        # Reviews update their pull request, and they're all submitted within 5 days
+        self.item_updated_times = np.where(
+            self.item_is_pr,
+            np.maximum(self.item_updated_times, np.minimum(self.item_times + 5 * DAY, self.end)),
+            self.item_updated_times
+        )
+
+        self.review_counts = np.where(self.item_is_pr, rng.poisson(REVIEWS_PER_PULL_REQUEST, items), 0)
+
+        self.weights = weights
+
+    @classmethod
+    def of_size(cls, owner: str, size: str, seed: int = 0, name: Optional[str] = None) -> "SyntheticRepository":
+        """Generate one of the preset repository sizes."""
+        return cls(owner, name or size, seed=seed, **SIZES[size])
+
+    @property
+    def full_name(self) -> str:
+        return f"{self.owner}/{self.name}"
+
+    @property
+    def id(self) -> int:
+        return int(hashlib.sha1(self.full_name.encode()).hexdigest()[:8], 16)
+
+    def sha(self, index: int) -> str:
+        """The SHA of the commit at an index, the newest being 0."""
+        return hashlib.sha1(f"{self.seed}:{self.full_name}:{len(self.commit_times) - index}".encode()).hexdigest()
+
+    def user(self, author: int) -> Optional[Dict[str, Any]]:
+        """A user in the shape GitHub embeds in other objects."""
+
+        if author < 0:
+            return None
+
+        login = self.logins[author]
+        url = f"{self.base_url}/users/{login}"
+        return {
+            "login": login,
+            "id": 1000 + author,
+            "node_id": f"MDQ6VXNlcjEwMDA{author}",
+            "avatar_url": f"https://avatars.githubusercontent.com/u/{1000 + author}?v=4",
+            "gravatar_id": "",
+            "url": url,
+            "html_url": f"https://github.com/{login}",
+            "followers_url": f"{url}/followers",
+            "following_url": f"{url}/following{{/other_user}}",
+            "gists_url": f"{url}/gists{{/gist_id}}",
+            "starred_url": f"{url}/starred{{/owner}}{{/repo}}",
+            "subscriptions_url": f"{url}/subscriptions",
+            "organizations_url": f"{url}/orgs",
+            "repos_url": f"{url}/repos",
+            "events_url": f"{url}/events{{/privacy}}",
+            "received_events_url": f"{url}/received_events",
+            "type": "User",
+            "site_admin": False
+        }
+
+    def repository(self) -> Dict[str, Any]:
+        return {
+            "id": self.id,
+            "name": self.name,
+            "full_name": self.full_name,
+            "owner": {"login": self.owner, "id": 1, "type": "Organization"},
+            "private": False,
+            "html_url": f"https://github.com/{self.full_name}",
+            "description": f"Synthetic {self.name} repository",
+            "default_branch": "main",
+            "archived": False,
+            # Kilobytes, roughly proportional to the history
+            "size": len(self.commit_times) * 4,
+            "created_at": iso(self.start),
+            "pushed_at": iso(self.commit_times[0]) if len(self.commit_times) else iso(self.start),
+            "open_issues_count": int(self.item_open.sum())
+        }
+
+    def commit(self, index: int) -> Dict[str, Any]:
+        sha = self.sha(index)
+        author = int(self.commit_authors[index])
+        date = iso(self.commit_times[index])
+        login = self.logins[author] if author >= 0 else "someone"
+        signature = {"name": login, "email": f"{login}@users.noreply.github.com", "date": date}
+        url = f"{self.base_url}/repos/{self.full_name}/commits/{sha}"
+        parent = self.sha(index + 1)
+
+        return {
+            "sha": sha,
+            "node_id": f"C_{sha[:20]}",
+            "commit": {
+                "author": signature,
+                "committer": signature,
+                "message": f"Change {len(self.commit_times) - index}\n\n{LOREM[:120]}",
+                "tree": {"sha": sha[::-1], "url": f"{self.base_url}/repos/{self.full_name}/git/trees/{sha[::-1]}"},
+                "url": f"{self.base_url}/repos/{self.full_name}/git/commits/{sha}",
+                "comment_count": 0,
+                "verification": {"verified": False, "reason": "unsigned", "signature": None, "payload": None}
+            },
+            "url": url,
+            "html_url": f"https://github.com/{self.full_name}/commit/{sha}",
+            "comments_url": f"{url}/comments",
+            "author": self.user(author),
+            "committer": self.user(author),
+            "parents": [{"sha": parent, "url": f"{self.base_url}/repos/{self.full_name}/commits/{parent}",
+                         "html_url": f"https://github.com/{self.full_name}/commit/{parent}"}]
+        }
+
+    def item(self, index: int) -> Dict[str, Any]:
+        """A pull request or issue in the shape of the issues and search endpoints."""
+
+        number = index + 1
+        is_pr = bool(self.item_is_pr[index])
+        is_open = bool(self.item_open[index])
+        url = f"{self.base_url}/repos/{self.full_name}/issues/{number}"
+        closed_at = None if is_open else iso(self.item_closed_times[index])
+
+        item = {
+            "url": url,
+            "repository_url": f"{self.base_url}/repos/{self.full_name}",
+            "comments_url": f"{url}/comments",
+            "html_url": f"https://github.com/{self.full_name}/{'pull' if is_pr else 'issues'}/{number}",
+            "id": self.id + number,
+            "node_id": f"I_{self.id + number}",
+            "number": number,
+            "title": f"{'Change' if is_pr else 'Problem'} {number}",
+            "user": self.user(int(self.item_authors[index])),
+            "labels": [],
+            "state": "open" if is_open else "closed",
+            "locked": False,
+            "assignee": None,
+            "assignees": [],
+            "comments": int(number % 7),
+            "created_at": iso(self.item_times[index]),
+            "updated_at": iso(self.item_updated_times[index]),
+            "closed_at": closed_at,
+            "author_association": "CONTRIBUTOR",
+            "body": LOREM * 3
+        }
+
+        if is_pr:
+            pr_url = f"{self.base_url}/repos/{self.full_name}/pulls/{number}"
+            item["pull_request"] = {
+                "url": pr_url,
+                "html_url": f"https://github.com/{self.full_name}/pull/{number}",
+                "diff_url": f"https://github.com/{self.full_name}/pull/{number}.diff",
+                "patch_url": f"https://github.com/{self.full_name}/pull/{number}.patch",
+                "merged_at": closed_at if self.item_merged[index] else None
+            }
+
+        return item
+
+    def reviews(self, number: int) -> List[Dict[str, Any]]:
+        """The reviews of a pull request, or an empty list for anything else."""
+
+        index = number - 1
+        if not 0 <= index < len(self.item_times) or not self.item_is_pr[index]:
+            return []
+
+        rng = np.random.default_rng((self.seed, number))
+        count = int(self.review_counts[index])
+        reviewers = rng.choice(len(self.logins), count, p=self.weights)
+        delays = np.sort(rng.integers(600, 5 * DAY, count))
+        states = rng.integers(0, len(REVIEW_STATES), count)
+
+        return [
+            {
+                "id": (self.id + number) * 100 + n,
+                "node_id": f"PRR_{(self.id + number) * 100 + n}",
+                "user": self.user(int(reviewer)),
+                "body": LOREM[:80],
+                "state": REVIEW_STATES[int(state)],
+                "html_url": f"https://github.com/{self.full_name}/pull/{number}#pullrequestreview-{n}",
+                "pull_request_url": f"{self.base_url}/repos/{self.full_name}/pulls/{number}",
+                "author_association": "CONTRIBUTOR",
+                "submitted_at": iso(min(int(self.item_times[index] + delay), self.end)),
+                "commit_id": self.sha(0)
+            }
+            for n, (reviewer, delay, state) in enumerate(zip(reviewers, delays, states))
+        ]
+
+    def contributors(self, limit: int = 500) -> List[Dict[str, Any]]:
+        """Linked contributors by descending number of commits, as the contributors endpoint lists them."""
+
+        linked = self.commit_authors[self.commit_authors >= 0]
+        counts = np.bincount(linked, minlength=len(self.logins))
+        order = np.argsort(-counts, kind="stable")
+        return [
+            {**self.user(int(author)), "contributions": int(counts[author])}
+            for author in order[:limit] if counts[author] > 0
+        ]
+
+    def contributor_stats(self, limit: int = 100) -> List[Dict[str, Any]]:
+        """Weekly commit counts of the top contributors, in the shape of ``stats/contributors``."""
+
+        first_week = (self.start // DAY - 3) // 7 * 7 * DAY + 3 * DAY  # Sundays, like GitHub
+        weeks = (self.end - first_week) // (7 * DAY) + 1
+        linked = self.commit_authors >= 0
+        week_of = (self.commit_times[linked] - first_week) // (7 * DAY)
+        counts = np.zeros((len(self.logins), weeks), dtype=np.int64)
+        np.add.at(counts, (self.commit_authors[linked], week_of), 1)
+
+        totals = counts.sum(axis=1)
+        top = [int(author) for author in np.argsort(-totals, kind="stable")[:limit] if totals[author] > 0]
+        return [
+            {
+                "author": self.user(author),
+                "total": int(totals[author]),
+                "weeks": [
+                    {"w": int(first_week + week * 7 * DAY), "a": 0, "d": 0, "c": int(counts[author, week])}
+                    for week in range(weeks)
+                ]
+            }
+            # GitHub lists them by ascending total
+            for author in reversed(top)
+        ]
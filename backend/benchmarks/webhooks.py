@@ -0,0 +1,116 @@
+"""Signed GitHub webhook deliveries carrying new activity of a synthetic repository."""
+import hmac
+import json
+import uuid
+import hashlib
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from benchmarks.synthetic import SyntheticRepository, iso
+
+# Secret the benchmarked app is started with
+WEBHOOK_SECRET = "benchmark-secret"
+
+# An event name, its delivery id and its body
+Delivery = Tuple[str, str, bytes]
+
+
+def sign(body: bytes, secret: str = WEBHOOK_SECRET) -> str:
+    """Build the X-Hub-Signature-256 header of a body."""
+    return "sha256=" + hmac.new(secret.encode(), body, hashlib.sha256).hexdigest()
+
+
+def headers(delivery: Delivery, secret: str = WEBHOOK_SECRET) -> Dict[str, str]:
+    event, delivery_id, body = delivery
+    return {
+        "Content-Type": "application/json",
+        "X-GitHub-Event": event,
+        "X-GitHub-Delivery": delivery_id,
+        "X-Hub-Signature-256": sign(body, secret)
+    }
+
+
+def _repository(repo: SyntheticRepository) -> Dict[str, Any]:
+    return {
+        "id": repo.id,
+        "name": repo.name,
+        "full_name": repo.full_name,
+        "owner": {"login": repo.owner, "id": 1, "type": "Organization"},
+        "default_branch": "main"
+    }
+
+
+def push(repo: SyntheticRepository, sequence: int, commits: int = 3) -> Dict[str, Any]:
+    """A push of new commits to the default branch, authored by synthetic contributors."""
+
+    rng = np.random.default_rng((repo.seed, sequence))
+    authors = rng.choice(len(repo.logins), commits, p=repo.weights)
+    timestamp = repo.end - int(rng.integers(0, 86400))
+
+    return {
+        "ref": "refs/heads/main",
+        "before": repo.sha(0),
+        "after": hashlib.sha1(f"push:{sequence}:{commits - 1}".encode()).hexdigest(),
+        "repository": _repository(repo),
+        "commits": [
+            {
+                "id": hashlib.sha1(f"push:{sequence}:{n}".encode()).hexdigest(),
+                "distinct": True,
+                "message": f"Pushed change {sequence}.{n}",
+                "timestamp": iso(timestamp + n),
+                "author": {
+                    "name": repo.logins[author],
+                    "email": f"{repo.logins[author]}@users.noreply.github.com",
+                    "username": repo.logins[author]
+                }
+            }
+            for n, author in enumerate(authors)
+        ],
+        "sender": repo.user(int(authors[0]))
+    }
+
+
+def _pull_request(repo: SyntheticRepository, index: int) -> Dict[str, Any]:
+    item = repo.item(index)
+    return {**item, "merged_at": item["pull_request"]["merged_at"]}
+
+
+def pull_request_review(repo: SyntheticRepository, sequence: int) -> Dict[str, Any]:
+    """A review submitted on one of the most recent pull requests."""
+
+    prs = np.flatnonzero(repo.item_is_pr)[-50:]
+    index = int(prs[sequence % len(prs)])
+    reviewer = int(np.random.default_rng((repo.seed, sequence)).choice(len(repo.logins), p=repo.weights))
+
+    return {
+        "action": "submitted",
+        "repository": _repository(repo),
+        "pull_request": _pull_request(repo, index),
+        "review": {
+            "id": 10 ** 12 + sequence,
+            "user": repo.user(reviewer),
+            "state": "APPROVED",
+            "submitted_at": iso(repo.end - sequence % 86400)
+        },
+        "sender": repo.user(reviewer)
+    }
+
+
+def issues(repo: SyntheticRepository, sequence: int) -> Dict[str, Any]:
+    """An edit of one of the most recent issues."""
+
+    items = np.flatnonzero(~repo.item_is_pr)[-50:]
+    issue = repo.item(int(items[sequence % len(items)]))
+    return {"action": "edited", "repository": _repository(repo), "issue": issue, "sender": issue["user"]}
+
+
+def deliveries(repo: SyntheticRepository, count: int) -> List[Delivery]:
+    """A mix of push, review and issue deliveries, mostly pushes like on a busy repository."""
+
+    builders = [("push", push), ("push", push), ("pull_request_review", pull_request_review), ("issues", issues)]
+    result = []
+    for sequence in range(count):
+        event, build = builders[sequence % len(builders)]
+        result.append((event, str(uuid.UUID(int=sequence)), json.dumps(build(repo, sequence)).encode()))
+    return result